@@ -1,7 +1,9 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-import os
+from src.static import StaticCache
 
 app = FastAPI()
 
@@ -13,11 +15,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.get("/", response_class=HTMLResponse)
-def serve_index():
-    # 直接读取当前目录下的 index.html
-    with open("index.html", "r", encoding="utf-8") as f:
-        return f.read()
+# 前端调试用：index.html 改了立即生效
+static = StaticCache(pathlib.Path(__file__).resolve().parent, dev=True)
+
+@app.get("/")
+def serve_index(request: Request):
+    status, body, headers = static.respond("index.html", request.headers)
+    return Response(body, status_code=status, headers=headers)
 
 @app.post("/api/login")
 async def login(request: Request):
@@ -1,10 +1,17 @@
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from enum import Enum
+from typing import Optional
 import os
-from src.db import SchoolDB
+from src.db import SchoolDB, ndjson_page
+from src.async_db import AsyncSchoolDB, DBBusy
+from src.session import SessionPool
+from src.attendance import AttendanceIngest
+from src.auth import LoginService, SessionTokens
+from src.static import StaticCache
+import asyncio
 # 枚举表示身份
 class RoleEnum(int, Enum):
     student = 0
@@ -23,20 +30,50 @@ app.add_middleware(
 # 挂载前端静态文件夹
 app.mount("/frontend", StaticFiles(directory="frontend"), name="frontend")
 
-# 返回前端页面
-@app.get("/", response_class=HTMLResponse)
-def serve_index():
-    with open(os.path.join("frontend", "index.html"), "r", encoding="utf-8") as f:
-        return f.read()
+# 返回前端页面：启动时读入内存并预压缩，FRONTEND_DEV=1 时按 mtime 热加载
+static = StaticCache("frontend", dev=os.environ.get("FRONTEND_DEV") == "1")
+
+@app.get("/")
+def serve_index(request: Request):
+    status, body, headers = static.respond("index.html", request.headers)
+    return Response(body, status_code=status, headers=headers)
 
 # ------------------- 数据库 -------------------
-db = SchoolDB("school.db")
+# 连接池 + 有界线程池：阻塞的 SQLite 调用不占用事件循环
+DB_WORKERS = int(os.environ.get("SCHOOL_DB_WORKERS", "8"))
+CHAT_WORKERS = int(os.environ.get("CHAT_WORKERS", "4"))
+# 连接数 = 数据库线程 + 聊天线程 + 考勤写线程，各自都不用等连接
+db = SchoolDB(os.environ.get("SCHOOL_DB", "school.db"), pool_size=DB_WORKERS + CHAT_WORKERS + 1)
+adb = AsyncSchoolDB(db, max_workers=DB_WORKERS,
+                    max_pending=int(os.environ.get("SCHOOL_DB_MAX_PENDING", "256")))
+# 登录服务：近期校验通过的账号缓存在内存，重复登录不查库
+auth = LoginService(db, ttl=float(os.environ.get("LOGIN_CACHE_TTL", "60")))
+# 会话令牌：登录时签发，之后的调用凭令牌在内存中取身份
+tokens = SessionTokens(db, ttl=float(os.environ.get("SESSION_TTL", "1800")),
+                       max_sessions=int(os.environ.get("SESSION_MAX", "100000")))
+
+def bearer(request: Request, data: dict) -> str:
+    """令牌取自 Authorization: Bearer 头，或请求体的 token 字段"""
+    header = request.headers.get("authorization", "")
+    if header.lower().startswith("bearer "):
+        return header[7:].strip()
+    return str(data.get("token", ""))
 
 @app.on_event("startup")
 async def startup_event():
     print("FastAPI 启动，执行初始化")
-    # 这里调用你的 DB 初始化函数
-    db.ensure_tables() # 假设你写了这个方法
+    await adb.ensure_tables()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    attendance.close()
+    sessions.shutdown()
+    adb.shutdown()
+
+# 排队过长直接拒绝，避免请求无限堆积
+@app.exception_handler(DBBusy)
+async def db_busy_handler(request: Request, exc: DBBusy):
+    return JSONResponse({"success": False, "message": "服务繁忙，请稍后再试"}, status_code=503)
 
 # ------------------- 注册接口 -------------------
 @app.post("/api/register")
@@ -50,11 +87,13 @@ async def register(request: Request):
 
     try:
         if role_str == "student":
-            user_id = db.register_student(name, pwd, email)
+            user_id = await adb.register_student(name, pwd, email)
         else:
-            user_id = db.register_teacher(name, pwd, email)
+            user_id = await adb.register_teacher(name, pwd, email)
         print(f"[REGISTER] id: {user_id}, name: {name}, flag: {flag}")
         return JSONResponse({"success": True, "message": "注册成功", "id": user_id})
+    except DBBusy:
+        raise
     except Exception as e:
         return JSONResponse({"success": False, "message": str(e)})
 
@@ -67,22 +106,138 @@ async def login(request: Request):
     role_str = data.get("role", "student")
     flag = RoleEnum[role_str].value if role_str in RoleEnum.__members__ else RoleEnum.student.value
 
-    if role_str == "student":
-        ok = db.login_student(name, pwd)
-    else:
-        ok = db.login_teacher(name, pwd)
+    user_id = auth.cached(role_str, name, pwd)           # 命中缓存直接返回，不进线程池
+    if user_id is None:
+        user_id = await adb.run(auth.authenticate, role_str, name, pwd)
 
-    if ok:
+    if user_id is not None:
         print(f"[LOGIN] name: {name}, flag: {flag}")
-        return JSONResponse({"success": True, "message": "登录成功"})
+        token = tokens.issue(user_id, role_str == "student")
+        return JSONResponse({"success": True, "message": "登录成功", "id": user_id, "role": role_str,
+                             "token": token})
     else:
         return JSONResponse({"success": False, "message": "用户名或密码错误"})
 
-# 聊天接口
+@app.post("/api/logout")
+async def logout(request: Request):
+    data = await request.json()
+    token = bearer(request, data)
+    if tokens.resolve(token) is None:
+        return JSONResponse({"success": False, "message": "请先登录"}, status_code=401)
+    tokens.revoke(token)
+    sessions.drop(tokens.key(token))
+    return JSONResponse({"success": True})
+
+# ------------------- 聊天接口：消息按 DSL 执行 -------------------
+# 每个会话常驻一个解释器，变量跨消息保留；脚本停在 INPUT 时挂起（不占线程），下一条消息即为输入值
+# 脚本在会话池自己的线程池里执行，不与登录、打卡等数据库调用抢线程
+sessions = SessionPool(db,
+                       max_sessions=int(os.environ.get("CHAT_MAX_SESSIONS", "10000")),
+                       idle_ttl=float(os.environ.get("CHAT_IDLE_TTL", "1800")),
+                       workers=CHAT_WORKERS)
+
 @app.post("/api/chat")
 async def chat(request: Request):
     data = await request.json()
     msg = data.get("msg", "")
-    print(f"[CHAT] msg: {msg}")
-    return JSONResponse({"reply": "我不知道"})
+    token = bearer(request, data)
+    rt = tokens.resolve(token)               # 身份只认令牌，不信任请求体里的 id/role
+    if rt is None:
+        return JSONResponse({"reply": "请先登录"}, status_code=401)
+    session_id = tokens.key(token)           # 会话与令牌绑定，客户端不能指定
+    print(f"[CHAT] user: {rt.user_id}, msg: {msg}")
+    try:
+        reply, waiting = await sessions.chat(session_id, rt.user_id, rt.is_student, msg)
+    except PermissionError as e:
+        return JSONResponse({"reply": str(e)}, status_code=403)
+    return JSONResponse({"reply": reply or "（无输出）", "waiting": waiting})
+
+# ------------------- 考勤打卡：写后队列，攒批组提交 -------------------
+attendance = AttendanceIngest(db, flush_interval=float(os.environ.get("ATTEND_FLUSH_INTERVAL", "0.05")))
+
+@app.post("/api/attendance")
+async def check_in(request: Request):
+    """
+    body: {"records": [{"student": 名字, "course_id": id, "status": normal|absent|late_or_early}, ...]}
+    需要登录；学生只能给自己打卡（忽略 student 字段），老师按名字给学生打卡。
+    队列满时不等待：对应记录返回 retry=true，整体状态码 503。
+    """
+    data = await request.json()
+    rt = tokens.resolve(bearer(request, data))
+    if rt is None:
+        return JSONResponse({"success": False, "message": "请先登录"}, status_code=401)
+    records = data.get("records") or [data]
+
+    async def one(rec):
+        try:
+            student = rt.user_id if rt.is_student else str(rec.get("student", ""))
+            fut = attendance.submit(student, rec.get("course_id"),
+                                    rec.get("status", "normal"), block=False)
+            return await asyncio.wrap_future(fut)      # 组提交落盘后才返回
+        except Exception as e:
+            return e
+
+    def result(r):
+        if r is True:
+            return {"ok": True}
+        if isinstance(r, DBBusy):
+            return {"ok": False, "message": "服务繁忙，请稍后再试", "retry": True}
+        return {"ok": False, "message": str(r)}
+
+    results = await asyncio.gather(*(one(rec) for rec in records))
+    busy = any(isinstance(r, DBBusy) for r in results)
+    return JSONResponse({"success": all(r is True for r in results),
+                         "results": [result(r) for r in results]},
+                        status_code=503 if busy else 200)
+
+# ------------------- 只读列表：keyset 分页，NDJSON 流式输出 -------------------
+# after：上一页最后一行的 id（缺省从头开始）；limit：最多返回的行数（缺省不限）。
+# 服务端每次查 MAX_PAGE 行、编码后立即输出，整张表也只占一页的内存。
+async def ndjson_stream(kind: str, after: int, limit: Optional[int], **filters) -> StreamingResponse:
+    fetch, fields = getattr(db, f"page_{kind}"), db.PAGE_FIELDS[kind]
+
+    def page(after: int, remaining: Optional[int]):
+        size = db.MAX_PAGE if remaining is None else min(db.MAX_PAGE, remaining)
+        if size <= 0:
+            return "", after, 0, False
+        rows = fetch(after=after, limit=size, **filters)
+        more = len(rows) == size and (remaining is None or remaining > size)
+        return ndjson_page(fields, rows), (rows[-1][0] if rows else after), len(rows), more
+
+    # 第一页在开始输出之前查，繁忙时仍能正常返回 503
+    first = await adb.run(page, after, limit)
+
+    async def body():
+        text, last, n, more = first
+        remaining = limit
+        yield text
+        while more:
+            remaining = None if remaining is None else remaining - n
+            text, last, n, more = await adb.run(page, last, remaining)
+            yield text
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+@app.get("/api/courses")
+async def list_courses(after: int = 0, limit: Optional[int] = None):
+    return await ndjson_stream("courses", after, limit)
+
+@app.get("/api/courses/{course_id}/roster")
+async def course_roster(course_id: int, request: Request, after: int = 0, limit: Optional[int] = None):
+    rt = tokens.resolve(bearer(request, {}))
+    if rt is None:
+        return JSONResponse({"success": False, "message": "请先登录"}, status_code=401)
+    if rt.is_student:
+        return JSONResponse({"success": False, "message": "只有老师可以查看选课名单"}, status_code=403)
+    return await ndjson_stream("roster", after, limit, course_id=course_id)
 
+@app.get("/api/attendance")
+async def attendance_history(request: Request, after: int = 0, limit: Optional[int] = None,
+                             student_id: Optional[int] = None, course_id: Optional[int] = None):
+    """学生只能看自己的考勤，老师可按学生 / 课程过滤"""
+    rt = tokens.resolve(bearer(request, {}))
+    if rt is None:
+        return JSONResponse({"success": False, "message": "请先登录"}, status_code=401)
+    if rt.is_student:
+        student_id = rt.user_id
+    return await ndjson_stream("attendance", after, limit, student_id=student_id, course_id=course_id)
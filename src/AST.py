@@ -1,99 +1,142 @@
 from __future__ import annotations
-from dataclasses import dataclass, field
-from typing import List, Tuple
-MAX_NODE = 300
+from array import array
+from typing import Iterable, List, Tuple
 
 class Node:
+    """单个节点的只读快照（Tree 内部按列存储，不再保存 Node 对象）"""
     __slots__ = ('text', 'nxt')
     def __init__(self, text: str, nxt: list[int]):
         self.text = text
         self.nxt = nxt  # [true, false]
 
+class _Frame:
+    """一个未闭合的 IF 结构"""
+    __slots__ = ('head', 'ends', 'has_else')
+    def __init__(self, head: int):
+        self.head = head            # 当前分支头（IF/ELIF/ELSE）
+        self.ends: list[int] = []   # 已结束分支的最后一条语句
+        self.has_else = False
+
+
 class Tree:
+    """
+    语法树按列存储，节点数不设上限：
+      t_nxt / f_nxt : array('i')，真/假后继，-1 表示无
+      text_ids      : array('i')，指向去重后的文本表 texts
+      line_no       : array('i')，节点在源文件中的行号（诊断用）
+    """
     def __init__(self, file_name: str):
         self.file_name = file_name
-        self.nodes: list[Node | None] = [None] * MAX_NODE
-        self.size: int = 0
-
-    def add_node(self, text: str, nxt=None) -> int:
-        if self.size >= MAX_NODE:
-            raise Exception("Too many nodes")
-        if nxt is None:
-            nxt = [-1, -1]
-        self.nodes[self.size] = Node(text, nxt)
-        self.size += 1
-        return self.size - 1
+        self.t_nxt = array('i')
+        self.f_nxt = array('i')
+        self.text_ids = array('i')
+        self.line_no = array('i')
+        self.texts: list[str] = []              # 去重文本表
+        self._text_index: dict[str, int] = {}
+
+    @property
+    def size(self) -> int:
+        return len(self.text_ids)
+
+    def add_node(self, text: str, nxt=None, line: int = 0) -> int:
+        tid = self._text_index.get(text)
+        if tid is None:
+            tid = self._text_index[text] = len(self.texts)
+            self.texts.append(text)
+        t, f = nxt if nxt is not None else (-1, -1)
+        self.text_ids.append(tid)
+        self.t_nxt.append(t)
+        self.f_nxt.append(f)
+        self.line_no.append(line)
+        return len(self.text_ids) - 1
+
+    def text(self, idx: int) -> str:
+        return self.texts[self.text_ids[idx]]
+
+    def node(self, idx: int) -> Node:
+        return Node(self.text(idx), [self.t_nxt[idx], self.f_nxt[idx]])
 
     def load_from_file(self):
         """解析 DSL 文件并构建语法树"""
         with open(self.file_name, "r", encoding="utf-8") as f:
-            lines = [line.rstrip() for line in f if line.strip() != ""]
-        stack = []   # (控制节点idx, indent)
-        prev_idx = -1
-
-        def get_indent(line: str) -> int:
-            return len(line) - len(line.lstrip(" "))
-
+            self.load_from_lines(f)
+
+    def load_from_lines(self, lines: Iterable[str]):
+        """
+        单遍、基于栈构建控制流图，O(n) 与嵌套深度无关。
+        pending 是“真后继待定”的节点：下一条语句出现时把它连过去；
+        每个分支结束时 pending 即该分支最后一条语句，记入 ends，ENDIF 时统一连向 ENDIF。
+        """
+        builder = _Builder(self)
         for raw in lines:
-            indent = get_indent(raw)
-            # indent 越大，层级越低
-            text = raw.strip()
-            cur_idx = self.add_node(text)
-
-            if text.startswith("IF"):
-                stack.append({"type": "IF", "idx": cur_idx, "indent": indent, "branches": []})
-            elif text.startswith("ELIF") or text.startswith("ELSE"):
-                # 前一个 IF/ELIF 连接到当前分支
-                while stack and stack[-1]["indent"] > indent:
-                    stack.pop()
-                if not stack:
-                    raise Exception("Unmatched ELIF/ELSE")
-                top = stack[-1]
-                self.nodes[top["idx"]].nxt[1] = cur_idx
-                top["branches"].append(cur_idx)
-                stack.append({"type": text.split()[0], "idx": cur_idx, "indent": indent, "branches": []})
-            elif text.startswith("ENDIF"):
-                # 闭合一个完整的 if 结构
-                cur_block = []
-                while stack and stack[-1]["type"] != "IF":
-                    cur_block.append(stack.pop())
-                if not stack:
-                    raise Exception("Unmatched ENDIF")
-                top_if = stack.pop()
-                cur_block.append(top_if)
-
-                top_idx = top_if["idx"]
-                if self.nodes[top_idx].nxt[1] == -1:
-                    self.nodes[top_idx].nxt[1] = cur_idx
-
-                cur_block = sorted(cur_block, key=lambda x: x["idx"])
-
-                # 找出各分支的终止语句，全部连向 ENDIF
-                for branch in cur_block:
-                    idx = branch["idx"]
-                    # 找出该分支下的最后一条语句
-                    j = idx + 1
-                    while j < self.size and get_indent(lines[j]) > branch["indent"]:
-                        j += 1
-                    last_stmt = j - 1
-                    if last_stmt >= idx:
-                        self.nodes[last_stmt].nxt[0] = cur_idx  # 连到 ENDIF
-
-            else:
-                # 普通语句顺序执行
-                if prev_idx != -1:
-                    self.nodes[prev_idx].nxt[0] = cur_idx
-
-            prev_idx = cur_idx
+            builder.feed(raw)
+        builder.finish()
 
     def print_tree(self):
         print("语法树结构：")
         for i in range(self.size):
-            n = self.nodes[i]
+            n = self.node(i)
             print(f"[{i}] {n.text:25s} → nxt = {n.nxt}")
 
 
 
+class _Builder:
+    """Tree 的增量构建器：逐行 feed，最后 finish 校验闭合"""
+    def __init__(self, tree: Tree):
+        self.tree = tree
+        self.stack: list[_Frame] = []
+        self.pending = -1
+        self.line = 0               # 已读入的原始行数（含空行）
+
+    @property
+    def depth(self) -> int:
+        return len(self.stack)
+
+    def feed(self, raw: str) -> int:
+        """加入一行，返回节点下标；空行返回 -1"""
+        self.line += 1
+        text = raw.strip()
+        if not text:
+            return -1
+        tree, stack = self.tree, self.stack
+        kw = text.split(maxsplit=1)[0]
+        cur_idx = tree.add_node(text, line=self.line)
+
+        if kw == "ELIF" or kw == "ELSE":
+            if not stack:
+                raise Exception("Unmatched ELIF/ELSE")
+            top = stack[-1]
+            if top.has_else:
+                raise Exception(f"{kw} after ELSE")
+            top.ends.append(self.pending)        # 上一分支到此结束
+            tree.f_nxt[top.head] = cur_idx        # 上一分支条件不成立 → 本分支
+            top.head = cur_idx
+            top.has_else = kw == "ELSE"
+        elif kw == "ENDIF":
+            if not stack:
+                raise Exception("Unmatched ENDIF")
+            top = stack.pop()
+            top.ends.append(self.pending)
+            if not top.has_else:                  # 所有条件都不成立 → 跳到 ENDIF
+                tree.f_nxt[top.head] = cur_idx
+            t_nxt = tree.t_nxt
+            for last in top.ends:
+                t_nxt[last] = cur_idx
+        else:
+            # 普通语句与 IF：接在 pending 之后顺序执行
+            if self.pending != -1:
+                tree.t_nxt[self.pending] = cur_idx
+            if kw == "IF":
+                stack.append(_Frame(cur_idx))
+
+        self.pending = cur_idx
+        return cur_idx
+
+    def finish(self):
+        if self.stack:
+            raise Exception("Unmatched IF")
+
+
 if __name__ == "__main__":
     test_tre =  Tree ("/media/gaoyunze/newspace/DSL_BUPT/test/test_ast.dsl")
     test_tre.load_from_file()
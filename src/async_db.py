@@ -0,0 +1,65 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+from src.db import SchoolDB
+
+
+class DBBusy(RuntimeError):
+    """排队中的数据库调用超过上限，调用方应直接返回 503"""
+
+
+class AsyncSchoolDB:
+    """
+    SchoolDB 的异步外壳：每次调用派发到有界线程池执行，事件循环不被 SQLite / SHA-256 阻塞。
+    max_pending 限制同时在途（执行中 + 排队）的调用数，超出立即抛 DBBusy 形成背压。
+    用法：
+        adb = AsyncSchoolDB(SchoolDB("school.db", pool_size=8))
+        ok = await adb.login_student(name, pwd)
+    """
+
+    def __init__(self, db: SchoolDB, max_workers: int = 8, max_pending: int = 256):
+        self.db = db
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="school-db")
+        self._pending = 0           # 在途调用数：提交时 +1，线程池里真正执行完（或取消）时 -1
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _done(self, _fut: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        在线程池中执行任意阻塞函数。
+        请求被取消时，已在执行的调用仍占着名额直到真正结束，背压按实际在途的工作计算。
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise DBBusy(f"数据库繁忙：{self._pending} 个请求排队中")
+            self._pending += 1
+        try:
+            fut = self._executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._done(None)
+            raise
+        fut.add_done_callback(self._done)
+        return await asyncio.wrap_future(fut)
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.db, name)
+        if not callable(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+        call.__name__ = name
+        return call
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+        self.db.close_pool()
@@ -0,0 +1,244 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from src.db import SchoolDB
+from src.async_db import DBBusy
+
+STATUSES = frozenset(('normal', 'absent', 'late_or_early'))
+
+# 一条待写入的打卡：(学生名或学生 id, 课程 id, 状态, 打卡时刻, Future)
+_Pending = Tuple[Union[str, int], int, str, str, Optional[Future]]
+
+
+def _course_id(course_id) -> int:
+    try:
+        return int(course_id)
+    except (TypeError, ValueError):
+        raise ValueError("课程 id 必须是整数") from None
+
+
+class AttendanceIngest:
+    """
+    高吞吐考勤写入（上课开始时的打卡洪峰）。
+    - record_batch：同步批量写入，一个事务 + executemany，返回逐条错误信息；
+    - submit / submit_many：写后队列，立即返回 Future；后台线程攒够 max_batch 条
+      或距本批第一条超过 flush_interval 秒就组提交一次，提交成功后 Future 才完成。
+      写入前已被取消的 Future 对应的打卡不写；单批出错只影响本批，后台线程继续工作。
+    学生可以用名字或 id（int）指定；已登录的学生打卡时传自己的 id，避免同名歧义。
+    学生名 → id、(学生, 课程) → 选课 id 缓存在内存里（只缓存查到的，新选课不受影响）；
+    本进程内写过选课表（SchoolDB.enroll_version 变化）后选课 id 缓存整体清空。
+    打卡时刻取提交时间，而不是落盘时间。
+    """
+    _STOP = object()
+
+    def __init__(self, db: SchoolDB, flush_interval: float = 0.05, max_batch: int = 2000,
+                 max_queue: int = 100000, cache_size: int = 200000):
+        self.db = db
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.cache_size = cache_size
+        self._students: Dict[str, int] = {}
+        self._enrolls: Dict[Tuple[int, int], int] = {}
+        self._enroll_version = db.enroll_version()
+        self._cache_lock = threading.Lock()
+        self._q: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+
+    # ---------- 同步批量 ----------
+    def record_batch(self, rows: Iterable[Tuple[Union[str, int], int, str]]) -> List[Optional[str]]:
+        """rows: (学生名或 id, 课程 id, 状态)；返回与 rows 对齐的错误信息，None 表示写入成功"""
+        now = datetime.now().isoformat(timespec='seconds')
+        pending, errors = [], []
+        for name, course_id, status in rows:
+            try:                            # 逐条校验，一条坏数据不影响整批
+                if status not in STATUSES:
+                    raise ValueError("状态只能是 normal/absent/late_or_early")
+                pending.append((name, _course_id(course_id), status, now, None))
+                errors.append(None)
+            except ValueError as e:
+                errors.append(str(e))
+        written = iter(self._write(pending))
+        return [e if e is not None else next(written) for e in errors]
+
+    # ---------- 写后队列 ----------
+    def submit(self, student: Union[str, int], course_id: int, status: str,
+               block: bool = True) -> Future:
+        """
+        排队一条打卡；状态或课程 id 非法立即抛 ValueError。
+        队列满时 block=True 阻塞等待（背压），block=False 立即抛 DBBusy（事件循环里用）。
+        """
+        if status not in STATUSES:
+            raise ValueError("状态只能是 normal/absent/late_or_early")
+        course_id = _course_id(course_id)
+        fut: Future = Future()
+        self._ensure_thread()
+        try:
+            self._q.put((student, course_id, status,
+                         datetime.now().isoformat(timespec='seconds'), fut), block=block)
+        except queue.Full:
+            raise DBBusy(f"考勤队列已满：{self._q.qsize()} 条待写入") from None
+        return fut
+
+    def submit_many(self, rows: Iterable[Tuple[Union[str, int], int, str]]) -> List[Future]:
+        return [self.submit(*row) for row in rows]
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待此前提交的打卡全部落盘"""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._q.put(done)
+        return done.wait(timeout)
+
+    def close(self) -> None:
+        """写完队列中剩余的打卡并停止后台线程"""
+        with self._start_lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._q.put(self._STOP)
+            thread.join()
+
+    def __enter__(self) -> "AttendanceIngest":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name="attendance-writer",
+                                                    daemon=True)
+                    self._thread.start()
+
+    def _loop(self) -> None:
+        q = self._q
+        while True:
+            item = q.get()
+            batch: List[_Pending] = []
+            markers: List[threading.Event] = []
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is self._STOP:
+                    stop = True
+                    break
+                if isinstance(item, threading.Event):
+                    markers.append(item)
+                    break                           # flush：不再等，马上写
+                if item[4].set_running_or_notify_cancel():   # 已取消的不写
+                    batch.append(item)
+                if len(batch) >= self.max_batch:
+                    break
+                remaining = deadline - time.monotonic()
+                try:
+                    item = q.get(timeout=remaining) if remaining > 0 else q.get_nowait()
+                except queue.Empty:
+                    break
+            try:
+                if batch:
+                    self._write_and_resolve(batch)
+            finally:
+                for done in markers:
+                    done.set()
+            if stop:
+                return
+
+    def _write_and_resolve(self, batch: List[_Pending]) -> None:
+        """写一批并完成对应的 Future；任何异常都只落到本批的 Future 上，不让后台线程退出"""
+        try:
+            results = self._write(batch)
+            for p, err in zip(batch, results):
+                if err is None:
+                    p[4].set_result(True)
+                else:
+                    p[4].set_exception(ValueError(err))
+        except Exception as e:
+            for p in batch:
+                if not p[4].done():
+                    p[4].set_exception(e)
+
+    # ---------- 落盘 ----------
+    def _write(self, batch: List[_Pending]) -> List[Optional[str]]:
+        """一个事务：补齐缓存缺失的 id，executemany 插入；返回逐条错误信息"""
+        if not batch:
+            return []
+        db = self.db
+        results: List[Optional[str]] = []
+        rows = []
+        with db as cur:
+            students, enrolls = self._resolve(cur, batch)
+            for student, course_id, status, ts, _ in batch:
+                sid = student if isinstance(student, int) else students.get(student)
+                if sid is None:
+                    results.append(f"学生 '{student}' 不存在")
+                    continue
+                eid = enrolls.get((sid, course_id))
+                if eid is None:
+                    results.append("学生未选此课程")
+                    continue
+                rows.append((eid, status, ts))
+                results.append(None)
+            cur.executemany(
+                f"INSERT INTO {db.ATTEND_TABLE} (enrollment_id, status, timestamp) VALUES (?,?,?)",
+                rows,
+            )
+        with self._cache_lock:
+            self.batches += 1
+            self.written += len(rows)
+            self.failed += len(batch) - len(rows)
+        return results
+
+    def _resolve(self, cur, batch: List[_Pending]
+                 ) -> Tuple[Dict[str, int], Dict[Tuple[int, int], int]]:
+        """返回本批用到的 {学生名: id} 与 {(学生 id, 课程 id): 选课 id}；缓存缺失的按 IN 批量查；
+        直接给出学生 id 的打卡跳过名字解析"""
+        db = self.db
+        chunk = db._IN_CHUNK
+        with self._cache_lock:
+            version = db.enroll_version()
+            if version != self._enroll_version:     # 选课变过，缓存的选课 id 可能已失效
+                self._enrolls.clear()
+                self._enroll_version = version
+            if len(self._students) + len(self._enrolls) > self.cache_size:
+                self._students.clear()
+                self._enrolls.clear()
+            sids = {name: self._students.get(name) for name in {p[0] for p in batch if isinstance(p[0], str)}}
+        names = [name for name, sid in sids.items() if sid is None]
+        found: Dict[str, int] = {}
+        for k in range(0, len(names), chunk):
+            part = names[k:k + chunk]
+            cur.execute(f"SELECT name, MIN(id) FROM {db.STUDENT_TABLE} "
+                        f"WHERE name IN ({','.join('?' * len(part))}) GROUP BY name", part)
+            found.update(cur.fetchall())
+        sids = {name: sid for name, sid in sids.items() if sid is not None}
+        sids.update(found)
+
+        pairs = {(p[0] if isinstance(p[0], int) else sids[p[0]], p[1]) for p in batch
+                 if isinstance(p[0], int) or p[0] in sids}
+        with self._cache_lock:
+            self._students.update(found)
+            eids = {pair: self._enrolls[pair] for pair in pairs if pair in self._enrolls}
+        by_course: Dict[int, List[int]] = {}
+        for sid, cid in pairs - eids.keys():
+            by_course.setdefault(cid, []).append(sid)
+        fetched: Dict[Tuple[int, int], int] = {}
+        for cid, ids in by_course.items():
+            for k in range(0, len(ids), chunk):
+                part = ids[k:k + chunk]
+                cur.execute(f"SELECT student_id, MIN(id) FROM {db.ENROLL_TABLE} "
+                            f"WHERE course_id = ? AND student_id IN ({','.join('?' * len(part))}) "
+                            f"GROUP BY student_id", [cid] + part)
+                fetched.update(((sid, cid), eid) for sid, eid in cur.fetchall())
+        eids.update(fetched)
+        with self._cache_lock:
+            self._enrolls.update(fetched)
+        return sids, eids
@@ -0,0 +1,168 @@
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from src.db import SchoolDB, hash_password
+from src.parser import Runtime
+
+
+def _role(role: str) -> str:
+    # 与 SchoolDB 一致：除 student 外都按 teacher 处理
+    return "student" if role == "student" else "teacher"
+
+
+class LoginService:
+    """
+    登录服务层：按名字（走 name 索引）取口令哈希，hmac.compare_digest 常量时间比较。
+    校验通过的 (身份, 名字) → (id, 口令哈希) 缓存 ttl 秒（LRU，线程安全），
+    重复登录只需本地算一次 SHA-256 比较，不再查 SQLite；失败的尝试不缓存。
+    改口令、删用户后调用 invalidate，TTL 兜底其他进程直接改库的情况。
+    用法：
+        auth = LoginService(SchoolDB("school.db", pool_size=8))
+        uid = auth.cached("student", name, pwd)            # 只查缓存，可在事件循环里调用
+        if uid is None:
+            uid = await adb.run(auth.authenticate, "student", name, pwd)
+    """
+    def __init__(self, db: SchoolDB, ttl: float = 60.0, maxsize: int = 10000):
+        self.db = db
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._map: "OrderedDict[Tuple[str, str], Tuple[int, str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._gen = 0                      # invalidate 时 +1，丢弃查库期间的旧结果
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._map)
+
+    def _lookup(self, role: str, name: str, h: str) -> Optional[int]:
+        """缓存命中、未过期且口令哈希一致时返回 id"""
+        key = (_role(role), name)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._map.get(key)
+            if entry is not None and entry[2] <= now:
+                del self._map[key]
+                entry = None
+            if entry is None or not hmac.compare_digest(entry[1], h):
+                return None
+            self._map.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def cached(self, role: str, name: str, pwd: str) -> Optional[int]:
+        """只查缓存：命中且口令一致返回 id，否则 None（需要再走 authenticate）"""
+        return self._lookup(role, name, hash_password(pwd))
+
+    def authenticate(self, role: str, name: str, pwd: str) -> Optional[int]:
+        """校验口令，通过返回用户 id（同名取 id 最小的匹配者），否则 None"""
+        h = hash_password(pwd)
+        uid = self._lookup(role, name, h)
+        if uid is not None:
+            return uid
+        with self._lock:
+            self.misses += 1
+            token = self._gen
+        for uid, stored in self.db.credentials(role, name):
+            if hmac.compare_digest(stored, h):
+                self._put(role, name, uid, stored, token)
+                return uid
+        return None
+
+    def _put(self, role: str, name: str, uid: int, h: str, token: int) -> None:
+        with self._lock:
+            if token != self._gen:
+                return
+            key = (_role(role), name)
+            self._map[key] = (uid, h, time.monotonic() + self.ttl)
+            self._map.move_to_end(key)
+            while len(self._map) > self.maxsize:
+                self._map.popitem(last=False)
+
+    def invalidate(self, role: Optional[str] = None, name: Optional[str] = None) -> None:
+        """失效某个用户（不给 role 时两种身份都失效）；不给 name 时清空全部"""
+        with self._lock:
+            self._gen += 1
+            if name is None:
+                self._map.clear()
+                return
+            for r in (_role(role),) if role else ("student", "teacher"):
+                self._map.pop((r, name), None)
+
+
+class SessionTokens:
+    """
+    登录后签发的会话令牌："<随机 id>.<HMAC-SHA256 签名>"。
+    内存中保存 令牌 id → (Runtime(user_id, is_student), 签名, 过期时刻)，有界 LRU，
+    空闲超过 ttl 秒失效（每次使用顺延）。签名只在签发时计算一次，resolve 查字典后
+    常量时间比对签名，伪造或篡改的令牌一律拒绝；已认证的调用 O(1) 取得身份，不查 SchoolDB。
+    secret 缺省每个进程随机生成，重启后旧令牌全部失效。
+    """
+    def __init__(self, db: SchoolDB, secret: Optional[bytes] = None, ttl: float = 1800.0,
+                 max_sessions: int = 100000):
+        self.db = db
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._secret = secret or secrets.token_bytes(32)
+        self._map: "OrderedDict[str, Tuple[Runtime, str, float]]" = OrderedDict()   # id → (身份, 签名, 过期时刻)
+        self._lock = threading.Lock()
+        self.issued = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._map)
+
+    def _sign(self, sid: str) -> str:
+        return hmac.digest(self._secret, sid.encode(), "sha256").hex()
+
+    def issue(self, user_id: int, is_student: bool) -> str:
+        """为已通过校验的用户签发令牌"""
+        sid = secrets.token_urlsafe(18)
+        sig = self._sign(sid)
+        rt = Runtime(user_id, is_student, self.db)
+        with self._lock:
+            self._map[sid] = (rt, sig, time.monotonic() + self.ttl)
+            self.issued += 1
+            while len(self._map) > self.max_sessions:
+                self._map.popitem(last=False)
+                self.evicted += 1
+        return f"{sid}.{sig}"
+
+    def resolve(self, token: Optional[str]) -> Optional[Runtime]:
+        """令牌 → Runtime；不存在、签名不符或已过期返回 None"""
+        sid, _, sig = (token or "").partition(".")
+        if not sig.isascii():           # 签名是十六进制；compare_digest 遇到非 ASCII 的 str 会抛 TypeError
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._map.get(sid)
+            if entry is None or not hmac.compare_digest(sig, entry[1]):
+                return None
+            if entry[2] <= now:
+                del self._map[sid]
+                self.evicted += 1
+                return None
+            self._map[sid] = (entry[0], entry[1], now + self.ttl)
+            self._map.move_to_end(sid)
+            return entry[0]
+
+    @staticmethod
+    def key(token: Optional[str]) -> str:
+        """令牌的 id 部分：服务端按它绑定聊天会话等状态（resolve 通过之后再用）"""
+        return (token or "").partition(".")[0]
+
+    def revoke(self, token: Optional[str]) -> None:
+        with self._lock:
+            self._map.pop(self.key(token), None)
+
+    def revoke_user(self, user_id: int, is_student: bool) -> int:
+        """注销某用户的全部令牌（改口令、删号时用），返回注销个数"""
+        with self._lock:
+            sids = [sid for sid, (rt, _, _) in self._map.items()
+                    if rt.user_id == user_id and rt.is_student == is_student]
+            for sid in sids:
+                del self._map[sid]
+        return len(sids)
@@ -0,0 +1,167 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+import json
+import os
+import time
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from src.channels import BufferOutput, QueueInput
+from src.compiler import Program, ProgramCache, default_cache, execute
+from src.db import SchoolDB, read_rows
+from src.parser import VarStore, MiniInterp
+
+
+class BatchJob:
+    """一个批处理任务：以 (user_id, is_student) 身份执行 script；input 依次喂给脚本里的 INPUT"""
+    __slots__ = ('script', 'user_id', 'is_student', 'input')
+    def __init__(self, script: Union[str, Path], user_id: int, is_student: bool = True,
+                 input: Tuple[str, ...] = ()):
+        self.script = str(script)
+        self.user_id = user_id
+        self.is_student = is_student
+        self.input = tuple(input)
+
+
+class JobResult:
+    __slots__ = ('script', 'user_id', 'output', 'error', 'seconds')
+    def __init__(self, script: str, user_id: int, output: str, error: Optional[str], seconds: float):
+        self.script = script
+        self.user_id = user_id
+        self.output = output
+        self.error = error
+        self.seconds = seconds
+
+    def to_dict(self) -> dict:
+        return {"script": self.script, "user_id": self.user_id, "output": self.output,
+                "error": self.error, "seconds": round(self.seconds, 6)}
+
+
+class BatchReport:
+    """一次批处理的汇总：任务数、失败数、进程数、耗时"""
+    __slots__ = ('jobs', 'failed', 'workers', 'seconds')
+    def __init__(self, workers: int):
+        self.jobs = 0
+        self.failed = 0
+        self.workers = workers
+        self.seconds = 0.0
+
+    @property
+    def jobs_per_sec(self) -> float:
+        return self.jobs / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (f"[{self.workers} 进程] {self.jobs} 个任务，失败 {self.failed} 个，"
+                f"用时 {self.seconds:.2f} s（{self.jobs_per_sec:.0f} 任务/s）")
+
+
+# ---------- 子进程 ----------
+# 每个工作进程一份：自己的 SchoolDB 连接 + 启动时收到的全部已编译程序
+_worker_db: Optional[SchoolDB] = None
+_worker_programs: Dict[str, Program] = {}
+
+
+def _init_worker(db_path: str, programs: Dict[str, Program]) -> None:
+    global _worker_db, _worker_programs
+    _worker_db = SchoolDB(db_path, pool_size=1)
+    _worker_programs = programs
+
+
+def _run_job(job: BatchJob) -> JobResult:
+    return _execute_job(job, _worker_db, _worker_programs)
+
+
+def _execute_job(job: BatchJob, db: SchoolDB, programs: Dict[str, Program]) -> JobResult:
+    out = BufferOutput()
+    inp = QueueInput(timeout=0)           # 输入不够时 INPUT 立即报超时，不会卡住进程
+    for line in job.input:
+        inp.feed(line)
+    t0 = time.perf_counter()
+    error = None
+    try:
+        interp = MiniInterp(VarStore(), is_student=job.is_student, user_id=job.user_id,
+                            db=db, out=out, inp=inp)
+        execute(programs[job.script], interp)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return JobResult(job.script, job.user_id, out.getvalue(), error, time.perf_counter() - t0)
+
+
+# ---------- 入口 ----------
+def compile_jobs(jobs: Iterable[BatchJob], cache: ProgramCache = default_cache
+                 ) -> Tuple[List[BatchJob], Dict[str, Program]]:
+    """在父进程里把涉及的脚本各编译一次；任务里的路径统一成绝对路径作键"""
+    jobs = list(jobs)
+    programs: Dict[str, Program] = {}
+    for job in jobs:
+        job.script = os.path.realpath(job.script)
+        if job.script not in programs:
+            programs[job.script] = cache.load(job.script)
+    return jobs, programs
+
+
+def run_batch(jobs: Iterable[BatchJob], db_path: Union[str, Path], workers: Optional[int] = None,
+              chunksize: int = 16, cache: ProgramCache = default_cache
+              ) -> Tuple[List[JobResult], BatchReport]:
+    """
+    把任务分发到进程池执行，结果按任务顺序返回。
+    workers=1 时在当前进程串行执行（基准 / 调试用）。
+    各进程的 GPA 缓存互不相通，跨进程写入后的读取最多滞后 GPACache.ttl。
+    """
+    jobs, programs = compile_jobs(jobs, cache)
+    workers = workers or os.cpu_count() or 1
+    report = BatchReport(workers)
+    t0 = time.perf_counter()
+    if workers == 1:
+        db = SchoolDB(db_path, pool_size=1)      # 不动模块级的工作进程状态，用完即关
+        try:
+            results = [_execute_job(job, db, programs) for job in jobs]
+        finally:
+            db.close_pool()
+    else:
+        with Pool(workers, initializer=_init_worker, initargs=(str(db_path), programs)) as pool:
+            results = list(pool.imap(_run_job, jobs, chunksize))
+    report.seconds = time.perf_counter() - t0
+    report.jobs = len(results)
+    report.failed = sum(1 for r in results if r.error is not None)
+    return results, report
+
+
+def read_jobs(path: Union[str, Path]) -> Iterable[BatchJob]:
+    """任务文件：CSV（表头 script,user_id,role[,input]）或 JSONL；input 多行用换行分隔"""
+    base = Path(path).resolve().parent
+    for rec in read_rows(path):
+        script = Path(rec["script"])
+        text = rec.get("input") or ""
+        yield BatchJob(script if script.is_absolute() else base / script,
+                       int(rec["user_id"]),
+                       str(rec.get("role", "student")).lower() != "teacher",
+                       tuple(text.split("\n")) if text else ())
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import argparse
+    ap = argparse.ArgumentParser(description="多进程批量执行 DSL 脚本")
+    ap.add_argument("jobs", help="任务文件（.csv 带表头 / .jsonl）")
+    ap.add_argument("--db", default="school.db")
+    ap.add_argument("--workers", type=int, default=0, help="进程数，缺省为 CPU 核数")
+    ap.add_argument("--chunksize", type=int, default=16)
+    ap.add_argument("--out", help="结果写入 JSONL 文件")
+    ap.add_argument("--scale", action="store_true", help="依次用 1、2、4…N 个进程各跑一遍，报告扩展性")
+    args = ap.parse_args(argv)
+
+    SchoolDB(args.db).ensure_tables()
+    jobs = list(read_jobs(args.jobs))
+    n = args.workers or os.cpu_count() or 1
+    levels = [1 << k for k in range(n.bit_length()) if 1 << k < n] + [n] if args.scale else [n]
+    for workers in levels:
+        results, report = run_batch(jobs, args.db, workers, args.chunksize)
+        print(report)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            for r in results:
+                f.write(json.dumps(r.to_dict(), ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import queue
+import sys
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Callable, Deque, List, Optional
+
+
+# ---------- 输出通道 ----------
+class OutputSink(ABC):
+    """解释器的输出通道；say 等价于 print，write 不追加换行"""
+    @abstractmethod
+    def write(self, text: str) -> None: ...
+
+    def say(self, line: str) -> None:
+        self.write(line + "\n")
+
+
+class ConsoleOutput(OutputSink):
+    """直接写 stdout（REPL / 测试脚本的默认行为）"""
+    def write(self, text: str) -> None:
+        sys.stdout.write(text)
+
+
+class BufferOutput(OutputSink):
+    """缓存在内存里，由调用方一次性取走；多线程写入安全"""
+    def __init__(self) -> None:
+        self._parts: List[str] = []
+        self._lock = threading.Lock()
+
+    def write(self, text: str) -> None:
+        with self._lock:
+            self._parts.append(text)
+
+    def getvalue(self) -> str:
+        with self._lock:
+            return "".join(self._parts)
+
+    def drain(self) -> str:
+        """取走并清空已缓存的输出"""
+        with self._lock:
+            text = "".join(self._parts)
+            self._parts.clear()
+            return text
+
+
+# ---------- 输入通道 ----------
+class InputSource(ABC):
+    """INPUT 的数据来源；read_line 阻塞直到拿到一行"""
+    @abstractmethod
+    def read_line(self, name: str) -> str: ...
+
+
+class InputPending(Exception):
+    """
+    非阻塞输入源暂时没有数据：执行停在 INPUT 上，线程直接返回。
+    compiler.execute 抛出时 pc 为恢复执行的位置，之后 execute(..., start=pc) 接着跑。
+    """
+    def __init__(self, name: str, pc: int = -1):
+        super().__init__(f"变量 '{name}' 等待输入")
+        self.name = name
+        self.pc = pc
+
+
+class ConsoleInput(InputSource):
+    def read_line(self, name: str) -> str:
+        return input().rstrip('\n')
+
+
+class QueueInput(InputSource):
+    """
+    由其他线程 / 协程 feed 的输入队列（例如 Web 客户端的下一条消息）。
+    read_line 开始等待前调用 on_wait，通知外部“解释器在等输入”；超时抛 TimeoutError。
+    队列在第一次用到时才创建，大量从不 INPUT 的会话不必为它付内存。
+    """
+    _init_lock = threading.Lock()
+
+    def __init__(self, timeout: Optional[float] = 300.0) -> None:
+        self.timeout = timeout
+        self.on_wait: Optional[Callable[[], None]] = None
+        self._q: "Optional[queue.Queue[str]]" = None
+
+    def _queue(self) -> "queue.Queue[str]":
+        if self._q is None:
+            with self._init_lock:
+                if self._q is None:
+                    self._q = queue.Queue()
+        return self._q
+
+    def feed(self, value: str) -> None:
+        self._queue().put(value)
+
+    def read_line(self, name: str) -> str:
+        q = self._queue()
+        if q.empty() and self.on_wait is not None:
+            self.on_wait()
+        try:
+            return q.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"等待变量 '{name}' 的输入超时") from None
+
+
+class PendingInput(InputSource):
+    """
+    不阻塞的输入：有值就取，没有就抛 InputPending，让脚本在 INPUT 处挂起（聊天会话用）。
+    挂起期间不占线程、不占数据库连接；下一条消息 feed 进来后从挂起处恢复执行。
+    """
+    def __init__(self) -> None:
+        self._q: Deque[str] = deque()
+
+    def feed(self, value: str) -> None:
+        self._q.append(value)
+
+    def read_line(self, name: str) -> str:
+        try:
+            return self._q.popleft()
+        except IndexError:
+            raise InputPending(name) from None
@@ -0,0 +1,392 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple, Union
+from src.AST import Tree
+from src.channels import OutputSink, BufferOutput, InputPending
+from src.parser import (
+    MiniInterp, VarStore, Builtin, Call, Cmp, Const, Var, Slot, parse_expr, tokenize, _REG_RE,
+)
+
+# ---------- 操作码 ----------
+OP_REG   = 0     # a=类型 b=变量名 c=表达式节点
+OP_SPEAK = 1     # a=预切分的 token 列表
+OP_INPUT = 2     # a=变量名
+OP_CALL  = 3     # a=函数调用节点，结果写入 $result
+OP_ERROR = 4     # a=编译期即可确定的报错信息
+OP_LINE  = 5     # a=原始行，交回 exec_line（自定义关键字等）
+OP_BRANCH = 6    # a=条件节点 b=成立跳转 pc c=不成立跳转 pc
+OP_JUMP  = 7     # a=目标 pc
+
+OP_NAMES = ("REG", "SPEAK", "INPUT", "CALL", "ERROR", "LINE", "BRANCH", "JUMP")
+
+_BLOCK_KW = ("ELSE", "ENDIF")    # 只起连接作用的节点，编译时穿透
+
+
+class Instr:
+    __slots__ = ('op', 'a', 'b', 'c', 'line', 'slot')
+    def __init__(self, op: int, a=None, b=None, c=None, line: int = 0, slot: int = -1):
+        self.op = op
+        self.a = a
+        self.b = b
+        self.c = c
+        self.line = line
+        self.slot = slot        # REG / CALL 的目标变量在程序内的槽位，-1 表示按名字处理
+
+    def __repr__(self) -> str:
+        operands = " ".join(repr(x) for x in (self.a, self.b, self.c) if x is not None)
+        return f"{self.line:04d} {OP_NAMES[self.op]:<6} {operands}"
+
+
+def _calls(node) -> Iterable[Call]:
+    """表达式节点里的全部函数调用（含嵌套参数）"""
+    if isinstance(node, Call):
+        yield node
+        for arg in node.args:
+            yield from _calls(arg)
+    elif isinstance(node, Cmp):
+        yield from _calls(node.left)
+        yield from _calls(node.right)
+
+
+class _Linker:
+    """把合法变量名解析成程序内槽位：表达式里的 Var → Slot，REG / CALL 记下目标槽位"""
+    def __init__(self):
+        self.names: List[str] = []
+        self._index = {}
+
+    def slot(self, name: str) -> int:
+        if not VarStore.is_valid_name(name):
+            return -1
+        k = self._index.get(name)
+        if k is None:
+            k = self._index[name] = len(self.names)
+            self.names.append(name)
+        return k
+
+    def expr(self, node):
+        if isinstance(node, Var):
+            k = self.slot(node.name)
+            return Slot(node.name, k) if k >= 0 else node
+        if isinstance(node, Call):
+            return Call(node.fname, node.handler, [self.expr(a) for a in node.args])
+        if isinstance(node, Cmp):
+            return Cmp(node.op, self.expr(node.left), self.expr(node.right))
+        return node
+
+    def link(self, code: List[Instr]) -> List[str]:
+        for ins in code:
+            if ins.op == OP_REG:
+                ins.c = self.expr(ins.c)
+                ins.slot = self.slot(ins.b)
+            elif ins.op == OP_CALL:
+                ins.a = self.expr(ins.a)
+                ins.slot = self.slot("result")
+            elif ins.op == OP_BRANCH:
+                ins.a = self.expr(ins.a)
+        return self.names
+
+
+class Program:
+    """
+    编译后的 DSL 程序：指令列表，与具体解释器实例无关，可跨用户共享。
+    names[k] 为程序内槽位 k 对应的变量名，执行时一次性绑定到变量表槽位。
+    """
+    __slots__ = ('code', 'source', 'names', 'uses_db', 'gpa_ids')
+    def __init__(self, code: List[Instr], source: str = "<string>",
+                 names: Optional[List[str]] = None):
+        self.code = code
+        self.source = source
+        self.names = names if names is not None else []
+        # 编译期扫描：是否访问数据库、哪些 GPA 参数是常量（执行前一次批量取回）
+        self.uses_db = False
+        gpa_ids = {}
+        for ins in code:
+            node = ins.c if ins.op == OP_REG else ins.a if ins.op in (OP_CALL, OP_BRANCH) else None
+            for call in _calls(node):
+                if call.fname in Builtin.DB_FUNCS:
+                    self.uses_db = True
+                if call.fname == "GPA" and len(call.args) == 1 and isinstance(call.args[0], Const):
+                    try:
+                        gpa_ids[Builtin.student_id("GPA", call.args[0].value)] = None
+                    except ValueError:                  # 非 NUM 留到执行期报错
+                        pass
+        self.gpa_ids = list(gpa_ids)
+
+    def __len__(self) -> int:
+        return len(self.code)
+
+    def dump(self) -> None:
+        print(f"; {self.source}  ({len(self.code)} 条指令)")
+        for pc, ins in enumerate(self.code):
+            print(f"  {pc:4d}: {ins!r}")
+
+
+# ---------- 编译 ----------
+def compile_line(line: str, no: int = 0) -> Optional[Instr]:
+    """单行 → 指令；空行与注释返回 None。解析规则与 MiniInterp.exec_line 一致"""
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    parts = line.split(maxsplit=1)
+    first, tail = (parts[0], parts[1]) if len(parts) == 2 else (parts[0], "")
+    kw = first.upper()
+
+    if kw == "REG":
+        m = _REG_RE.fullmatch(tail)
+        if not m:
+            return Instr(OP_ERROR, f"[ERROR] REG 语法错误: {tail}", line=no)
+        typ, name, rhs = m.groups()
+        if not rhs:
+            return Instr(OP_ERROR, f"[ERROR] REG {typ} 缺少表达式", line=no)
+        return Instr(OP_REG, typ, name, parse_expr(rhs), line=no)
+
+    if kw == "SPEAK":
+        try:
+            tokens = tokenize(tail)
+        except ValueError as e:
+            return Instr(OP_ERROR, f"[SPEAK] {e}", line=no)
+        return Instr(OP_SPEAK, tokens, line=no)
+
+    if kw == "INPUT":
+        name = tail.strip()
+        if not name:
+            return Instr(OP_ERROR, "[ERROR] INPUT 缺少变量名", line=no)
+        return Instr(OP_INPUT, name, line=no)
+
+    if kw in Builtin.HANDLERS:
+        return Instr(OP_CALL, parse_expr(line), line=no)
+
+    return Instr(OP_LINE, line, line=no)
+
+
+def _node_kw(text: str) -> str:
+    return text.split(maxsplit=1)[0]
+
+
+def compile_tree(tree: Tree, source: Optional[str] = None) -> Program:
+    """
+    把 Tree 的控制流图编译成跳转表：
+      IF/ELIF → BRANCH(条件, 真 pc, 假 pc)；ELSE/ENDIF/注释不生成指令，跳转直接穿透；
+      普通语句之后若真后继不是下一条指令，补一条 JUMP。
+    """
+    size = tree.size
+    # 1. 哪些节点生成指令
+    emit = [False] * size
+    for i in range(size):
+        text = tree.text(i)
+        emit[i] = not text.startswith("#") and _node_kw(text) not in _BLOCK_KW
+
+    # 2. 穿透不生成指令的节点，找到真正的落点（-1 表示结束）
+    def land(i: int) -> int:
+        while i != -1 and not emit[i]:
+            i = tree.t_nxt[i]
+        return i
+
+    # 3. 生成指令，跳转目标先记节点下标
+    code: List[Instr] = []
+    node_pc = [-1] * size
+    fixups = []                     # (指令, 字段, 目标节点)
+    emitted = [i for i in range(size) if emit[i]]
+    for k, i in enumerate(emitted):
+        text, no = tree.text(i), tree.line_no[i]
+        node_pc[i] = len(code)
+        kw = _node_kw(text)
+        if kw == "IF" or kw == "ELIF":
+            cond = text.split(maxsplit=1)
+            ins = Instr(OP_BRANCH, parse_expr(cond[1] if len(cond) == 2 else ""), line=no)
+            fixups.append((ins, 'b', land(tree.t_nxt[i])))
+            fixups.append((ins, 'c', land(tree.f_nxt[i])))
+            code.append(ins)
+            continue
+        code.append(compile_line(text, no))
+        target = land(tree.t_nxt[i])
+        following = emitted[k + 1] if k + 1 < len(emitted) else -1
+        if target != following:
+            ins = Instr(OP_JUMP, line=no)
+            fixups.append((ins, 'a', target))
+            code.append(ins)
+
+    # 4. 回填跳转 pc；-1 → 程序末尾
+    end = len(code)
+    for ins, field, node in fixups:
+        setattr(ins, field, node_pc[node] if node != -1 else end)
+
+    # 5. 变量名 → 槽位
+    names = _Linker().link(code)
+    return Program(code, source or tree.file_name, names)
+
+
+def compile_lines(lines: Iterable[str], source: str = "<string>") -> Program:
+    tree = Tree(source)
+    tree.load_from_lines(lines)
+    return compile_tree(tree)
+
+
+def compile_file(path: Union[str, Path]) -> Program:
+    tree = Tree(str(path))
+    tree.load_from_file()
+    return compile_tree(tree)
+
+
+# ---------- 执行 ----------
+def execute(program: Program, interp: MiniInterp, unit_of_work: bool = True, start: int = 0) -> int:
+    """
+    在给定解释器上执行已编译程序，返回执行的指令数。
+    运行期间输出先攒在缓冲里，结束时一次写入 interp.out；遇到 INPUT 先把已有输出送出去。
+    unit_of_work=True 且程序访问数据库时，整次运行共用一条连接 / 一个事务，
+    读类内置函数在本次运行内记忆，常量参数的 GPA 预先批量查询。
+    输入源是 PendingInput 且暂无输入时抛 InputPending（已提交此前的修改），
+    其 pc 交回 start 即可从该 INPUT 处恢复。
+    """
+    sink = interp.out
+    buf = BufferOutput()
+    interp.out = buf
+    interp.expr.frame = interp.vars.bind(program.names)
+    try:
+        if not (unit_of_work and program.uses_db):
+            return _run(program, interp, buf, sink, start)
+        with interp.rt.db, interp.expr.builtin.run_scope(program.gpa_ids):
+            return _run(program, interp, buf, sink, start)
+    finally:
+        interp.out = sink
+        text = buf.drain()
+        if text:
+            sink.write(text)
+
+
+def _run(program: Program, interp: MiniInterp, buf: BufferOutput, sink: OutputSink,
+         start: int = 0) -> int:
+    env = interp.expr
+    vals, frame = interp.vars._vals, env.frame     # 槽位直读直写，跳过名字查找与校验
+    code = program.code
+    n = len(code)
+    pc, steps = start, 0
+    while pc < n:
+        ins = code[pc]
+        pc += 1
+        steps += 1
+        op = ins.op
+        if op == OP_CALL:
+            try:
+                vals[frame[ins.slot]] = ins.a.ev(env)
+            except Exception as e:
+                buf.say(f"[ERROR] 函数执行失败: {e}")
+        elif op == OP_BRANCH:
+            try:
+                cond = ins.a.ev(env)
+                if not isinstance(cond, bool):
+                    raise ValueError(f"条件必须是 BOOL，得到 {type(cond).__name__}")
+            except Exception as e:
+                buf.say(f"[ERROR] 条件求值失败: {e}")
+                cond = False
+            pc = ins.b if cond else ins.c
+        elif op == OP_JUMP:
+            pc = ins.a
+        elif op == OP_REG:
+            try:
+                val = ins.c.ev(env)
+            except Exception as e:
+                buf.say(f"[ERROR] 表达式求值失败: {e}")
+                continue
+            interp._store_reg(ins.a, ins.b, val, frame[ins.slot] if ins.slot >= 0 else -1)
+        elif op == OP_SPEAK:
+            interp._speak_tokens(ins.a)
+        elif op == OP_INPUT:
+            text = buf.drain()          # 提示语要在等待输入之前送达
+            if text:
+                sink.write(text)
+            try:
+                with interp.rt.db.suspended():     # 等输入可能很久：先提交并交还连接
+                    interp._read_input(ins.a)
+            except InputPending as e:
+                e.pc = pc - 1           # 恢复时重新执行这条 INPUT
+                raise
+        elif op == OP_ERROR:
+            buf.say(ins.a)
+        else:
+            interp.exec_line(ins.a)
+    return steps
+
+
+# ---------- 缓存 ----------
+class ProgramCache:
+    """
+    已编译程序的 LRU 缓存。
+    文件按 (路径, mtime_ns, size) 判新旧；源码字符串按内容 sha1 作键。
+    optimize=True 时缓存的是 optimizer.optimize 之后的程序（只适合每次都用全新 VarStore 执行）。
+    """
+    def __init__(self, maxsize: int = 256, optimize: bool = False):
+        self.maxsize = maxsize
+        self.optimize = optimize
+        self._map: "OrderedDict[str, Tuple[object, Program]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key: str, stamp: object) -> Optional[Program]:
+        with self._lock:
+            entry = self._map.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._map.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def _store(self, key: str, stamp: object, program: Program) -> Program:
+        if self.optimize:
+            from src.optimizer import optimize      # optimizer 依赖本模块，延迟导入
+            program = optimize(program)
+        with self._lock:
+            self._map[key] = (stamp, program)
+            self._map.move_to_end(key)
+            while len(self._map) > self.maxsize:
+                self._map.popitem(last=False)
+        return program
+
+    def load(self, path: Union[str, Path]) -> Program:
+        key = os.path.realpath(path)
+        st = os.stat(key)
+        stamp = (st.st_mtime_ns, st.st_size)
+        program = self._lookup(key, stamp)
+        if program is None:
+            program = self._store(key, stamp, compile_file(key))
+        return program
+
+    def load_source(self, text: str, source: str = "<string>") -> Program:
+        key = "sha1:" + hashlib.sha1(text.encode("utf-8")).hexdigest()
+        program = self._lookup(key, None)
+        if program is None:
+            program = self._store(key, None, compile_lines(text.splitlines(), source))
+        return program
+
+    def clear(self) -> None:
+        with self._lock:
+            self._map.clear()
+
+
+default_cache = ProgramCache()
+
+
+def run_file(path: Union[str, Path], interp: MiniInterp) -> None:
+    """编译（命中缓存则跳过）并执行 DSL 文件"""
+    execute(default_cache.load(path), interp)
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="编译 DSL 文件并打印指令")
+    ap.add_argument("files", nargs="+")
+    ap.add_argument("-O", dest="optimize", action="store_true", help="打印常量折叠 / 死分支消除后的指令")
+    args = ap.parse_args()
+    for arg in args.files:
+        program = compile_file(arg)
+        if args.optimize:
+            from src.optimizer import optimize
+            program = optimize(program)
+        program.dump()
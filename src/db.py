@@ -1,10 +1,231 @@
 # school_db.py
 import sqlite3
 import hashlib
+import heapq
+import hmac
+import csv
+import json
+import os
+import queue
+import threading
+import time
 
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
-from typing import Optional, Union, List, Tuple
+from typing import Optional, Union, List, Tuple, Dict, Iterable, Iterator, Any
+
+
+def course_gpa(score: float) -> float:
+    """单门 GPA：4 - 3*(100-x)^2 / 1600"""
+    return 4.0 - 3.0 * (100.0 - score) ** 2 / 1600.0
+
+
+def hash_password(pwd: str) -> str:
+    """库里存的口令形式：SHA-256 十六进制"""
+    return hashlib.sha256(pwd.encode()).hexdigest()
+
+
+def _counts(score: Optional[float]) -> bool:
+    """成绩是否计入 GPA（NULL 与 0 分表示未结课）"""
+    return score is not None and score != 0
+
+
+class ImportReport:
+    """批量导入结果：写入行数、跳过行数（名字解析失败/重复）、耗时"""
+    __slots__ = ('kind', 'rows', 'skipped', 'seconds')
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.rows = 0
+        self.skipped = 0
+        self.seconds = 0.0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (f"[{self.kind}] 写入 {self.rows} 行，跳过 {self.skipped} 行，"
+                f"用时 {self.seconds:.2f} s（{self.rows_per_sec:.0f} 行/s）")
+
+
+def read_rows(path: Union[str, Path]) -> Iterator[Dict[str, Any]]:
+    """流式读取 CSV（首行为表头）或 JSONL 文件，逐行产出 dict"""
+    path = Path(path)
+    with path.open("r", encoding="utf-8", newline="") as f:
+        if path.suffix.lower() in (".jsonl", ".ndjson"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+_json_encode = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def ndjson_page(fields: Tuple[str, ...], rows: Iterable[Tuple]) -> str:
+    """把一页查询结果编码成 NDJSON（每行一个 {字段: 值}），供分页接口流式输出"""
+    return "".join([_json_encode(dict(zip(fields, row))) + "\n" for row in rows])
+
+
+def _chunks(rows: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    it = iter(rows)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class ConnectionPool:
+    """
+    有界 sqlite 连接池：连接在创建时一次性设置 PRAGMA，归还后复用。
+    池满且全部借出时 acquire 会阻塞等待，超时抛 TimeoutError。
+    """
+
+    PRAGMAS = (
+        "PRAGMA journal_mode = WAL;",
+        "PRAGMA synchronous = NORMAL;",
+        "PRAGMA foreign_keys = ON;",
+        "PRAGMA temp_store = MEMORY;",
+        "PRAGMA cache_size = -8000;",     # 约 8MB 页缓存
+    )
+
+    def __init__(self, db_path: Union[str, Path], size: int = 4, timeout: float = 30.0):
+        if size < 1:
+            raise ValueError("连接池大小至少为 1")
+        self.db_path = Path(db_path)
+        self.size = size
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=size)
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """借出一个连接：优先复用空闲连接，不足 size 时新建，否则等待归还"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._created -= 1
+                    raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError("等待数据库连接超时") from None
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """归还连接；残留的未结束事务一律回滚"""
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put_nowait(conn)
+
+    def close_all(self) -> None:
+        """关闭全部空闲连接（借出中的连接归还后仍可用）"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
+class GPACache:
+    """
+    进程级学生 GPA 缓存：(数据库路径, 学生 id) → GPA，LRU + TTL，线程安全。
+    写 GPA 的一方调用 invalidate；读的一方查库前先取 token()，写回时若期间发生过失效就丢弃，
+    避免把并发写入之前读到的旧值放回缓存。TTL 兜底其他进程直接改库的情况。
+    """
+    def __init__(self, maxsize: int = 65536, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._map: "OrderedDict[tuple, Tuple[float, float]]" = OrderedDict()   # 键 → (GPA, 过期时刻)
+        self._lock = threading.Lock()
+        self._gen = 0                          # 每次失效 +1
+        self._ns_gen: Dict[str, int] = {}      # 整库失效时 +1，旧键自然淘汰
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._map)
+
+    def token(self) -> int:
+        return self._gen
+
+    def get_many(self, ns: str, ids: Iterable[int]) -> Tuple[Dict[int, float], List[int]]:
+        """返回 (命中的 {id: GPA}, 未命中的 id 列表)"""
+        found, missing = {}, []
+        now = time.monotonic()
+        with self._lock:
+            g = self._ns_gen.get(ns, 0)
+            for sid in ids:
+                key = (ns, g, sid)
+                entry = self._map.get(key)
+                if entry is not None and entry[1] > now:
+                    self._map.move_to_end(key)
+                    found[sid] = entry[0]
+                else:
+                    if entry is not None:
+                        del self._map[key]
+                    missing.append(sid)
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    def put_many(self, ns: str, values: Dict[int, float], token: int) -> None:
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            if token != self._gen:          # 读库期间有写入，结果可能已过时
+                return
+            g = self._ns_gen.get(ns, 0)
+            for sid, gpa in values.items():
+                key = (ns, g, sid)
+                self._map[key] = (gpa, expires)
+                self._map.move_to_end(key)
+            while len(self._map) > self.maxsize:
+                self._map.popitem(last=False)
+
+    def invalidate(self, ns: str, ids: Optional[Iterable[int]] = None) -> None:
+        """ids 为 None 时整库失效"""
+        with self._lock:
+            self._gen += 1
+            self.invalidations += 1
+            if ids is None:
+                self._ns_gen[ns] = self._ns_gen.get(ns, 0) + 1
+                return
+            g = self._ns_gen.get(ns, 0)
+            for sid in ids:
+                self._map.pop((ns, g, sid), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._gen += 1
+            self._map.clear()
+
+
+default_gpa_cache = GPACache()
+
+# 库文件 → 选课表写入版本：本进程内写选课时 +1，按 (学生, 课程) 缓存选课 id 的一方据此清缓存
+_enroll_versions: Dict[str, int] = {}
+_enroll_versions_lock = threading.Lock()
 
 
 class SchoolDB:
@@ -15,6 +236,12 @@ class SchoolDB:
         db.ensure_tables()          # 建表
         with db as cur:             # 自动提交/回滚
             cur.execute("select * from students")
+
+    pool_size > 0 时启用连接池模式（WAL + 一次性 PRAGMA），连接跨调用复用；
+    pool_size = 0 保持原行为：每次 with 新建连接、退出即关闭。
+    同一线程内嵌套 with 共用外层连接与事务，只在最外层提交/回滚。
+    get_gpa / get_gpa_bulk 经过 gpa_cache（缺省为进程级共享实例，传 None 关闭）；
+    改动 GPA 的方法写入时立即失效，事务提交或回滚后再失效一次。
     """
 
     # -------------------- 表结构常量 --------------------
@@ -25,9 +252,16 @@ class SchoolDB:
     ATTEND_TABLE = "attendance"
 
     # ---------------------------------------------------
-    def __init__(self, db_path: Union[str, Path] = "school.db"):
+    def __init__(self, db_path: Union[str, Path] = "school.db", pool_size: int = 0,
+                 gpa_cache: Optional[GPACache] = default_gpa_cache):
         self.db_path = Path(db_path)
+        self.gpa_cache = gpa_cache
+        self._cache_ns = os.path.realpath(self.db_path)
         self._conn: Optional[sqlite3.Connection] = None
+        self._pool: Optional[ConnectionPool] = (
+            ConnectionPool(self.db_path, pool_size) if pool_size > 0 else None
+        )
+        self._local = threading.local()     # 每线程：当前事务连接 + 嵌套深度 + 待失效的 GPA
 
     # -------------- 连接管理 --------------
     def open(self) -> sqlite3.Connection:
@@ -42,23 +276,149 @@ class SchoolDB:
             self._conn.close()
             self._conn = None
 
+    def close_pool(self):
+        """关闭连接池中的空闲连接"""
+        if self._pool is not None:
+            self._pool.close_all()
+
+    def _acquire(self) -> sqlite3.Connection:
+        if self._pool is not None:
+            return self._pool.acquire()
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA foreign_keys = ON;")
+        return conn
+
+    def _release(self, conn: sqlite3.Connection):
+        if self._pool is not None:
+            self._pool.release(conn)
+        else:
+            conn.close()
+
     def __enter__(self) -> sqlite3.Cursor:
-        """上下文管理器入口：返回游标，退出时自动 commit / close"""
-        self.open()
-        self._conn.__enter__()          # 开始事务
-        return self._conn.cursor()
+        """
+        上下文管理器入口：返回游标，退出时自动 commit / 归还连接。
+        嵌套的 with 共用外层连接与事务；内层出错时只回滚内层自己的修改（SAVEPOINT），
+        外层吞掉异常后提交也不会带上内层写了一半的数据。
+        """
+        local = self._local
+        depth = getattr(local, "depth", 0)
+        if depth == 0:
+            local.conn = self._acquire()
+            local.savepoints = []
+        else:
+            conn = local.conn
+            if conn is not None and conn.in_transaction:
+                name = f"sp{depth}"
+                conn.execute(f"SAVEPOINT {name}")
+            else:
+                name = None             # 外层尚无未提交的修改，出错时整个事务回滚即可
+            local.savepoints.append(name)
+        local.depth = depth + 1
+        return local.conn.cursor()
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if exc_type is None:
-            self._conn.commit()
+        local = self._local
+        local.depth -= 1
+        if local.depth > 0:             # 内层 with：释放或回滚到自己的保存点，提交交给最外层
+            self._exit_nested(local.savepoints.pop(), exc_type is None)
+            return
+        conn, local.conn = local.conn, None
+        if conn is None:                # suspended 之后没能重新借到连接
+            return
+        try:
+            if exc_type is None:
+                conn.commit()
+            else:
+                conn.rollback()
+        finally:
+            self._release(conn)
+            self._flush_gpa_dirty()
+
+    def _exit_nested(self, name: Optional[str], ok: bool) -> None:
+        conn = self._local.conn
+        if conn is None:
+            return
+        if name is None:
+            if not ok and conn.in_transaction:
+                conn.rollback()
+        elif ok:
+            conn.execute(f"RELEASE {name}")
         else:
-            self._conn.rollback()
-        self.close()
+            conn.execute(f"ROLLBACK TO {name}")
+            conn.execute(f"RELEASE {name}")
+
+    @staticmethod
+    def _begin_write(cur: sqlite3.Cursor) -> None:
+        """
+        先拿写锁再读：sqlite3 只在第一条写语句前隐式 BEGIN，
+        “读旧值 → 算增量 → 写回”若读在事务外，并发时两边会读到同一个旧值。
+        """
+        if not cur.connection.in_transaction:
+            cur.execute("BEGIN IMMEDIATE")
+
+    @contextmanager
+    def suspended(self):
+        """
+        在外层 with 内暂时交还连接，例如脚本停下来等输入：先提交已做的修改并归还连接，
+        期间本线程相当于不在 with 里；退出时重新借一条连接，恢复原来的嵌套深度。
+        """
+        local = self._local
+        depth = getattr(local, "depth", 0)
+        if depth == 0:
+            yield
+            return
+        conn = local.conn
+        conn.commit()                   # 失败时原样抛出，连接仍归外层 with 处理
+        savepoints = local.savepoints
+        local.conn, local.depth = None, 0
+        self._release(conn)
+        self._flush_gpa_dirty()
+        try:
+            yield
+        finally:
+            local.depth = depth
+            local.savepoints = [None] * len(savepoints)   # 已提交，保存点随之失效
+            local.conn = self._acquire()    # 借不到时 conn 为 None，外层 __exit__ 跳过提交
+
+    # -------------- GPA 缓存失效 --------------
+    def _gpa_changed(self, stu_ids: Optional[Iterable[int]] = None):
+        """记录 GPA 变动（None 表示全部学生）：立即失效，并挂到本线程事务上等结束后再失效"""
+        if self.gpa_cache is None:
+            return
+        ids = None if stu_ids is None else list(stu_ids)
+        self.gpa_cache.invalidate(self._cache_ns, ids)
+        local = self._local
+        if getattr(local, "depth", 0) > 0:
+            dirty = getattr(local, "gpa_dirty", None)
+            if dirty is None:
+                dirty = local.gpa_dirty = set()
+            if ids is None:
+                dirty.add(None)
+            else:
+                dirty.update(ids)
+
+    # -------------- 选课变动 --------------
+    def enroll_version(self) -> int:
+        """本进程内选课表的写入版本号；与上次不同说明缓存的选课 id 可能已过期"""
+        return _enroll_versions.get(self._cache_ns, 0)
+
+    def _enrolls_changed(self) -> None:
+        with _enroll_versions_lock:
+            _enroll_versions[self._cache_ns] = _enroll_versions.get(self._cache_ns, 0) + 1
+
+    def _flush_gpa_dirty(self):
+        dirty = getattr(self._local, "gpa_dirty", None)
+        if not dirty:
+            return
+        self._local.gpa_dirty = None
+        self.gpa_cache.invalidate(self._cache_ns, None if None in dirty else dirty)
 
     # -------------- 业务接口 --------------
     def ensure_tables(self):
-        """若表不存在则创建"""
+        """若表不存在则创建，并把 schema 迁移到 SCHEMA_VERSION"""
         with self as cur:
+            if not cur.connection.in_transaction:
+                cur.execute("BEGIN IMMEDIATE")   # DDL 也纳入事务，并与并发迁移互斥
             cur.execute(
                 f"""
                 CREATE TABLE IF NOT EXISTS {self.STUDENT_TABLE} (
@@ -67,7 +427,9 @@ class SchoolDB:
                     password TEXT NOT NULL,
                     email   TEXT NOT NULL,
                     balance REAL DEFAULT 0.0,
-                    gpa     REAL DEFAULT 0.0
+                    gpa     REAL DEFAULT 0.0,
+                    gpa_weight REAL DEFAULT 0.0,   -- Σ 学分 * 单门 GPA
+                    gpa_credit REAL DEFAULT 0.0    -- Σ 学分（只计有效成绩）
                 );
                 """
             )
@@ -124,10 +486,73 @@ class SchoolDB:
                 );
                 """
             )
+
+            self._migrate(cur)
+
+    # -------------- schema 版本迁移（PRAGMA user_version） --------------
+    SCHEMA_VERSION = 2
+
+    def _migrate(self, cur: sqlite3.Cursor):
+        cur.execute("PRAGMA user_version")
+        version = cur.fetchone()[0]
+        for target, step in ((1, self._migrate_v1), (2, self._migrate_v2)):
+            if version < target:
+                step(cur)
+                cur.execute(f"PRAGMA user_version = {target}")
+
+    def _migrate_v1(self, cur: sqlite3.Cursor):
+        """v1：旧库补齐 GPA 累加列，并按现有成绩回填一次"""
+        cur.execute(f"PRAGMA table_info({self.STUDENT_TABLE})")
+        cols = {row[1] for row in cur.fetchall()}
+        missing = [c for c in ("gpa_weight", "gpa_credit") if c not in cols]
+        for col in missing:
+            cur.execute(f"ALTER TABLE {self.STUDENT_TABLE} ADD COLUMN {col} REAL DEFAULT 0.0")
+        if missing:
+            self.rebuild_gpa()
+
+    def _migrate_v2(self, cur: sqlite3.Cursor):
+        """v2：热点查询的二级索引 + 选课 (student_id, course_id) 唯一"""
+        # 唯一索引前先合并历史重复选课：保留 id 最小的一条，考勤记录并过去
+        cur.execute(
+            f"""
+            CREATE TEMP TABLE _dup_enroll AS
+            SELECT e.id AS dup_id, k.keep_id
+            FROM {self.ENROLL_TABLE} e
+            JOIN (SELECT student_id, course_id, MIN(id) AS keep_id
+                  FROM {self.ENROLL_TABLE}
+                  GROUP BY student_id, course_id HAVING COUNT(*) > 1) k
+              ON e.student_id = k.student_id AND e.course_id = k.course_id
+            WHERE e.id != k.keep_id
+            """
+        )
+        cur.execute(
+            f"UPDATE {self.ATTEND_TABLE} SET enrollment_id = "
+            f"(SELECT keep_id FROM _dup_enroll WHERE dup_id = enrollment_id) "
+            f"WHERE enrollment_id IN (SELECT dup_id FROM _dup_enroll)"
+        )
+        cur.execute(f"DELETE FROM {self.ENROLL_TABLE} WHERE id IN (SELECT dup_id FROM _dup_enroll)")
+        merged = cur.rowcount
+        if merged:
+            self._enrolls_changed()
+        cur.execute("DROP TABLE _dup_enroll")
+
+        for stmt in (
+            f"CREATE INDEX IF NOT EXISTS idx_students_name ON {self.STUDENT_TABLE}(name)",
+            f"CREATE INDEX IF NOT EXISTS idx_teachers_name ON {self.TEACHER_TABLE}(name)",
+            f"CREATE INDEX IF NOT EXISTS idx_courses_name ON {self.COURSE_TABLE}(name)",
+            f"CREATE UNIQUE INDEX IF NOT EXISTS uq_enroll_student_course "
+            f"ON {self.ENROLL_TABLE}(student_id, course_id)",
+            f"CREATE INDEX IF NOT EXISTS idx_enroll_course ON {self.ENROLL_TABLE}(course_id)",
+            f"CREATE INDEX IF NOT EXISTS idx_attend_enrollment ON {self.ATTEND_TABLE}(enrollment_id)",
+        ):
+            cur.execute(stmt)
+        if merged:
+            self.rebuild_gpa()        # 重复选课曾被重复计入 GPA
+
     def register_student(self, name: str, pwd: str, email: str) -> int:
         """返回新学生 id；不再检查邮箱唯一"""
         with self as cur:
-            h = hashlib.sha256(pwd.encode()).hexdigest()
+            h = hash_password(pwd)
             cur.execute(
                 f"INSERT INTO {self.STUDENT_TABLE} (name, password, email) VALUES (?,?,?)",
                 (name, h, email),
@@ -137,7 +562,7 @@ class SchoolDB:
     def register_teacher(self, name: str, pwd: str, email: str) -> int:
         """返回新老师 id；不再检查邮箱唯一"""
         with self as cur:
-            h = hashlib.sha256(pwd.encode()).hexdigest()
+            h = hash_password(pwd)
             cur.execute(
                 f"INSERT INTO {self.TEACHER_TABLE} (name, password, email) VALUES (?,?,?)",
                 (name, h, email),
@@ -145,23 +570,26 @@ class SchoolDB:
             return cur.lastrowid
         
     def login_student(self, name: str, pwd: str) -> bool:
-        h = hashlib.sha256(pwd.encode()).hexdigest()
-        with self as cur:
-            cur.execute(
-                f"SELECT 1 FROM {self.STUDENT_TABLE} WHERE name=? AND password=? LIMIT 1",
-                (name, h),
-            )
-            return cur.fetchone() is not None
+        return self.authenticate("student", name, pwd) is not None
 
     def login_teacher(self, name: str, pwd: str) -> bool:
-        h = hashlib.sha256(pwd.encode()).hexdigest()
+        return self.authenticate("teacher", name, pwd) is not None
+
+    def credentials(self, role: str, name: str) -> List[Tuple[int, str]]:
+        """按名字（走 name 索引）取同名用户的 (id, 口令哈希)，按 id 升序"""
+        table = self.STUDENT_TABLE if role == "student" else self.TEACHER_TABLE
         with self as cur:
-            cur.execute(
-                f"SELECT 1 FROM {self.TEACHER_TABLE} WHERE name=? AND password=? LIMIT 1",
-                (name, h),
-            )
-            return cur.fetchone() is not None
-    
+            cur.execute(f"SELECT id, password FROM {table} WHERE name=? ORDER BY id", (name,))
+            return cur.fetchall()
+
+    def authenticate(self, role: str, name: str, pwd: str) -> Optional[int]:
+        """role 为 student / teacher；校验通过返回用户 id（同名取 id 最小的匹配者），否则 None"""
+        h = hash_password(pwd)
+        for uid, stored in self.credentials(role, name):
+            if hmac.compare_digest(stored, h):
+                return uid
+        return None
+
     def create_course(self, name: str, teacher_id: int, credit: float = 0.0) -> int:
         """返回新课程 id；外键检查失败抛 ValueError"""
         with self as cur:
@@ -194,6 +622,8 @@ class SchoolDB:
                     f"INSERT INTO {self.ENROLL_TABLE} (student_id, course_id, score) VALUES (?,?,NULL)",
                     (stu_id, course_id),
                 )
+                self._gpa_changed((stu_id,))
+                self._enrolls_changed()
                 return cur.lastrowid
             except sqlite3.IntegrityError as e:
                 if "UNIQUE" in str(e):
@@ -274,7 +704,17 @@ class SchoolDB:
                 raise ValueError(f"学生 '{stu_name}' 不存在")
             stu_id = row[0]
 
-            # 3. 更新选课成绩
+            # 3. 记下旧成绩，用于增量维护 GPA（先拿写锁，旧值与更新在同一事务里）
+            self._begin_write(cur)
+            cur.execute(
+                f"SELECT e.score, c.credit FROM {self.ENROLL_TABLE} e "
+                f"JOIN {self.COURSE_TABLE} c ON e.course_id = c.id "
+                f"WHERE e.student_id = ? AND e.course_id = ?",
+                (stu_id, course_id)
+            )
+            old_rows = cur.fetchall()
+
+            # 4. 更新选课成绩
             cur.execute(
                 f"UPDATE {self.ENROLL_TABLE} SET score = ? "
                 f"WHERE student_id = ? AND course_id = ?",
@@ -282,7 +722,87 @@ class SchoolDB:
             )
             if cur.rowcount == 0:
                 raise ValueError("学生未选此课程，无法赋分")
+
+            # 5. GPA 累加值：减去旧成绩贡献，加上新成绩贡献
+            d_weight = d_credit = 0.0
+            for old_score, credit in old_rows:
+                if _counts(old_score):
+                    d_weight -= credit * course_gpa(old_score)
+                    d_credit -= credit
+                if _counts(score):
+                    d_weight += credit * course_gpa(score)
+                    d_credit += credit
+            self._bump_gpa(cur, stu_id, d_weight, d_credit)
             return True
+
+    def set_course_credit(self, course_id: int, credit: float) -> bool:
+        """修改课程学分，并同步修正所有已出分学生的 GPA 累加值；课程不存在抛 ValueError"""
+        with self as cur:
+            self._begin_write(cur)
+            cur.execute(f"SELECT credit FROM {self.COURSE_TABLE} WHERE id = ?", (course_id,))
+            row = cur.fetchone()
+            if row is None:
+                raise ValueError("课程不存在")
+            d = credit - row[0]
+            cur.execute(f"UPDATE {self.COURSE_TABLE} SET credit = ? WHERE id = ?", (credit, course_id))
+            cur.execute(
+                f"SELECT e.student_id, SUM({self._SQL_COURSE_GPA}), COUNT(*) "
+                f"FROM {self.ENROLL_TABLE} e "
+                f"WHERE e.course_id = ? AND e.score IS NOT NULL AND e.score != 0 "
+                f"GROUP BY e.student_id",
+                (course_id,)
+            )
+            for stu_id, gpa_sum, n in cur.fetchall():
+                self._bump_gpa(cur, stu_id, d * gpa_sum, d * n)
+            return True
+
+    def _bump_gpa(self, cur: sqlite3.Cursor, stu_id: int, d_weight: float, d_credit: float):
+        """在当前事务内给学生的 GPA 累加值加上增量，并刷新 gpa 列"""
+        if not d_weight and not d_credit:
+            return
+        cur.execute(
+            f"SELECT gpa_weight, gpa_credit FROM {self.STUDENT_TABLE} WHERE id = ?",
+            (stu_id,)
+        )
+        row = cur.fetchone()
+        if row is None:
+            return
+        weight, credit = row[0] + d_weight, row[1] + d_credit
+        if abs(credit) < 1e-9:          # 全部撤销时清掉浮点残差
+            weight = credit = 0.0
+        cur.execute(
+            f"UPDATE {self.STUDENT_TABLE} SET gpa_weight = ?, gpa_credit = ?, gpa = ? WHERE id = ?",
+            (weight, credit, weight / credit if credit else 0.0, stu_id)
+        )
+        self._gpa_changed((stu_id,))
+
+    def get_gpa(self, stu_id: int) -> float:
+        """读取物化的 GPA 列（主键查找，O(1)，命中缓存则不查库）；学生不存在返回 0.0"""
+        return self.get_gpa_bulk((stu_id,))[int(stu_id)]
+
+    def get_gpa_bulk(self, student_ids: Iterable[int]) -> Dict[int, float]:
+        """批量读取物化 GPA，返回 {学生 id: GPA}；不存在的学生为 0.0（与 get_gpa 一致）"""
+        ids = list(dict.fromkeys(int(i) for i in student_ids))
+        cache = self.gpa_cache
+        if cache is not None:
+            token = cache.token()
+            result, ids = cache.get_many(self._cache_ns, ids)
+            if not ids:
+                return result
+        else:
+            result = {}
+        fetched = dict.fromkeys(ids, 0.0)
+        with self as cur:
+            for k in range(0, len(ids), self._IN_CHUNK):
+                chunk = ids[k:k + self._IN_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                cur.execute(f"SELECT id, gpa FROM {self.STUDENT_TABLE} WHERE id IN ({marks})", chunk)
+                fetched.update(cur.fetchall())
+        if cache is not None:
+            cache.put_many(self._cache_ns, fetched, token)
+        result.update(fetched)
+        return result
+
     def calc_gpa(self, stu_id: int) -> float:
         """
         输入学生 id，返回加权 GPA（0-100 且非 0 的成绩才参与）
@@ -305,12 +825,324 @@ class SchoolDB:
 
             total_weight, total_credit = 0.0, 0.0
             for credit, score in rows:
-                course_gpa = 4.0 - 3.0 * (100.0 - score) ** 2 / 1600.0
-                total_weight += credit * course_gpa
+                total_weight += credit * course_gpa(score)
                 total_credit += credit
 
             return total_weight / total_credit if total_credit else 0.0
 
+    # 单门 GPA 的 SQL 表达式，与 calc_gpa 的公式一致（SQLite 无 pow，展开平方）
+    _SQL_COURSE_GPA = "(4.0 - 3.0 * (100.0 - e.score) * (100.0 - e.score) / 1600.0)"
+    _IN_CHUNK = 500     # IN (...) 每批占位符个数，避开 SQLite 变量上限
+
+    def calc_gpa_bulk(self, student_ids: Optional[Iterable[int]] = None) -> Dict[int, float]:
+        """
+        一次聚合查询算出多名学生的加权 GPA，返回 {学生 id: GPA}。
+        student_ids 为 None 时计算全部学生；没有有效成绩的学生为 0.0。
+        """
+        sql = f"""
+            SELECT s.id,
+                   COALESCE(SUM(c.credit * {self._SQL_COURSE_GPA}) / NULLIF(SUM(c.credit), 0), 0.0)
+            FROM {self.STUDENT_TABLE} s
+            LEFT JOIN {self.ENROLL_TABLE} e
+                   ON e.student_id = s.id AND e.score IS NOT NULL AND e.score != 0
+            LEFT JOIN {self.COURSE_TABLE} c ON e.course_id = c.id
+            {{where}}
+            GROUP BY s.id
+        """
+        with self as cur:
+            if student_ids is None:
+                cur.execute(sql.format(where=""))
+                return {sid: gpa for sid, gpa in cur.fetchall()}
+
+            ids = list(dict.fromkeys(int(i) for i in student_ids))
+            result = dict.fromkeys(ids, 0.0)
+            for k in range(0, len(ids), self._IN_CHUNK):
+                chunk = ids[k:k + self._IN_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                cur.execute(sql.format(where=f"WHERE s.id IN ({marks})"), chunk)
+                result.update(cur.fetchall())
+            return result
+
+    def rebuild_gpa(self, student_ids: Optional[Iterable[int]] = None) -> int:
+        """按 enrollments 重算 GPA 累加值与 gpa 列（缺省全部学生），返回学生数"""
+        valid = f"e.student_id = {self.STUDENT_TABLE}.id AND e.score IS NOT NULL AND e.score != 0"
+        sql = f"""
+            UPDATE {self.STUDENT_TABLE} SET
+                gpa_weight = COALESCE((
+                    SELECT SUM(c.credit * {self._SQL_COURSE_GPA})
+                    FROM {self.ENROLL_TABLE} e JOIN {self.COURSE_TABLE} c ON e.course_id = c.id
+                    WHERE {valid}), 0.0),
+                gpa_credit = COALESCE((
+                    SELECT SUM(c.credit)
+                    FROM {self.ENROLL_TABLE} e JOIN {self.COURSE_TABLE} c ON e.course_id = c.id
+                    WHERE {valid}), 0.0)
+            {{where}}
+        """
+        finish = (f"UPDATE {self.STUDENT_TABLE} SET gpa = "
+                  f"CASE WHEN gpa_credit != 0 THEN gpa_weight / gpa_credit ELSE 0.0 END {{where}}")
+        with self as cur:
+            if student_ids is None:
+                cur.execute(sql.format(where=""))
+                cur.execute(finish.format(where=""))
+                self._gpa_changed()
+                return cur.rowcount
+            ids = list(dict.fromkeys(int(i) for i in student_ids))
+            self._gpa_changed(ids)
+            n = 0
+            for k in range(0, len(ids), self._IN_CHUNK):
+                chunk = ids[k:k + self._IN_CHUNK]
+                where = f"WHERE id IN ({','.join('?' * len(chunk))})"
+                cur.execute(sql.format(where=where), chunk)
+                cur.execute(finish.format(where=where), chunk)
+                n += cur.rowcount
+            return n
+
+    # -------------- 批量导入 --------------
+    # 每 chunk 行一个事务；名字 → id 预先整表载入内存，不再逐行 SELECT
+    BULK_CHUNK = 5000
+
+    def _name_map(self, cur: sqlite3.Cursor, table: str) -> Dict[str, int]:
+        """名字 → 最小 id，与 enroll_by_name 等“取第一条”语义一致"""
+        cur.execute(f"SELECT name, MIN(id) FROM {table} GROUP BY name")
+        return dict(cur.fetchall())
+
+    def _bulk_register(self, table: str, rows: Iterable[Tuple[str, str, str]],
+                       chunk: int, kind: str) -> ImportReport:
+        rep = ImportReport(kind)
+        t0 = time.perf_counter()
+        sql = f"INSERT INTO {table} (name, password, email) VALUES (?,?,?)"
+        for part in _chunks(rows, chunk):
+            with self as cur:
+                cur.executemany(sql, ((name, hash_password(pwd), email)
+                                      for name, pwd, email in part))
+            rep.rows += len(part)
+        rep.seconds = time.perf_counter() - t0
+        return rep
+
+    def bulk_register_students(self, rows: Iterable[Tuple[str, str, str]],
+                               chunk: int = BULK_CHUNK) -> ImportReport:
+        """rows: (name, pwd, email)"""
+        return self._bulk_register(self.STUDENT_TABLE, rows, chunk, "students")
+
+    def bulk_register_teachers(self, rows: Iterable[Tuple[str, str, str]],
+                               chunk: int = BULK_CHUNK) -> ImportReport:
+        """rows: (name, pwd, email)"""
+        return self._bulk_register(self.TEACHER_TABLE, rows, chunk, "teachers")
+
+    def bulk_create_courses(self, rows: Iterable[Tuple[str, str, float]],
+                            chunk: int = BULK_CHUNK) -> ImportReport:
+        """rows: (课程名, 教师名, 学分)；教师不存在的行跳过"""
+        rep = ImportReport("courses")
+        t0 = time.perf_counter()
+        with self as cur:
+            teachers = self._name_map(cur, self.TEACHER_TABLE)
+        sql = f"INSERT INTO {self.COURSE_TABLE} (name, teacher_id, credit) VALUES (?,?,?)"
+        for part in _chunks(rows, chunk):
+            batch = []
+            for name, t_name, credit in part:
+                tid = teachers.get(t_name)
+                if tid is None:
+                    rep.skipped += 1
+                    continue
+                batch.append((name, tid, float(credit)))
+            with self as cur:
+                cur.executemany(sql, batch)
+            rep.rows += len(batch)
+        rep.seconds = time.perf_counter() - t0
+        return rep
+
+    def bulk_enroll(self, rows: Iterable[Tuple[str, str]],
+                    chunk: int = BULK_CHUNK) -> ImportReport:
+        """rows: (学生名, 课程名)；名字解析失败或已选的行跳过"""
+        rep = ImportReport("enrollments")
+        t0 = time.perf_counter()
+        with self as cur:
+            students = self._name_map(cur, self.STUDENT_TABLE)
+            courses = self._name_map(cur, self.COURSE_TABLE)
+        sql = (f"INSERT OR IGNORE INTO {self.ENROLL_TABLE} (student_id, course_id, score) "
+               f"VALUES (?,?,NULL)")
+        for part in _chunks(rows, chunk):
+            batch = []
+            for s_name, c_name in part:
+                sid, cid = students.get(s_name), courses.get(c_name)
+                if sid is None or cid is None:
+                    rep.skipped += 1
+                    continue
+                batch.append((sid, cid))
+            with self as cur:
+                before = cur.connection.total_changes
+                cur.executemany(sql, batch)
+                written = cur.connection.total_changes - before
+                self._gpa_changed(sid for sid, _ in batch)
+                if written:
+                    self._enrolls_changed()
+            rep.rows += written
+            rep.skipped += len(batch) - written
+        rep.seconds = time.perf_counter() - t0
+        return rep
+
+    def bulk_set_scores(self, rows: Iterable[Tuple[str, str, str, float]],
+                        chunk: int = BULK_CHUNK) -> ImportReport:
+        """rows: (课程名, 教师名, 学生名, 成绩)；每个事务末尾重算受影响学生的 GPA"""
+        rep = ImportReport("scores")
+        t0 = time.perf_counter()
+        with self as cur:
+            students = self._name_map(cur, self.STUDENT_TABLE)
+            cur.execute(
+                f"SELECT c.name, t.name, MIN(c.id) FROM {self.COURSE_TABLE} c "
+                f"JOIN {self.TEACHER_TABLE} t ON c.teacher_id = t.id GROUP BY c.name, t.name"
+            )
+            courses = {(c, t): cid for c, t, cid in cur.fetchall()}
+        sql = f"UPDATE {self.ENROLL_TABLE} SET score = ? WHERE student_id = ? AND course_id = ?"
+        for part in _chunks(rows, chunk):
+            batch = []
+            for c_name, t_name, s_name, score in part:
+                sid, cid = students.get(s_name), courses.get((c_name, t_name))
+                if sid is None or cid is None:
+                    rep.skipped += 1
+                    continue
+                batch.append((float(score), sid, cid))
+            with self as cur:
+                before = cur.connection.total_changes
+                cur.executemany(sql, batch)
+                written = cur.connection.total_changes - before
+                self.rebuild_gpa(sid for _, sid, _ in batch)
+            rep.rows += written
+            rep.skipped += len(batch) - written
+        rep.seconds = time.perf_counter() - t0
+        return rep
+
+    # 文件导入：kind → (列名, 批量方法)
+    IMPORT_KINDS = {
+        "students": (("name", "password", "email"), "bulk_register_students"),
+        "teachers": (("name", "password", "email"), "bulk_register_teachers"),
+        "courses": (("name", "teacher", "credit"), "bulk_create_courses"),
+        "enrollments": (("student", "course"), "bulk_enroll"),
+        "scores": (("course", "teacher", "student", "score"), "bulk_set_scores"),
+    }
+
+    def import_file(self, kind: str, path: Union[str, Path],
+                    chunk: int = BULK_CHUNK) -> ImportReport:
+        """从 CSV / JSONL 流式导入一类数据，列名见 IMPORT_KINDS"""
+        if kind not in self.IMPORT_KINDS:
+            raise ValueError(f"未知导入类型: {kind}")
+        cols, method = self.IMPORT_KINDS[kind]
+        rows = (tuple(rec[c] for c in cols) for rec in read_rows(path))
+        return getattr(self, method)(rows, chunk)
+
+    def check_gpa(self, tol: float = 1e-6) -> List[Tuple[int, float, float]]:
+        """一致性检查：返回 [(学生 id, 物化值, 重算值), ...]，空列表表示全部一致"""
+        actual = self.calc_gpa_bulk()
+        with self as cur:
+            cur.execute(f"SELECT id, gpa FROM {self.STUDENT_TABLE}")
+            stored = cur.fetchall()
+        return [(sid, gpa, actual.get(sid, 0.0))
+                for sid, gpa in stored
+                if abs(gpa - actual.get(sid, 0.0)) > tol]
+
+    # -------------- 分页（keyset：按 id 升序，下一页从上一页最后一行的 id 之后开始） --------------
+    PAGE_FIELDS = {
+        "courses": ("id", "name", "teacher", "credit"),
+        "roster": ("id", "student_id", "student", "score"),
+        "attendance": ("id", "student", "course_id", "course", "status", "timestamp"),
+    }
+    MAX_PAGE = 1000
+
+    def _limit(self, limit: int) -> int:
+        return max(1, min(int(limit), self.MAX_PAGE))
+
+    def page_courses(self, after: int = 0, limit: int = 100) -> List[Tuple]:
+        """一页课程：[(课程 id, 课程名, 教师名, 学分), ...]"""
+        with self as cur:
+            cur.execute(f"""
+                SELECT c.id, c.name, t.name, c.credit
+                FROM {self.COURSE_TABLE} c
+                LEFT JOIN {self.TEACHER_TABLE} t ON c.teacher_id = t.id
+                WHERE c.id > ?
+                ORDER BY c.id LIMIT ?
+            """, (after, self._limit(limit)))
+            return cur.fetchall()
+
+    def page_roster(self, course_id: int, after: int = 0, limit: int = 100) -> List[Tuple]:
+        """一页选课名单：[(选课 id, 学生 id, 学生名, 成绩), ...]，走 (course_id, id) 索引"""
+        with self as cur:
+            cur.execute(f"""
+                SELECT e.id, s.id, s.name, e.score
+                FROM {self.ENROLL_TABLE} e
+                JOIN {self.STUDENT_TABLE} s ON e.student_id = s.id
+                WHERE e.course_id = ? AND e.id > ?
+                ORDER BY e.id LIMIT ?
+            """, (course_id, after, self._limit(limit)))
+            return cur.fetchall()
+
+    MERGE_MAX = 64      # 过滤后的选课记录不多于此数：逐条走 (enrollment_id, id) 索引再归并；否则按考勤 id 顺序扫
+
+    def page_attendance(self, after: int = 0, limit: int = 100, student_id: Optional[int] = None,
+                        course_id: Optional[int] = None) -> List[Tuple]:
+        """
+        一页考勤记录：[(考勤 id, 学生名, 课程 id, 课程名, 状态, 时间), ...]，可按学生 / 课程过滤。
+        每页都从 after 处接着读，不对过滤后的整段历史排序。
+        """
+        limit = self._limit(limit)
+        select = f"""
+            SELECT a.id, s.name, c.id, c.name, a.status, a.timestamp
+            FROM {self.ATTEND_TABLE} a
+            CROSS JOIN {self.ENROLL_TABLE} e ON a.enrollment_id = e.id
+            JOIN {self.STUDENT_TABLE} s ON e.student_id = s.id
+            JOIN {self.COURSE_TABLE} c ON e.course_id = c.id
+        """
+        if student_id is None and course_id is None:
+            with self as cur:
+                cur.execute(f"{select} WHERE a.id > ? ORDER BY a.id LIMIT ?", (after, limit))
+                return cur.fetchall()
+
+        where, params = [], []
+        if student_id is not None:
+            where.append("e.student_id = ?")
+            params.append(student_id)
+        if course_id is not None:
+            where.append("e.course_id = ?")
+            params.append(course_id)
+        where = " AND ".join(where)
+        with self as cur:
+            cur.execute(f"""
+                SELECT e.id, s.name, c.id, c.name
+                FROM {self.ENROLL_TABLE} e
+                JOIN {self.STUDENT_TABLE} s ON e.student_id = s.id
+                JOIN {self.COURSE_TABLE} c ON e.course_id = c.id
+                WHERE {where} LIMIT ?
+            """, params + [self.MERGE_MAX + 1])
+            enrolls = cur.fetchall()
+            if len(enrolls) > self.MERGE_MAX:
+                # 选课记录多（如整门课）：沿考勤主键顺序扫，过滤条件不走索引，免得按选课展开后再排序
+                cur.execute(f"{select} WHERE a.id > ? AND {where.replace('e.', '+e.')} "
+                            f"ORDER BY a.id LIMIT ?", [after] + params + [limit])
+                return cur.fetchall()
+            runs = []
+            for eid, stu, cid, course in enrolls:
+                cur.execute(f"""
+                    SELECT id, status, timestamp FROM {self.ATTEND_TABLE}
+                    WHERE enrollment_id = ? AND id > ?
+                    ORDER BY id LIMIT ?
+                """, (eid, after, limit))
+                runs.append([(aid, stu, cid, course, status, ts) for aid, status, ts in cur.fetchall()])
+            return list(islice(heapq.merge(*runs), limit))
+
+    def scan(self, kind: str, after: int = 0, page: int = MAX_PAGE, **filters) -> Iterator[Tuple]:
+        """
+        逐页遍历 courses / roster / attendance，内存只占一页。
+        每页单独一次短查询，不在整个遍历期间占着读事务。
+        """
+        fetch = getattr(self, f"page_{kind}")
+        page = self._limit(page)
+        while True:
+            rows = fetch(after=after, limit=page, **filters)
+            yield from rows
+            if len(rows) < page:
+                return
+            after = rows[-1][0]
+
+
 def list_courses_cli(courses: List[Tuple[str, str, float]]) -> None:
     if not courses:
         print("暂无课程")
@@ -322,4 +1154,32 @@ def list_courses_cli(courses: List[Tuple[str, str, float]]) -> None:
         print(f"{c_name:<20} {t_name or '—':<15} {credit:>6.1f}")
 
 
+def main(argv: Optional[List[str]] = None) -> None:
+    import argparse
+    ap = argparse.ArgumentParser(description="school 数据库维护命令")
+    ap.add_argument("--db", default="school.db", help="数据库文件路径")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("check-gpa", help="对比物化 GPA 与按成绩重算的结果")
+    sub.add_parser("rebuild-gpa", help="按成绩全量重算物化 GPA")
+    imp = sub.add_parser("import", help="从 CSV/JSONL 批量导入")
+    imp.add_argument("kind", choices=sorted(SchoolDB.IMPORT_KINDS))
+    imp.add_argument("file", help=".csv（带表头）或 .jsonl")
+    imp.add_argument("--chunk", type=int, default=SchoolDB.BULK_CHUNK, help="每个事务的行数")
+    args = ap.parse_args(argv)
+
+    db = SchoolDB(args.db)
+    db.ensure_tables()
+    if args.cmd == "check-gpa":
+        bad = db.check_gpa()
+        for sid, stored, actual in bad:
+            print(f"学生 {sid}: 物化 {stored:.6f} ≠ 重算 {actual:.6f}")
+        print("GPA 全部一致" if not bad else f"共 {len(bad)} 名学生不一致")
+    elif args.cmd == "rebuild-gpa":
+        n = db.rebuild_gpa()
+        print(f"已重算 {n} 名学生的 GPA")
+    elif args.cmd == "import":
+        print(db.import_file(args.kind, args.file, args.chunk))
+
 
+if __name__ == "__main__":
+    main()
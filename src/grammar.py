@@ -1,11 +1,19 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
 import re
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+_CMD_RE = re.compile(r'^(?P<cmd>\w+)\s+(?P<entity>\w+)\s*(?P<args>.*)$')
+_ARG_RE = re.compile(r'(\w+)=["\']?([\w@.\-]+)["\']?')
+
 
 def parse_entity_command(line):
     """
     解析 ENTITY 命令: COMMAND ENTITY key=value key2=value2 ...
     """
-    pattern = r'^(?P<cmd>\w+)\s+(?P<entity>\w+)\s*(?P<args>.*)$'
-    match = re.match(pattern, line.strip())
+    match = _CMD_RE.match(line.strip())
     if not match:
         return None
 
@@ -14,5 +22,116 @@ def parse_entity_command(line):
     args_str = match.group('args')
 
     # 解析参数 key=value
-    args = dict(re.findall(r'(\w+)=["\']?([\w@.\-]+)["\']?', args_str))
+    args = dict(_ARG_RE.findall(args_str))
     return {"type": "command", "cmd": cmd, "entity": entity, "args": args}
+
+
+# ---------- 批量 ----------
+class EntityCommand:
+    """parse_entity_command 的紧凑版本，批量解析时使用"""
+    __slots__ = ('cmd', 'entity', 'args', 'line')
+    def __init__(self, cmd: str, entity: str, args: Dict[str, str], line: int):
+        self.cmd = cmd
+        self.entity = entity
+        self.args = args
+        self.line = line            # 源文件行号，诊断用
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return (self.cmd, self.entity)
+
+
+def iter_entity_commands(lines: Iterable[str],
+                         errors: Optional[List[Tuple[int, str]]] = None) -> Iterator[EntityCommand]:
+    """
+    流式解析命令文件：跳过空行与 # 注释；无法解析的行记入 errors（行号, 原文）。
+    """
+    match, findall = _CMD_RE.match, _ARG_RE.findall
+    for no, raw in enumerate(lines, 1):
+        line = raw.strip()
+        if not line or line[0] == '#':
+            continue
+        m = match(line)
+        if m is None:
+            if errors is not None:
+                errors.append((no, line))
+            continue
+        cmd, entity, args = m.groups()
+        yield EntityCommand(cmd.upper(), entity.upper(), dict(findall(args)), no)
+
+
+def _pwd(a: Dict[str, str]) -> Optional[str]:
+    return a.get("password") or a.get("pass") or a.get("pwd")
+
+
+# (命令, 实体) → (SchoolDB 批量方法, 参数 → 行元组；缺必填参数返回 None)
+BULK_COMMANDS = {
+    ("ADD", "STUDENT"): ("bulk_register_students",
+                         lambda a: (a["name"], _pwd(a), a.get("email", "")) if "name" in a and _pwd(a) else None),
+    ("ADD", "TEACHER"): ("bulk_register_teachers",
+                         lambda a: (a["name"], _pwd(a), a.get("email", "")) if "name" in a and _pwd(a) else None),
+    ("ADD", "COURSE"): ("bulk_create_courses",
+                        lambda a: (a["name"], a["teacher"], float(a.get("credit", 0)))
+                        if "name" in a and "teacher" in a else None),
+    ("ENROLL", "STUDENT"): ("bulk_enroll",
+                            lambda a: (a["name"], a["course"]) if "name" in a and "course" in a else None),
+    ("SET", "SCORE"): ("bulk_set_scores",
+                       lambda a: (a["course"], a["teacher"], a["student"], float(a["score"]))
+                       if all(k in a for k in ("course", "teacher", "student", "score")) else None),
+}
+
+
+def load_entity_commands(lines: Iterable[str], db, chunk: Optional[int] = None) -> Dict[str, "ImportReport"]:
+    """
+    解析命令文件并直接写库：连续的同类命令作为一个流交给对应的 bulk_* 方法
+    （由它按 chunk 分事务、名字映射只建一次）。按文件顺序逐段处理，
+    保证“先建学生、后选课”这类顺序依赖成立。
+    返回 {"ADD STUDENT": ImportReport, ...}；未知命令、缺参数、解析失败的行计入 "SKIPPED"。
+    """
+    from src.db import ImportReport
+    chunk = chunk or db.BULK_CHUNK
+    reports: Dict[str, ImportReport] = {}
+    skipped = reports["SKIPPED"] = ImportReport("skipped")
+    errors: List[Tuple[int, str]] = []
+
+    def rows():
+        for c in iter_entity_commands(lines, errors):
+            spec = BULK_COMMANDS.get(c.key)
+            try:
+                row = spec[1](c.args) if spec is not None else None
+            except ValueError:
+                row = None
+            if row is None:
+                skipped.skipped += 1
+                continue
+            yield c.key, row
+
+    for key, group in groupby(rows(), key=itemgetter(0)):
+        rep = getattr(db, BULK_COMMANDS[key][0])((row for _, row in group), chunk)
+        total = reports.setdefault(" ".join(key), ImportReport(rep.kind))
+        total.rows += rep.rows
+        total.skipped += rep.skipped
+        total.seconds += rep.seconds
+    skipped.skipped += len(errors)
+    return reports
+
+
+def main(argv=None) -> None:
+    import argparse
+    from src.db import SchoolDB
+    ap = argparse.ArgumentParser(description="批量执行 ENTITY 命令文件（ADD STUDENT name=... 等）")
+    ap.add_argument("file")
+    ap.add_argument("--db", default="school.db")
+    ap.add_argument("--chunk", type=int, default=SchoolDB.BULK_CHUNK, help="每个事务的行数")
+    args = ap.parse_args(argv)
+
+    db = SchoolDB(args.db)
+    db.ensure_tables()
+    with open(args.file, "r", encoding="utf-8") as f:
+        reports = load_entity_commands(f, db, args.chunk)
+    for name, rep in reports.items():
+        print(f"{name:<14} {rep}")
+
+
+if __name__ == "__main__":
+    main()
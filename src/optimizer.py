@@ -0,0 +1,191 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+from typing import Dict, List, Optional
+from src.parser import VarStore, Const, Var, Call, Cmp, speak_format
+from src.compiler import (
+    Instr, Program,
+    OP_REG, OP_SPEAK, OP_INPUT, OP_CALL, OP_ERROR, OP_LINE, OP_BRANCH, OP_JUMP,
+)
+
+# 无副作用、只依赖参数的内置函数，参数全为常量时可在编译期求值
+PURE_BUILTINS = ("EQUAL", "GREATER")
+
+_UNKNOWN = object()       # 可能已定义、值未知
+_TYPES = {"STRING": (str,), "NUM": (int, float), "BOOL": (bool,)}
+
+# 变量状态：名字不在表里 = 一定未定义；值为 _UNKNOWN = 未知；其余 = 已知常量
+State = Optional[Dict[str, object]]     # None 表示“任何变量都可能被改过”
+
+
+def _lookup(state: State, name: str):
+    if state is None:
+        return _UNKNOWN
+    return state.get(name)
+
+
+def _meet(a: State, b: State) -> State:
+    """汇合点：两条路径上取值一致的才保留为常量，其余降为未知"""
+    if a is None or b is None:
+        return None
+    out = {}
+    for name in a.keys() | b.keys():
+        va, vb = a.get(name), b.get(name)
+        same = va is not _UNKNOWN and vb is not _UNKNOWN and type(va) is type(vb) and va == vb
+        out[name] = va if same else _UNKNOWN
+    return out
+
+
+def fold_expr(node, state: State):
+    """常量传播 + 纯函数 / 比较折叠；折叠失败（运行时才会报错）的保持原样"""
+    if isinstance(node, Var):
+        val = _lookup(state, node.name)
+        return Const(val) if val is not None and val is not _UNKNOWN else node
+    if isinstance(node, Call):
+        args = [fold_expr(a, state) for a in node.args]
+        if node.fname in PURE_BUILTINS and all(isinstance(a, Const) for a in args):
+            try:
+                return Const(node.handler(None, [a.value for a in args]))
+            except Exception:
+                pass
+        return Call(node.fname, node.handler, args)
+    if isinstance(node, Cmp):
+        folded = Cmp(node.op, fold_expr(node.left, state), fold_expr(node.right, state))
+        if isinstance(folded.left, Const) and isinstance(folded.right, Const):
+            try:
+                return Const(folded.ev(None))
+            except Exception:
+                pass
+        return folded
+    return node
+
+
+def _fold_speak(tokens: List[str], state: State) -> List[str]:
+    out: List[str] = []
+    for tok in tokens:
+        if tok.startswith('$'):
+            val = _lookup(state, tok[1:])
+            text = speak_format(val) if val is not None and val is not _UNKNOWN else None
+            # 折叠后若以 $ 开头会被当成变量，保持原样
+            if text is not None and not text.startswith('$'):
+                tok = text
+            else:
+                out.append(tok)
+                continue
+        if out and not out[-1].startswith('$'):
+            out[-1] += tok                   # 相邻字面量合并
+        else:
+            out.append(tok)
+    return out
+
+
+def optimize(program: Program) -> Program:
+    """
+    对已编译程序做常量折叠、常量 REG 传播与死分支消除，返回新 Program（原程序不变）。
+    前提：在全新的 VarStore 上从头执行（批量脚本的用法）；会话里变量会跨消息残留，不要用。
+    """
+    code = program.code
+    n = len(code)
+    # 所有跳转都向前（Tree 按行序编号），否则放弃优化
+    for pc, ins in enumerate(code):
+        if (ins.op == OP_JUMP and ins.a <= pc) or (ins.op == OP_BRANCH and min(ins.b, ins.c) <= pc):
+            return program
+
+    states: List[State] = [None] * n
+    reached = [False] * n
+    states[0:1], reached[0:1] = [{}], [True]
+    new: List[Optional[Instr]] = [None] * n
+
+    for pc in range(n):
+        if not reached[pc]:
+            continue
+        ins, st = code[pc], states[pc]
+        out = dict(st) if st is not None else None
+        succ = [pc + 1]
+        op = ins.op
+
+        if op == OP_REG:
+            expr = fold_expr(ins.c, st)
+            cur = _lookup(st, ins.b)
+            if cur is None and out is not None and VarStore.is_valid_name(ins.b):
+                ok = isinstance(expr, Const) and isinstance(expr.value, _TYPES[ins.a])
+                if ok or not isinstance(expr, Const):
+                    out[ins.b] = expr.value if ok else _UNKNOWN
+            new[pc] = Instr(OP_REG, ins.a, ins.b, expr, line=ins.line, slot=ins.slot)
+        elif op == OP_CALL:
+            expr = fold_expr(ins.a, st)
+            if out is not None:
+                out["result"] = expr.value if isinstance(expr, Const) else _UNKNOWN
+            new[pc] = Instr(OP_CALL, expr, line=ins.line, slot=ins.slot)
+        elif op == OP_SPEAK:
+            new[pc] = Instr(OP_SPEAK, _fold_speak(ins.a, st), line=ins.line)
+        elif op == OP_INPUT:
+            if out is not None and ins.a in out:
+                out[ins.a] = _UNKNOWN
+            new[pc] = ins
+        elif op == OP_BRANCH:
+            cond = fold_expr(ins.a, st)
+            if isinstance(cond, Const) and isinstance(cond.value, bool):
+                target = ins.b if cond.value else ins.c
+                new[pc] = Instr(OP_JUMP, target, line=ins.line)
+                succ = [target]
+            else:
+                new[pc] = Instr(OP_BRANCH, cond, ins.b, ins.c, line=ins.line)
+                succ = [ins.b, ins.c]
+        elif op == OP_JUMP:
+            new[pc] = ins
+            succ = [ins.a]
+        elif op == OP_LINE:
+            out = None                       # 自定义关键字：副作用未知
+            new[pc] = ins
+        else:                                # OP_ERROR
+            new[pc] = ins
+
+        for s in succ:
+            if s < n:
+                states[s] = out if not reached[s] else _meet(states[s], out)
+                reached[s] = True
+
+    return Program(_compact(new, reached), program.source, program.names)
+
+
+def _compact(code: List[Optional[Instr]], keep: List[bool]) -> List[Instr]:
+    """删掉不可达指令和跳到下一条的 JUMP，并重排跳转目标"""
+    n = len(code)
+    keep = list(keep)
+    while True:
+        order = [pc for pc in range(n) if keep[pc]]
+        nxt = {pc: (order[k + 1] if k + 1 < len(order) else n) for k, pc in enumerate(order)}
+        dropped = False
+        for pc in order:
+            ins = code[pc]
+            if ins.op == OP_JUMP and _land(ins.a, keep, n) == nxt[pc]:
+                keep[pc] = False
+                dropped = True
+        if not dropped:
+            break
+
+    new_pc = {}
+    for pc in order:
+        new_pc[pc] = len(new_pc)
+    end = len(order)
+
+    def remap(t: int) -> int:
+        t = _land(t, keep, n)
+        return new_pc[t] if t < n else end
+
+    out = []
+    for pc in order:
+        ins = code[pc]
+        if ins.op == OP_JUMP:
+            ins = Instr(OP_JUMP, remap(ins.a), line=ins.line)
+        elif ins.op == OP_BRANCH:
+            ins = Instr(OP_BRANCH, ins.a, remap(ins.b), remap(ins.c), line=ins.line)
+        out.append(ins)
+    return out
+
+
+def _land(t: int, keep: List[bool], n: int) -> int:
+    """目标若已删除（被删的 JUMP 等价于顺序执行），落到其后第一条保留的指令"""
+    while t < n and not keep[t]:
+        t += 1
+    return t
@@ -1,8 +1,11 @@
 import sys, pathlib
 sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
 import re
-from typing import List, Any, Dict, Union, Optional, Callable
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import List, Any, Dict, Union, Optional, Callable, Iterable, Iterator
 from src.db import SchoolDB
+from src.channels import OutputSink, ConsoleOutput, InputSource, ConsoleInput
 
 
 
@@ -12,28 +15,66 @@ class Runtime:
     user_id: int
     is_student: bool
     db: SchoolDB
+    out: OutputSink
 
     # 显式构造函数
-    def __init__(self, user_id: int, is_student: bool, db: SchoolDB):
+    def __init__(self, user_id: int, is_student: bool, db: SchoolDB,
+                 out: Optional[OutputSink] = None):
         self.user_id = user_id
         self.is_student = is_student
         self.db = db
+        self.out = out if out is not None else ConsoleOutput()
 
 class VarStore:
-    """名字→值 单映射，类型仅运行时检查，拒绝重名"""
-    def __init__(self) -> None:
-        self._map: Dict[str, Val] = {}
+    """
+    名字 → 槽位 → 值，类型仅运行时检查，拒绝重名。
+    值存在平坦列表里（None 表示未定义）；名字只在第一次分配槽位时校验。
+    编译执行器按槽位直接读写（见 compiler.execute），REPL 仍走名字接口。
+    """
+    def __init__(self, out: Optional[OutputSink] = None) -> None:
+        self._slots: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._vals: List[Optional[Val]] = []
+        self.out = out if out is not None else ConsoleOutput()   # 错误信息输出
+
+    @staticmethod
+    def is_valid_name(name: str) -> bool:
+        return bool(name) and name[0].isalpha() and name.replace('_', '').isalnum()
+
+    # ---------- 槽位 ----------
+    def slot(self, name: str) -> int:
+        """名字 → 槽位，没有就分配（调用方保证名字合法）"""
+        k = self._slots.get(name)
+        if k is None:
+            k = self._slots[name] = len(self._vals)
+            self._names.append(name)
+            self._vals.append(None)
+        return k
+
+    def bind(self, names: List[str]) -> List[int]:
+        """程序内槽位 → 本变量表槽位"""
+        return [self.slot(n) for n in names]
+
+    def _checked_slot(self, name: str) -> int:
+        k = self._slots.get(name)
+        if k is not None:
+            return k
+        if not self.is_valid_name(name):
+            self.out.say(f"[ERROR] 非法变量名: {name}")
+            return -1
+        return self.slot(name)
 
     # ---------- 注册 ----------
     def reg(self, name: str, value: Val) -> bool:
         """成功返回 True；重名或非法名返回 False 并打印错误"""
-        if not name or not name[0].isalpha() or not name.replace('_', '').isalnum():
-            print(f"[ERROR] 非法变量名: {name}")
-            return False
-        if name in self._map:
-            print(f"[ERROR] 变量 '{name}' 已存在")
+        k = self._checked_slot(name)
+        return k >= 0 and self.reg_slot(k, value)
+
+    def reg_slot(self, k: int, value: Val) -> bool:
+        if self._vals[k] is not None:
+            self.out.say(f"[ERROR] 变量 '{self._names[k]}' 已存在")
             return False
-        self._map[name] = value
+        self._vals[k] = value
         return True
     
     def update(self, name: str, value: Val) -> bool:
@@ -42,27 +83,28 @@ class VarStore:
         返回 True 表示覆盖，False 表示新建
         """
         # 1. 非法变量名直接拒
-        if not name or not name[0].isalpha() or not name.replace('_', '').isalnum():
-            print(f"[ERROR] 非法变量名: {name}")
+        k = self._checked_slot(name)
+        if k < 0:
             return False
 
-        # 2. 已存在 → 直接覆盖（允许跨类型）
-        if name in self._map:
-            self._map[name] = value
-            return True
-
-        # 3. 不存在 → 新建
-        self._map[name] = value
-        return False
+        # 2. 已存在 → 直接覆盖（允许跨类型）；不存在 → 新建
+        existed = self._vals[k] is not None
+        self._vals[k] = value
+        return existed
     
     # ---------- 取值 ----------
     def get(self, name: str) -> Optional[Val]:
-        return self._map.get(name)          # 不存在返回 None
+        k = self._slots.get(name)
+        return self._vals[k] if k is not None else None     # 不存在返回 None
+
+    def __contains__(self, name: str) -> bool:
+        return self.get(name) is not None
 
     # ---------- debug ----------
     def dump(self) -> None:
-        for k, v in self._map.items():
-            print(f"  {k} = {v!r}")
+        for k, v in zip(self._names, self._vals):
+            if v is not None:
+                self.out.say(f"  {k} = {v!r}")
 
 
 
@@ -70,6 +112,39 @@ class Builtin:
     
     def __init__(self, rt: Runtime):
         self.rt = rt
+        self._memo: Optional[Dict[tuple, Any]] = None     # 脚本级读缓存，只在 run_scope 内启用
+        # 函数名 → 绑定方法，构造时建一次
+        self.registry: Dict[str, Callable] = {
+            name: fn.__get__(self, Builtin) for name, fn in self.HANDLERS.items()
+        }
+
+    @contextmanager
+    def run_scope(self, gpa_ids: Iterable[int] = ()) -> Iterator[None]:
+        """
+        一次脚本运行：读类内置函数（GPA / GPA_ALL）按参数记忆，写操作后清空；
+        gpa_ids 为编译期已知的 GPA 参数，多于一个时先一条查询全部取回。
+        """
+        if self._memo is not None:          # 嵌套运行沿用外层缓存
+            yield
+            return
+        memo: Dict[tuple, Any] = {}
+        ids = list(gpa_ids)
+        if len(ids) > 1:
+            for sid, g in self.rt.db.get_gpa_bulk(ids).items():
+                memo[("GPA", sid)] = g
+        self._memo = memo
+        try:
+            yield
+        finally:
+            self._memo = None
+
+    def _remember(self, key: tuple, fetch: Callable[[], Any]) -> Any:
+        memo = self._memo
+        if memo is None:
+            return fetch()
+        if key not in memo:
+            memo[key] = fetch()
+        return memo[key]
     
     def equal(self, args: List[Any]) -> bool:
         if len(args) != 2:
@@ -84,9 +159,29 @@ class Builtin:
             raise ValueError("GREATER 只支持 NUM 类型")
         return a > b
 
+    @staticmethod
+    def student_id(fname: str, value: Any) -> int:
+        """GPA / GPA_ALL 的学生 id 参数：只收 NUM，否则报 DSL 层面的错误"""
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            try:
+                return int(value)
+            except (ValueError, OverflowError):         # nan / inf
+                pass
+        raise ValueError(f"{fname} 参数必须是 NUM")
+
     def gpa(self, args: list[Any]) -> float:
-        sid = str(args[0])
-        return self.rt.db.calc_gpa(sid)  
+        """GPA [id]：缺省为当前用户"""
+        sid = self.student_id("GPA", args[0]) if args else self.rt.user_id
+        return self._remember(("GPA", sid), lambda: self.rt.db.get_gpa(sid))
+
+    def gpa_all(self, args: list[Any]) -> float:
+        """GPA_ALL [id ...]：一次查询算出指定（缺省为全部）学生的 GPA，返回平均值"""
+        ids = [self.student_id("GPA_ALL", a) for a in args] if args else None
+
+        def fetch() -> float:
+            gpas = self.rt.db.calc_gpa_bulk(ids)
+            return sum(gpas.values()) / len(gpas) if gpas else 0.0
+        return self._remember(("GPA_ALL", tuple(ids or ())), fetch)
 
     # ---------------- 新增：开课 ----------------
     def open_course(self, args: list[Any]) -> bool:
@@ -96,92 +191,305 @@ class Builtin:
         if not isinstance(name, str) or not isinstance(credit, (int, float)):
             raise ValueError("参数类型错误")
         if self.rt.is_student:
-            print("[ERROR] 学生不允许开课")
+            self.rt.out.say("[ERROR] 学生不允许开课")
             return False
         try:
             self.rt.db.create_course(name, self.rt.user_id, float(credit))
-            print(f"[OPEN_COURSE] 开课成功：{name}（{credit}学分）")
+            if self._memo:
+                self._memo.clear()
+            self.rt.out.say(f"[OPEN_COURSE] 开课成功：{name}（{credit}学分）")
             return True
         except Exception as e:
-            print(f"[OPEN_COURSE] 数据库错误：{e}")
+            self.rt.out.say(f"[OPEN_COURSE] 数据库错误：{e}")
             return False
-    @property
-    def registry(self) -> dict[str, Callable]:
-        return {
-            "EQUAL": self.equal,
-            "GREATER": self.greater,
-            "GPA": self.gpa,
-            "OPEN_COURSE": self.open_course,
-        }
-    
+    # 会访问数据库的函数；程序里没有它们就不必为一次运行占用连接
+    DB_FUNCS = frozenset(("GPA", "GPA_ALL", "OPEN_COURSE"))
+
+    # 函数名 → 未绑定方法，编译期预解析用：handler(builtin, args)
+    HANDLERS: Dict[str, Callable] = {
+        "EQUAL": equal,
+        "GREATER": greater,
+        "GPA": gpa,
+        "GPA_ALL": gpa_all,
+        "OPEN_COURSE": open_course,
+    }
+
+
+# ---------- 预编译表达式节点：ev(env)，env 需提供 vars / builtin ----------
+class Const:
+    __slots__ = ('value',)
+    def __init__(self, value: Val):
+        self.value = value
+
+    def ev(self, env: "ExprEval") -> Any:
+        return self.value
+
+    def __repr__(self) -> str:
+        return repr(self.value)
+
+
+class Var:
+    __slots__ = ('name',)
+    def __init__(self, name: str):
+        self.name = name
+
+    def ev(self, env: "ExprEval") -> Any:
+        val = env.vars.get(self.name)
+        if val is None:
+            raise ValueError(f"未定义变量: ${self.name}")
+        return val
+
+    def __repr__(self) -> str:
+        return f"${self.name}"
+
+
+class Slot(Var):
+    """编译期已解析到程序内槽位 k 的变量；执行时经 env.frame 映射到变量表槽位"""
+    __slots__ = ('k',)
+    def __init__(self, name: str, k: int):
+        self.name = name
+        self.k = k
+
+    def ev(self, env: "ExprEval") -> Any:
+        val = env.vars._vals[env.frame[self.k]]
+        if val is None:
+            raise ValueError(f"未定义变量: ${self.name}")
+        return val
+
+
+class Call:
+    __slots__ = ('fname', 'handler', 'args')
+    def __init__(self, fname: str, handler: Callable, args: list):
+        self.fname = fname
+        self.handler = handler
+        self.args = args
+
+    def ev(self, env: "ExprEval") -> Any:
+        return self.handler(env.builtin, [a.ev(env) for a in self.args])
+
+    def __repr__(self) -> str:
+        return f"{self.fname}({', '.join(map(repr, self.args))})"
+
+
+def _num_cmp(op: str, fn: Callable[[Any, Any], bool]) -> Callable[[Any, Any], bool]:
+    def cmp(a: Any, b: Any) -> bool:
+        if not isinstance(a, (int, float)) or not isinstance(b, (int, float)):
+            raise ValueError(f"{op} 只支持 NUM 类型")
+        return fn(a, b)
+    return cmp
+
+
+# 中缀比较：== / != 同 EQUAL，大小比较同 GREATER（仅 NUM）
+CMP_OPS: Dict[str, Callable[[Any, Any], bool]] = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    ">": _num_cmp(">", lambda a, b: a > b),
+    "<": _num_cmp("<", lambda a, b: a < b),
+    ">=": _num_cmp(">=", lambda a, b: a >= b),
+    "<=": _num_cmp("<=", lambda a, b: a <= b),
+}
+
+
+class Cmp:
+    __slots__ = ('op', 'fn', 'left', 'right')
+    def __init__(self, op: str, left, right):
+        self.op = op
+        self.fn = CMP_OPS[op]
+        self.left = left
+        self.right = right
+
+    def ev(self, env: "ExprEval") -> Any:
+        return self.fn(self.left.ev(env), self.right.ev(env))
+
+    def __reduce__(self):
+        # fn 是闭包 / lambda，按运算符重建，编译好的程序才能 pickle 给子进程
+        return (Cmp, (self.op, self.left, self.right))
+
+    def __repr__(self) -> str:
+        return f"({self.left!r} {self.op} {self.right!r})"
+
+
+class Fail:
+    """编译期已知的错误，推迟到执行时抛出，与逐行解释的报错时机一致"""
+    __slots__ = ('msg',)
+    def __init__(self, msg: str):
+        self.msg = msg
+
+    def ev(self, env: "ExprEval") -> Any:
+        raise ValueError(self.msg)
+
+    def __repr__(self) -> str:
+        return f"<fail: {self.msg}>"
+
+
+def parse_token(tok: str):
+    """单个字面量 / 变量 token → 表达式节点"""
+    tok = tok.strip()
+    if tok.startswith('$'):
+        return Var(tok[1:])
+    if tok in ("True", "False"):
+        return Const(tok == "True")
+    if len(tok) >= 2 and tok.startswith('"') and tok.endswith('"'):
+        return Const(tok[1:-1])
+    try:
+        return Const(float(tok))
+    except ValueError:
+        return Fail(f"无法解析的字面量: {tok}")
+
+
+# 引号字符串（未闭合的整体作为一个坏字面量）| 比较符 | 括号逗号 | 名字（紧跟 "(" 表示调用）| 其他单字符
+_EXPR_TOKEN_RE = re.compile(r'"[^"]*"?|>=|<=|==|!=|[<>(),]|[^\s(),<>=!"]+\(?|\S')
+
+
+class _ExprParser:
+    """
+    expr    := operand [CMP operand]
+    operand := "(" expr ")" | NAME "(" [expr {[","] expr}] ")" | NAME arg* | 字面量 | $变量
+    顶层的前缀调用 NAME arg* 吃掉后面的参数直到比较符 / 右括号 / 结尾；
+    作为参数出现的裸函数名视为无参调用，如 GREATER GPA 3.5。
+    """
+    def __init__(self, toks: List[str]):
+        self.toks = toks
+        self.pos = 0
+
+    def peek(self) -> Optional[str]:
+        return self.toks[self.pos] if self.pos < len(self.toks) else None
+
+    def take(self) -> str:
+        tok = self.peek()
+        if tok is None:
+            raise ValueError("表达式不完整")
+        self.pos += 1
+        return tok
+
+    def parse(self):
+        node = self.expr()
+        if self.peek() is not None:
+            first = self.toks[0]
+            if not isinstance(node, (Call, Cmp)) and first.upper() not in Builtin.HANDLERS:
+                raise ValueError(f"未知函数: {first.upper()}")
+            raise ValueError(f"多余的内容: {' '.join(self.toks[self.pos:])}")
+        return node
+
+    def expr(self):
+        left = self.operand(prefix=True)
+        if self.peek() in CMP_OPS:
+            op = self.take()
+            return Cmp(op, left, self.operand(prefix=True))
+        return left
+
+    def operand(self, prefix: bool):
+        tok = self.take()
+        if tok == "(":
+            node = self.expr()
+            self.expect(")")
+            return node
+        if tok.endswith("(") and len(tok) > 1:
+            fname = tok[:-1].upper()
+            handler = self.handler(fname)
+            args = []
+            while self.peek() != ")":
+                args.append(self.expr())
+                if self.peek() == ",":
+                    self.take()
+            self.expect(")")
+            return Call(fname, handler, args)
+        handler = Builtin.HANDLERS.get(tok.upper())
+        if handler is None:
+            if tok in CMP_OPS or tok in (")", ","):
+                raise ValueError(f"意外的符号: {tok}")
+            return parse_token(tok)
+        args = []
+        if prefix:
+            while self.peek() is not None and self.peek() not in CMP_OPS and self.peek() not in (")", ","):
+                args.append(self.operand(prefix=False))
+        return Call(tok.upper(), handler, args)
+
+    def expect(self, tok: str) -> None:
+        if self.take() != tok:
+            raise ValueError(f"缺少 '{tok}'")
+
+    @staticmethod
+    def handler(fname: str) -> Callable:
+        handler = Builtin.HANDLERS.get(fname)
+        if handler is None:
+            raise ValueError(f"未知函数: {fname}")
+        return handler
+
+
+def parse_expr(line: str):
+    """整行表达式 → 节点树；语法错误编译成 Fail，执行时再报"""
+    toks = _EXPR_TOKEN_RE.findall(line)
+    if not toks:
+        return Fail("空表达式")
+    try:
+        return _ExprParser(toks).parse()
+    except ValueError as e:
+        return Fail(str(e))
+
+
+# 节点与解释器实例无关，同一表达式文本只解析一次
+compile_expr = lru_cache(maxsize=4096)(parse_expr)
+
+
 class ExprEval:
     def __init__(self, vars: VarStore, rt: Runtime):
         self.vars = vars
         self.rt   = rt
         self.builtin = Builtin(rt)
+        self.frame: List[int] = []       # 当前编译程序的槽位映射，由 compiler.execute 设置
     # ---------- 单 token ----------
     def eval_token(self, tok: str) -> Any:
-        tok = tok.strip()
-        if tok.startswith('$'):
-            val = self.vars.get(tok[1:])
-            if val is None:
-                raise ValueError(f"未定义变量: {tok}")
-            return val
-        if tok in ("True", "False"):
-            return tok == "True"
-        if tok.startswith('"') and tok.endswith('"'):
-            return tok[1:-1]
-        try:
-            return float(tok)
-        except ValueError:
-            raise ValueError(f"无法解析的字面量: {tok}")
+        return parse_token(tok).ev(self)
 
     # ---------- 整行入口 ----------
     def eval_expr(self, line: str) -> Any:
-        tokens = line.strip().split()
-        if not tokens:
-            raise ValueError("空表达式")
-
-        # 1. 单 token → 直接算
-        if len(tokens) == 1:
-            return self.eval_token(tokens[0])
-
-        # 2. 函数调用 → 首 token 是函数名
-        fname = tokens[0].upper()
-        if fname in self.builtin.registry:
-            args = [self.eval_token(t) for t in tokens[1:]]
-            return self.builtin.registry[fname](args)
-        raise ValueError(f"未知函数: {fname}")
+        return compile_expr(line.strip()).ev(self)
 
 
 class KeywordHub:
-    def __init__(self):
+    def __init__(self, out: Optional[OutputSink] = None):
         self._map: Dict[str, Callable[[str], None]] = {}
+        self.out = out if out is not None else ConsoleOutput()   # 警告 / 错误信息输出
 
     def register(self, kw: str, handler: Callable[[str], None]):
         if kw in self._map:
-            print(f"[WARN] 关键字 '{kw}' 被覆盖")
+            self.out.say(f"[WARN] 关键字 '{kw}' 被覆盖")
         self._map[kw] = handler
 
     def dispatch(self, first: str, tail: str):
         if first not in self._map:
-            print(f"[ERROR] 未知关键字: {first}")
+            self.out.say(f"[ERROR] 未知关键字: {first}")
             return
         self._map[first](tail)
 
 
 class MiniInterp:
-    def __init__(self, vars: VarStore, is_student: bool, user_id: int, db: SchoolDB):
+    def __init__(self, vars: VarStore, is_student: bool, user_id: int, db: SchoolDB,
+                 out: Optional[OutputSink] = None, inp: Optional[InputSource] = None):
         self.vars = vars
         self.rt   = Runtime(user_id, is_student, db)
+        self.kw   = KeywordHub()
+
+        # 1. I/O 通道：缺省为控制台；服务端传入缓冲输出 / 队列输入即可多实例并发
+        self.inp = inp if inp is not None else ConsoleInput()
+        self.out = out if out is not None else ConsoleOutput()
 
         # 2. 组装表达式求值器（Builtin 已在内部实例化）
         self.expr = ExprEval(vars, self.rt)
 
         # 3. 关键字注册
-        self.kw = KeywordHub()
         self._register_builtins()
 
+    @property
+    def out(self) -> OutputSink:
+        return self._out
+
+    @out.setter
+    def out(self, sink: OutputSink):
+        # 解释器、变量表、内置函数、关键字表共用同一输出通道
+        self._out = self.vars.out = self.rt.out = self.kw.out = sink
+
     def _register_builtins(self):
         self.kw.register("REG",   self._kw_reg)
         self.kw.register("SPEAK", self._kw_speak)
@@ -205,43 +513,46 @@ class MiniInterp:
                 result = self.expr.eval_expr(line)   # 内部调 registry
                 self.vars.update("result", result)           # 落盘默认变量
             except Exception as e:
-                print(f"[ERROR] 函数执行失败: {e}")
+                self.out.say(f"[ERROR] 函数执行失败: {e}")
             return
 
-        print(f"[ERROR] 未知指令: {first}")
+        self.out.say(f"[ERROR] 未知指令: {first}")
     
        # ---------- 关键字处理 ----------
     def _kw_reg(self, tail: str):
         # tail = "STRING A hello"  或  "STRING A $str1"  或  "BOOL flag EQUAL $x 30"
-        m = re.fullmatch(r'(STRING|NUM|BOOL)\s+([A-Za-z_]\w*)(?:\s+(.+))?', tail)
+        m = _REG_RE.fullmatch(tail)
         if not m:
-            print(f"[ERROR] REG 语法错误: {tail}")
+            self.out.say(f"[ERROR] REG 语法错误: {tail}")
             return
         typ, name, rhs = m.groups()
         if not rhs:                       # 缺右值
-            print(f"[ERROR] REG {typ} 缺少表达式")
+            self.out.say(f"[ERROR] REG {typ} 缺少表达式")
             return
 
         try:
             val = self.expr.eval_expr(rhs)
         except Exception as e:
-            print(f"[ERROR] 表达式求值失败: {e}")
+            self.out.say(f"[ERROR] 表达式求值失败: {e}")
             return
+        self._store_reg(typ, name, val)
 
-        # 类型检查
+    def _store_reg(self, typ: str, name: str, val: Any, slot: int = -1):
+        """REG 的后半段：类型检查 + 落盘（编译执行器复用，传入已绑定的槽位）"""
         if typ == "STRING" and not isinstance(val, str):
-            print(f"[ERROR] 期望 STRING，得到 {type(val).__name__}")
+            self.out.say(f"[ERROR] 期望 STRING，得到 {type(val).__name__}")
             return
         if typ == "NUM" and not isinstance(val, (int, float)):
-            print(f"[ERROR] 期望 NUM，得到 {type(val).__name__}")
+            self.out.say(f"[ERROR] 期望 NUM，得到 {type(val).__name__}")
             return
         if typ == "BOOL" and not isinstance(val, bool):
-            print(f"[ERROR] 期望 BOOL，得到 {type(val).__name__}")
+            self.out.say(f"[ERROR] 期望 BOOL，得到 {type(val).__name__}")
             return
 
         # 落盘
-        if not self.vars.reg(name, val):   # 内部已做重名校验
-            print(f"[ERROR] 变量 '{name}' 注册失败")
+        ok = self.vars.reg_slot(slot, val) if slot >= 0 else self.vars.reg(name, val)
+        if not ok:                         # 内部已做重名校验
+            self.out.say(f"[ERROR] 变量 '{name}' 注册失败")
 
     
 
@@ -249,18 +560,26 @@ class MiniInterp:
         # tail = "name"
         name = tail.strip()
         if not name:
-            print("[ERROR] INPUT 缺少变量名")
+            self.out.say("[ERROR] INPUT 缺少变量名")
             return
-        if name not in self.vars._map:
-            print(f"[ERROR] 变量 '{name}' 未注册")
+        self._read_input(name)
+
+    def _read_input(self, name: str):
+        """INPUT 的后半段：校验目标变量并读入一行"""
+        if name not in self.vars:
+            self.out.say(f"[ERROR] 变量 '{name}' 未注册")
             return
-        if not isinstance(self.vars._map[name], str):
-            print(f"[ERROR] 变量 '{name}' 必须是 STRING 类型")
+        if not isinstance(self.vars.get(name), str):
+            self.out.say(f"[ERROR] 变量 '{name}' 必须是 STRING 类型")
             return
 
         # 读一行（保留空格，去掉末尾换行）
-        value = input().rstrip('\n')
-        self.vars._map[name] = value
+        try:
+            value = self.inp.read_line(name).rstrip('\n')
+        except TimeoutError as e:
+            self.out.say(f"[ERROR] {e}")
+            return
+        self.vars.update(name, value)
 
     # def _kw_speak(self, tail: str):
         # TODO: 后面再填
@@ -269,32 +588,42 @@ class MiniInterp:
         try:
             tokens = tokenize(tail)
         except ValueError as e:
-            print(f"[SPEAK] {e}")
+            self.out.say(f"[SPEAK] {e}")
             return
+        self._speak_tokens(tokens)
 
+    def _speak_tokens(self, tokens: List[str]):
+        """SPEAK 的后半段：按 token 拼接输出（编译执行器复用）"""
         parts = []
         for tok in tokens:
             if tok.startswith('$'):          # 变量
                 val = self.vars.get(tok[1:])
                 if val is None:
-                    print(f"[SPEAK] 未定义变量: {tok}")
+                    self.out.say(f"[SPEAK] 未定义变量: {tok}")
                     return
-                # 类型格式化
-                if isinstance(val, str):
-                    parts.append(val)
-                elif isinstance(val, (int, float)):
-                    parts.append(f"{val:.2f}")
-                elif isinstance(val, bool):
-                    parts.append("true" if val else "false")
-                else:
-                    print(f"[SPEAK] 未知类型变量: {tok}")
+                text = speak_format(val)
+                if text is None:
+                    self.out.say(f"[SPEAK] 未知类型变量: {tok}")
                     return
+                parts.append(text)
             else:                            # 字符串字面量
                 parts.append(tok)
-        print(''.join(parts), end='')
+        self.out.write(''.join(parts))
+
+
 
+def speak_format(val: Any) -> Optional[str]:
+    """SPEAK 中变量的显示格式；未知类型返回 None"""
+    if isinstance(val, str):
+        return val
+    if isinstance(val, (int, float)):
+        return f"{val:.2f}"
+    if isinstance(val, bool):
+        return "true" if val else "false"
+    return None
 
 
+_REG_RE = re.compile(r'(STRING|NUM|BOOL)\s+([A-Za-z_]\w*)(?:\s+(.+))?')
 _TOKEN_RE = re.compile(r'"(.*?)"|(\$\w+)')
 
 
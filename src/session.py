@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+from src.db import SchoolDB
+from src.parser import VarStore, MiniInterp
+from src.channels import BufferOutput, PendingInput, InputPending
+from src.compiler import Program, ProgramCache, execute, default_cache
+
+
+class ChatSession:
+    """一个聊天会话：常驻的解释器（含 VarStore / Builtin / KeywordHub）及其 I/O 通道"""
+    __slots__ = ('identity', 'interp', 'out', 'inp', 'last_used', 'lock', 'resume')
+    def __init__(self, identity: Tuple[int, bool], interp: MiniInterp,
+                 out: BufferOutput, inp: PendingInput):
+        self.identity = identity          # (user_id, is_student)
+        self.interp = interp
+        self.out = out
+        self.inp = inp
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock()      # 同一会话的消息串行执行
+        self.resume: Optional[Tuple[Program, int]] = None   # 停在 INPUT 上的程序及恢复位置
+
+
+class SessionPool:
+    """
+    会话 id → ChatSession 的有界 LRU 缓存。
+    超过 max_sessions 淘汰最久未用的；空闲超过 idle_ttl 秒的在访问时顺带清理。
+    每个会话有独立的缓冲输出与输入，多个会话可在不同线程中同时执行。
+    脚本停在 INPUT 上时只记下恢复位置，线程与数据库连接立即归还；下一条消息作为输入值接着执行。
+    异步入口 chat 使用自己的线程池（workers 个线程），不占用数据库调用的线程池。
+    """
+    def __init__(self, db: SchoolDB, max_sessions: int = 10000, idle_ttl: float = 1800.0,
+                 cache: ProgramCache = default_cache, workers: int = 4):
+        self.db = db
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.cache = cache
+        self._map: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="chat")
+        self.created = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._map)
+
+    def _evict_idle(self, now: float):
+        # OrderedDict 头部是最久未用的，遇到未过期的即可停止
+        while self._map:
+            key, sess = next(iter(self._map.items()))
+            if now - sess.last_used <= self.idle_ttl:
+                break
+            del self._map[key]
+            self.evicted += 1
+
+    def get(self, key: str, user_id: int, is_student: bool) -> ChatSession:
+        """取会话，不存在就新建；键已属于其他身份时抛 PermissionError（不顶替别人的会话）"""
+        identity = (user_id, is_student)
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            sess = self._map.get(key)
+            if sess is not None:
+                if sess.identity != identity:
+                    raise PermissionError("会话属于其他用户")
+                self._map.move_to_end(key)
+                sess.last_used = now
+                return sess
+            out, inp = BufferOutput(), PendingInput()
+            interp = MiniInterp(VarStore(), is_student=is_student, user_id=user_id, db=self.db,
+                                out=out, inp=inp)
+            sess = self._map[key] = ChatSession(identity, interp, out, inp)
+            self._map.move_to_end(key)
+            self.created += 1
+            while len(self._map) > self.max_sessions:
+                self._map.popitem(last=False)
+                self.evicted += 1
+            return sess
+
+    def drop(self, key: str) -> None:
+        """丢弃会话；停在 INPUT 上的脚本随之作废（挂起时不占线程，无需唤醒）"""
+        with self._lock:
+            self._map.pop(key, None)
+
+    def execute(self, sess: ChatSession, text: str) -> Tuple[str, bool]:
+        """
+        在会话中执行一条（可多行）DSL 消息，返回 (输出, 是否停在 INPUT 上)。
+        若上一条消息停在 INPUT 上，本条消息就作为输入值喂进去，从挂起处继续执行。
+        输出在会话锁内取走，同一会话并发的两条消息不会拿到对方的输出。
+        """
+        with sess.lock:
+            if sess.resume is not None:
+                (program, pc), sess.resume = sess.resume, None
+                sess.inp.feed(text)
+            else:
+                program, pc = self.cache.load_source(text, "<chat>"), 0
+            try:
+                execute(program, sess.interp, start=pc)
+            except InputPending as e:
+                sess.resume = (program, e.pc)
+                return sess.out.drain(), True
+            return sess.out.drain(), False
+
+    def run(self, key: str, user_id: int, is_student: bool, text: str) -> str:
+        """同步执行一条消息并取走输出"""
+        return self.execute(self.get(key, user_id, is_student), text)[0]
+
+    async def chat(self, key: str, user_id: int, is_student: bool, text: str) -> Tuple[str, bool]:
+        """异步处理一条聊天消息，返回 (输出, 是否在等待 INPUT)；键属于其他身份时抛 PermissionError"""
+        sess = self.get(key, user_id, is_student)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.execute, sess, text)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,110 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Mapping, Tuple, Union
+
+try:                                    # 可选依赖：pip install brotli
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class StaticAsset:
+    """一个前端文件的内存副本：原文 + 预压缩版本 + 各自的 ETag"""
+    __slots__ = ('path', 'mtime', 'media_type', 'variants')
+    def __init__(self, path: Path, mtime: float, media_type: str, variants: Dict[str, Tuple[bytes, str]]):
+        self.path = path
+        self.mtime = mtime
+        self.media_type = media_type
+        self.variants = variants          # 编码（"identity" / "gzip" / "br"）→ (内容, ETag)
+
+
+def _accepts(accept_encoding: str) -> Dict[str, float]:
+    """解析 Accept-Encoding，返回 {编码: q}"""
+    prefs = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            prefs[name.strip().lower()] = q
+    return prefs
+
+
+class StaticCache:
+    """
+    前端静态文件缓存：启动时读入内存并预压缩（gzip，装了 brotli 再加 br），之后请求不碰磁盘。
+    dev=True 时每次取用先比较 mtime，文件改了就重新加载，改前端不用重启服务。
+    respond 按 Accept-Encoding 选版本，带 ETag；If-None-Match 命中返回 304 空响应。
+    与 Web 框架无关，返回 (状态码, 内容, 响应头)。
+    """
+    MIN_COMPRESS = 256                  # 太小的文件压缩不划算
+
+    def __init__(self, root: Union[str, Path], names=("index.html",), dev: bool = False):
+        self.root = Path(root)
+        self.dev = dev
+        self._assets: Dict[str, StaticAsset] = {}
+        self._lock = threading.Lock()
+        for name in names:
+            self.get(name)
+
+    def _load(self, name: str) -> StaticAsset:
+        path = self.root / name
+        mtime = os.stat(path).st_mtime
+        body = path.read_bytes()
+        media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if media_type.startswith("text/") or media_type in ("application/javascript", "application/json"):
+            media_type += "; charset=utf-8"
+        digest = hashlib.sha1(body).hexdigest()[:16]
+        variants = {"identity": (body, f'"{digest}"')}
+        if len(body) >= self.MIN_COMPRESS:
+            gz = gzip.compress(body, compresslevel=9, mtime=0)
+            if len(gz) < len(body):
+                variants["gzip"] = (gz, f'"{digest}-gz"')
+            if brotli is not None:
+                br = brotli.compress(body, quality=11)
+                if len(br) < len(body):
+                    variants["br"] = (br, f'"{digest}-br"')
+        return StaticAsset(path, mtime, media_type, variants)
+
+    def get(self, name: str) -> StaticAsset:
+        """取缓存的文件；dev 模式下文件被改过就重新加载"""
+        asset = self._assets.get(name)
+        if asset is not None and not (self.dev and os.stat(asset.path).st_mtime != asset.mtime):
+            return asset
+        with self._lock:
+            asset = self._assets[name] = self._load(name)
+        return asset
+
+    def respond(self, name: str, headers: Mapping[str, str]) -> Tuple[int, bytes, Dict[str, str]]:
+        """headers 为请求头（键小写，如 Starlette 的 request.headers）"""
+        asset = self.get(name)
+        out = {"Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+
+        prefs = _accepts(headers.get("accept-encoding", ""))
+        encoding = "identity"
+        for enc in ("br", "gzip"):
+            if enc in asset.variants and prefs.get(enc, prefs.get("*", 0.0)) > 0:
+                encoding = enc
+                break
+        body, etag = asset.variants[encoding]
+        out["ETag"] = etag
+
+        inm = headers.get("if-none-match")
+        if inm:
+            tags = {t.strip().removeprefix("W/") for t in inm.split(",")}
+            if "*" in tags or etag in tags:
+                return 304, b"", out
+
+        out["Content-Type"] = asset.media_type
+        if encoding != "identity":
+            out["Content-Encoding"] = encoding
+        return 200, body, out
@@ -0,0 +1,68 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+from pathlib import Path
+from typing import Iterable, Union
+from src.AST import Tree, _Builder
+from src.compiler import compile_tree, execute
+from src.parser import MiniInterp
+
+
+def run_stream(lines: Iterable[str], interp: MiniInterp, source: str = "<stream>",
+               batch: int = 64) -> int:
+    """
+    边读边执行：lines 可以是文件对象、socket.makefile() 或任意生成器。
+    顶层（不在 IF 内）的语句攒够 batch 行就编译执行一段；IF 块要等到 ENDIF 才能确定跳转，
+    只缓存当前未闭合的块。内存只与最大的 IF 块有关，与文件大小无关。
+    交互式来源（一行一行地等）用 batch=1，每行到达即执行。
+    结构错误（如多余的 ENDIF）在读到时抛出，此前的段已经执行。返回执行的指令数。
+    """
+    steps = 0
+    tree = Tree(source)
+    builder = _Builder(tree)
+    for raw in lines:
+        if builder.feed(raw) == -1 or builder.depth > 0 or tree.size < batch:
+            continue
+        steps += execute(compile_tree(tree), interp)
+        tree, builder = _next_segment(source, builder)
+    builder.finish()
+    if tree.size:
+        steps += execute(compile_tree(tree), interp)
+    return steps
+
+
+def _next_segment(source: str, prev: _Builder):
+    """新开一段，行号接着上一段往下数"""
+    tree = Tree(source)
+    builder = _Builder(tree)
+    builder.line = prev.line
+    return tree, builder
+
+
+def run_file_stream(path: Union[str, Path], interp: MiniInterp, batch: int = 64) -> int:
+    with open(path, "r", encoding="utf-8") as f:
+        return run_stream(f, interp, str(path), batch)
+
+
+def main(argv=None) -> None:
+    import argparse
+    from src.db import SchoolDB
+    from src.parser import VarStore
+    ap = argparse.ArgumentParser(description="流式执行 DSL 脚本（文件或标准输入）")
+    ap.add_argument("file", nargs="?", default="-", help="脚本路径，- 表示标准输入")
+    ap.add_argument("--db", default="school.db")
+    ap.add_argument("--user", type=int, default=0, help="执行身份的用户 id")
+    ap.add_argument("--teacher", action="store_true", help="以教师身份执行（缺省为学生）")
+    ap.add_argument("--batch", type=int, default=64, help="顶层语句每段行数；交互输入建议 1")
+    args = ap.parse_args(argv)
+
+    db = SchoolDB(args.db)
+    db.ensure_tables()
+    interp = MiniInterp(VarStore(), is_student=not args.teacher, user_id=args.user, db=db)
+    if args.file == "-":
+        run_stream(sys.stdin, interp, "<stdin>", args.batch)
+    else:
+        run_file_stream(args.file, interp, args.batch)
+
+
+if __name__ == "__main__":
+    main()
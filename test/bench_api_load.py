@@ -0,0 +1,95 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+# 本地压测：启动 uvicorn 跑 main:app（临时数据库），用 httpx 按不同并发度打 /api/login
+# 依赖：pip install uvicorn httpx
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import tempfile
+import time
+
+import httpx
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+LEVELS = (1, 8, 32, 128)
+N_USERS = 50
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, db_path: pathlib.Path) -> subprocess.Popen:
+    env = dict(os.environ, SCHOOL_DB=str(db_path))
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/", timeout=0.2)
+            return proc
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("uvicorn 启动失败")
+
+
+def pct(sorted_vals: list, p: float) -> float:
+    return sorted_vals[min(len(sorted_vals) - 1, int(len(sorted_vals) * p))]
+
+
+async def run_level(base: str, concurrency: int, total: int):
+    latencies, errors = [], 0
+    sem = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=30) as client:
+        async def one(i: int):
+            nonlocal errors
+            async with sem:
+                t0 = time.perf_counter()
+                r = await client.post("/api/login", json={
+                    "name": f"U{i % N_USERS}", "pass": "pwd", "role": "student"})
+                latencies.append(time.perf_counter() - t0)
+                if r.status_code != 200 or not r.json().get("success"):
+                    errors += 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        wall = time.perf_counter() - t0
+    latencies.sort()
+    print(f"并发 {concurrency:>4} | {total / wall:8.0f} req/s | "
+          f"p50 {pct(latencies, 0.50) * 1000:7.2f} ms | p99 {pct(latencies, 0.99) * 1000:7.2f} ms | "
+          f"失败 {errors}")
+
+
+async def main_async(base: str, total: int):
+    async with httpx.AsyncClient(base_url=base) as client:
+        for i in range(N_USERS):
+            await client.post("/api/register", json={
+                "name": f"U{i}", "pass": "pwd", "email": f"u{i}@x", "role": "student"})
+    for level in LEVELS:
+        await run_level(base, level, total)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=2000, help="每个并发度的请求数")
+    args = ap.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        port = free_port()
+        proc = start_server(port, pathlib.Path(tmp) / "load.db")
+        try:
+            asyncio.run(main_async(f"http://127.0.0.1:{port}", args.requests))
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import tempfile
+import time
+import tracemalloc
+from src.AST import Tree
+
+SIZES = (1_000, 10_000, 100_000, 200_000)   # 目标行数
+
+
+def gen_script(n_lines: int) -> str:
+    """生成约 n_lines 行的脚本：顺序语句与两层 IF/ELIF/ELSE 交替"""
+    out = []
+    i = 0
+    while len(out) < n_lines:
+        out.append(f'SPEAK "line {i}"')
+        out.append(f"IF GREATER $score {i % 100}")
+        out.append('    SPEAK "pass"')
+        out.append(f"    IF EQUAL $flag True")
+        out.append(f'        SPEAK "flag {i % 7}"')
+        out.append("    ENDIF")
+        out.append(f"ELIF EQUAL $score {i % 50}")
+        out.append('    SPEAK "equal"')
+        out.append("ELSE")
+        out.append('    SPEAK "fail"')
+        out.append("ENDIF")
+        i += 1
+    return "\n".join(out) + "\n"
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in SIZES:
+            path = pathlib.Path(tmp) / f"gen_{n}.dsl"
+            path.write_text(gen_script(n), encoding="utf-8")
+
+            tracemalloc.start()
+            t0 = time.perf_counter()
+            tree = Tree(str(path))
+            tree.load_from_file()
+            cost = time.perf_counter() - t0
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            print(f"{tree.size:>8} 节点 | 加载 {cost * 1000:9.1f} ms | "
+                  f"峰值内存 {peak / 2**20:7.2f} MiB | 文本表 {len(tree.texts)} 条")
+
+
+if __name__ == "__main__":
+    main()
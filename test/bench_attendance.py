@@ -0,0 +1,89 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.db import SchoolDB
+from src.attendance import AttendanceIngest
+
+N_STUDENTS = 2000
+N_COURSES = 5
+N_CHECKINS = 20000
+N_THREADS = 8
+STATUSES = ("normal", "normal", "normal", "late_or_early", "absent")
+
+
+def seed(db: SchoolDB) -> None:
+    db.ensure_tables()
+    db.bulk_register_teachers([("Bob", "pwd", "bob@x")])
+    db.bulk_register_students([(f"S{i}", "pwd", f"s{i}@x") for i in range(N_STUDENTS)])
+    db.bulk_create_courses([(f"C{c}", "Bob", 2.0) for c in range(N_COURSES)])
+    db.bulk_enroll([(f"S{i}", f"C{c}") for i in range(N_STUDENTS) for c in range(N_COURSES)])
+
+
+def gen_checkins() -> list:
+    rng = random.Random(5)
+    rows = [(f"S{rng.randrange(N_STUDENTS)}", 1 + rng.randrange(N_COURSES), rng.choice(STATUSES))
+            for _ in range(N_CHECKINS)]
+    rows[::1000] = [("nobody", 1, "normal")] * len(rows[::1000])     # 混入少量无效打卡
+    return rows
+
+
+def count_rows(db: SchoolDB) -> int:
+    with db as cur:
+        cur.execute(f"SELECT COUNT(*) FROM {db.ATTEND_TABLE}")
+        return cur.fetchone()[0]
+
+
+def one_by_one(db: SchoolDB, rows: list) -> int:
+    def one(row):
+        try:
+            return db.record_attendance(*row)
+        except ValueError:
+            return False
+    with ThreadPoolExecutor(N_THREADS) as ex:
+        return sum(ex.map(one, rows, chunksize=64))
+
+
+def write_behind(db: SchoolDB, rows: list) -> int:
+    with AttendanceIngest(db) as ingest:
+        def one(row):
+            return ingest.submit(*row)
+        with ThreadPoolExecutor(N_THREADS) as ex:
+            futures = list(ex.map(one, rows, chunksize=64))
+        ok = sum(1 for f in futures if f.exception() is None)
+        print(f"    组提交 {ingest.batches} 次，平均每批 {N_CHECKINS / ingest.batches:.0f} 条")
+    return ok
+
+
+def batch_api(db: SchoolDB, rows: list) -> int:
+    ingest = AttendanceIngest(db)
+    ok = 0
+    for k in range(0, len(rows), 1000):
+        ok += sum(1 for e in ingest.record_batch(rows[k:k + 1000]) if e is None)
+    return ok
+
+
+def main():
+    rows = gen_checkins()
+    with tempfile.TemporaryDirectory() as tmp:
+        expected = None
+        for label, fn in (("逐条 record_attendance", one_by_one),
+                          ("写后队列 submit", write_behind),
+                          ("同步批量 record_batch", batch_api)):
+            db = SchoolDB(pathlib.Path(tmp) / f"{label}.db", pool_size=N_THREADS)
+            seed(db)
+            t0 = time.perf_counter()
+            ok = fn(db, rows)
+            cost = time.perf_counter() - t0
+            assert ok == count_rows(db), "成功数与落盘行数不一致"
+            expected = ok if expected is None else expected
+            assert ok == expected, "各方式成功数不一致"
+            print(f"{label:<24} {N_CHECKINS / cost:9.0f} 次/s  (成功 {ok}，失败 {N_CHECKINS - ok})")
+            db.close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import os
+import tempfile
+from src.db import SchoolDB
+import src.batch as batch
+from src.batch import BatchJob, run_batch
+
+N_STUDENTS = 400
+N_SCRIPTS = 8
+JOBS_PER_STUDENT = 5
+
+
+def seed(db: SchoolDB) -> None:
+    db.ensure_tables()
+    db.bulk_register_teachers([("Bob", "pwd", "bob@x")])
+    db.bulk_register_students([(f"S{i}", "pwd", f"s{i}@x") for i in range(1, N_STUDENTS + 1)])
+    db.bulk_create_courses([("Math", "Bob", 4.0), ("PE", "Bob", 1.0)])
+    db.bulk_enroll([(f"S{i}", c) for i in range(1, N_STUDENTS + 1) for c in ("Math", "PE")])
+    db.bulk_set_scores([(c, "Bob", f"S{i}", 55 + (i * 13 + len(c)) % 45)
+                        for i in range(1, N_STUDENTS + 1) for c in ("Math", "PE")])
+
+
+def gen_script(k: int) -> str:
+    """个性化报告：自己的 GPA 与阈值比较，夹一段纯计算"""
+    lines = [f"REG NUM bar {2.0 + k * 0.2}", "REG NUM g GPA"]
+    for i in range(200):
+        lines.append(f"REG BOOL t{i} GREATER $g {i % 40 / 10}")
+    lines += ["IF $g > $bar", '    SPEAK "达标 " $g', "ELSE", '    SPEAK "未达标 " $g', "ENDIF"]
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = pathlib.Path(tmp)
+        db_path = tmp / "batch.db"
+        seed(SchoolDB(db_path))
+        scripts = []
+        for k in range(N_SCRIPTS):
+            path = tmp / f"report{k}.dsl"
+            path.write_text(gen_script(k), encoding="utf-8")
+            scripts.append(path)
+        jobs = [BatchJob(scripts[(sid + r) % N_SCRIPTS], sid)
+                for r in range(JOBS_PER_STUDENT) for sid in range(1, N_STUDENTS + 1)]
+
+        cores = os.cpu_count() or 1
+        levels = sorted({1, 2, 4, cores} & set(range(1, cores + 1)))
+        baseline, base_rate = None, 0.0
+        for workers in levels:
+            results, report = run_batch(jobs, db_path, workers)
+            outputs = [(r.output, r.error) for r in results]
+            if baseline is None:
+                baseline, base_rate = outputs, report.jobs_per_sec
+            assert outputs == baseline, f"{workers} 进程结果与串行不一致"
+            assert batch._worker_db is None, "串行执行不应留下模块级的 SchoolDB"
+            print(f"{report}  加速比 {report.jobs_per_sec / base_rate:.2f}x")
+        print(f"共 {len(jobs)} 个任务、{N_SCRIPTS} 个脚本，各进程结果与串行一致")
+
+
+if __name__ == "__main__":
+    main()
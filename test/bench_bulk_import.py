@@ -0,0 +1,62 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import tempfile
+import time
+from src.db import SchoolDB
+
+N_STUDENTS = 1000
+N_COURSES = 20
+PER_STUDENT = 4
+
+
+def seed_rows():
+    students = [(f"S{i}", "pwd", f"s{i}@x") for i in range(N_STUDENTS)]
+    courses = [(f"C{i}", "Bob", 1.0 + i % 4) for i in range(N_COURSES)]
+    picks = [(f"S{i}", f"C{(i + k * 3) % N_COURSES}")
+             for i in range(N_STUDENTS) for k in range(PER_STUDENT)]
+    scores = [(c, "Bob", s, 60 + n % 40) for n, (s, c) in enumerate(picks)]
+    return students, courses, picks, scores
+
+
+def seed_one_by_one(db: SchoolDB) -> int:
+    students, courses, picks, scores = seed_rows()
+    tid = db.register_teacher("Bob", "pwd", "bob@x")
+    ids = {name: db.register_student(name, pwd, email) for name, pwd, email in students}
+    for name, _, credit in courses:
+        db.create_course(name, tid, credit)
+    for s, c in picks:
+        db.enroll_by_name(ids[s], c)
+    for c, t, s, score in scores:
+        db.set_score(c, t, s, score)
+    return len(students) + len(courses) + len(picks) + len(scores)
+
+
+def seed_bulk(db: SchoolDB) -> int:
+    students, courses, picks, scores = seed_rows()
+    db.bulk_register_teachers([("Bob", "pwd", "bob@x")])
+    reports = [
+        db.bulk_register_students(students),
+        db.bulk_create_courses(courses),
+        db.bulk_enroll(picks),
+        db.bulk_set_scores(scores),
+    ]
+    for rep in reports:
+        print(f"    {rep}")
+    return sum(rep.rows for rep in reports)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, seeder in (("逐条接口", seed_one_by_one), ("批量导入", seed_bulk)):
+            db = SchoolDB(pathlib.Path(tmp) / f"{label}.db")
+            db.ensure_tables()
+            t0 = time.perf_counter()
+            rows = seeder(db)
+            cost = time.perf_counter() - t0
+            print(f"{label}: {rows} 行，{cost:.2f} s，{rows / cost:.0f} 行/s，"
+                  f"GPA 一致性 {'OK' if not db.check_gpa() else '不一致'}")
+
+
+if __name__ == "__main__":
+    main()
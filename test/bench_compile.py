@@ -0,0 +1,71 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import io
+import tempfile
+import time
+from contextlib import redirect_stdout
+from src.db import SchoolDB
+from src.parser import VarStore, MiniInterp
+from src.compiler import ProgramCache, execute
+
+N_USERS = 2000     # 同一脚本为多少个用户各执行一次
+
+SCRIPT = """\
+# 每个用户一份的欢迎脚本
+REG NUM score 85
+REG NUM line 80
+REG BOOL ok GREATER $score $line
+REG BOOL same EQUAL $score 85
+REG STRING who "student"
+SPEAK "结果=" $ok " 身份=" $who
+EQUAL $ok True
+REG BOOL again EQUAL $result True
+SPEAK " again=" $again
+"""
+
+
+def run_lines(lines, db) -> str:
+    buf = io.StringIO()
+    with redirect_stdout(buf):
+        for uid in range(N_USERS):
+            interp = MiniInterp(VarStore(), is_student=True, user_id=uid, db=db)
+            for line in lines:
+                interp.exec_line(line)
+    return buf.getvalue()
+
+
+def run_compiled(path, db, cache) -> str:
+    buf = io.StringIO()
+    with redirect_stdout(buf):
+        for uid in range(N_USERS):
+            interp = MiniInterp(VarStore(), is_student=True, user_id=uid, db=db)
+            execute(cache.load(path), interp)
+    return buf.getvalue()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = pathlib.Path(tmp) / "welcome.dsl"
+        path.write_text(SCRIPT, encoding="utf-8")
+        db = SchoolDB(pathlib.Path(tmp) / "bench.db")
+
+        t0 = time.perf_counter()
+        with path.open(encoding="utf-8") as f:
+            lines = f.readlines()
+        out_lines = run_lines(lines, db)
+        t_lines = time.perf_counter() - t0
+
+        cache = ProgramCache()
+        t0 = time.perf_counter()
+        out_comp = run_compiled(path, db, cache)
+        t_comp = time.perf_counter() - t0
+
+        assert out_lines == out_comp, "编译执行与逐行解释输出不一致"
+        print(f"逐行解释: {N_USERS / t_lines:9.0f} 脚本/s")
+        print(f"编译缓存: {N_USERS / t_comp:9.0f} 脚本/s  "
+              f"(缓存命中 {cache.hits}，未命中 {cache.misses})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import tempfile
+import threading
+import time
+from src.db import SchoolDB
+
+N_OPS = 2000       # 每种模式的操作数
+N_THREADS = 4      # 并发登录线程数
+
+
+def login_burst(db: SchoolDB, n: int, threads: int) -> float:
+    """多线程登录风暴，返回 ops/sec"""
+    per = n // threads
+
+    def worker():
+        for _ in range(per):
+            db.login_student("Alice", "pwd")
+
+    ts = [threading.Thread(target=worker) for _ in range(threads)]
+    t0 = time.perf_counter()
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    return per * threads / (time.perf_counter() - t0)
+
+
+def serial_mixed(db: SchoolDB, n: int) -> float:
+    """单线程混合读写（登录 + GPA + 考勤），返回 ops/sec"""
+    t0 = time.perf_counter()
+    for i in range(n // 3):
+        db.login_student("Alice", "pwd")
+        db.calc_gpa(1)
+        db.record_attendance("Alice", 1, "normal")
+    return (n // 3) * 3 / (time.perf_counter() - t0)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, pool_size in (("open/close", 0), ("pool=4", 4)):
+            path = pathlib.Path(tmp) / f"bench_{pool_size}.db"
+            db = SchoolDB(path, pool_size=pool_size)
+            db.ensure_tables()
+            tid = db.register_teacher("Bob", "pwd", "bob@x.com")
+            sid = db.register_student("Alice", "pwd", "alice@x.com")
+            db.create_course("Python", tid, 3.0)
+            db.enroll_by_name(sid, "Python")
+            db.set_score("Python", "Bob", "Alice", 85)
+
+            burst = login_burst(db, N_OPS, N_THREADS)
+            mixed = serial_mixed(db, N_OPS)
+            print(f"[{label:<10}] 登录风暴 {burst:9.0f} ops/s | 混合读写 {mixed:9.0f} ops/s")
+            db.close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import re
+import tempfile
+import time
+from src.db import SchoolDB
+from src.grammar import parse_entity_command, iter_entity_commands, load_entity_commands
+
+N_STUDENTS = 100000
+N_COURSES = 50
+
+
+def legacy_parse(line):
+    """对照组：改动前的实现（每行现编译 / 查正则缓存）"""
+    pattern = r'^(?P<cmd>\w+)\s+(?P<entity>\w+)\s*(?P<args>.*)$'
+    match = re.match(pattern, line.strip())
+    if not match:
+        return None
+    cmd = match.group('cmd').upper()
+    entity = match.group('entity').upper()
+    args = dict(re.findall(r'(\w+)=["\']?([\w@.\-]+)["\']?', match.group('args')))
+    return {"type": "command", "cmd": cmd, "entity": entity, "args": args}
+
+
+def gen_lines() -> list[str]:
+    lines = ["# 管理员批量命令", "ADD TEACHER name=Bob password=pwd email=bob@x.com"]
+    lines += [f"ADD COURSE name=C{c} teacher=Bob credit={1 + c % 4}" for c in range(N_COURSES)]
+    lines += [f'ADD STUDENT name=S{i} password="pwd{i}" email=s{i}@school.edu' for i in range(N_STUDENTS)]
+    lines += [f"ENROLL STUDENT name=S{i} course=C{i % N_COURSES}" for i in range(N_STUDENTS)]
+    lines += [f"SET SCORE course=C{i % N_COURSES} teacher=Bob student=S{i} score={60 + i % 40}"
+              for i in range(N_STUDENTS)]
+    return lines
+
+
+def rate(label: str, n: int, fn) -> None:
+    t0 = time.perf_counter()
+    fn()
+    cost = time.perf_counter() - t0
+    print(f"{label:<26} {n / cost:10.0f} 行/s")
+
+
+def main():
+    lines = gen_lines()
+    n = len(lines)
+    print(f"命令文件 {n} 行")
+
+    commands = list(iter_entity_commands(lines))
+    legacy = [legacy_parse(l) for l in lines if l.strip() and not l.startswith("#")]
+    assert [(c.cmd, c.entity, c.args) for c in commands] == \
+           [(d["cmd"], d["entity"], d["args"]) for d in legacy], "批量解析结果与逐行函数不一致"
+
+    rate("逐行(改动前)", n, lambda: [legacy_parse(l) for l in lines])
+    rate("parse_entity_command", n, lambda: [parse_entity_command(l) for l in lines])
+    rate("iter_entity_commands", n, lambda: list(iter_entity_commands(lines)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SchoolDB(pathlib.Path(tmp) / "cmd.db")
+        db.ensure_tables()
+        t0 = time.perf_counter()
+        reports = load_entity_commands(lines, db)
+        cost = time.perf_counter() - t0
+        print(f"{'解析 + 批量写库':<24} {n / cost:10.0f} 行/s")
+        for name, rep in reports.items():
+            print(f"    {name:<14} {rep}")
+        assert reports["ADD STUDENT"].rows == N_STUDENTS
+        assert reports["SET SCORE"].rows == N_STUDENTS
+        assert not db.check_gpa(), "GPA 与成绩不一致"
+
+
+if __name__ == "__main__":
+    main()
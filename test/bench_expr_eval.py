@@ -0,0 +1,48 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import tempfile
+import time
+from src.db import SchoolDB
+from src.parser import VarStore, MiniInterp, parse_expr
+
+N_EVALS = 100000
+
+EXPRS = (
+    "EQUAL $x 30",
+    "GREATER $x 3.5",
+    '"hello"',
+    "$x >= 10",
+    "EQUAL (GREATER $x 1) True",
+    "GPA > 3.5",
+)
+
+
+def rate(fn) -> float:
+    t0 = time.perf_counter()
+    for _ in range(N_EVALS):
+        fn()
+    return N_EVALS / (time.perf_counter() - t0)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SchoolDB(pathlib.Path(tmp) / "expr.db")
+        db.ensure_tables()
+        sid = db.register_student("Alice", "pwd", "a@x")
+        interp = MiniInterp(VarStore(), is_student=True, user_id=sid, db=db)
+        interp.vars.reg("x", 42.0)
+        env = interp.expr
+
+        print(f"{'表达式':<28}{'每次重新解析':>14}{'eval_expr(缓存)':>18}{'预编译节点':>14}   (次/s)")
+        for text in EXPRS:
+            node = parse_expr(text)
+            assert env.eval_expr(text) == node.ev(env) == parse_expr(text).ev(env)
+            r_parse = rate(lambda: parse_expr(text).ev(env))
+            r_cached = rate(lambda: env.eval_expr(text))
+            r_node = rate(lambda: node.ev(env))
+            print(f"{text:<30}{r_parse:>12.0f}{r_cached:>16.0f}{r_node:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
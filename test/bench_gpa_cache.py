@@ -0,0 +1,83 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.db import SchoolDB, GPACache
+
+N_STUDENTS = 2000
+N_OPS = 40000
+WRITE_RATIO = 0.02      # 2% set_score，其余读 GPA
+N_THREADS = 4
+COURSES = ("Math", "PE", "Art")
+
+
+def seed(db: SchoolDB) -> None:
+    db.ensure_tables()
+    db.bulk_register_teachers([("Bob", "pwd", "bob@x")])
+    db.bulk_register_students([(f"S{i}", "pwd", f"s{i}@x") for i in range(1, N_STUDENTS + 1)])
+    db.bulk_create_courses([(c, "Bob", 1.0 + k) for k, c in enumerate(COURSES)])
+    db.bulk_enroll([(f"S{i}", c) for i in range(1, N_STUDENTS + 1) for c in COURSES])
+    db.bulk_set_scores([(c, "Bob", f"S{i}", 60 + (i + k) % 40)
+                        for i in range(1, N_STUDENTS + 1) for k, c in enumerate(COURSES)])
+
+
+def gen_ops(seed_: int) -> list:
+    """读偏向热点学生（约 20% 的学生承担 80% 的读）"""
+    rng = random.Random(seed_)
+    hot = N_STUDENTS // 5
+    ops = []
+    for _ in range(N_OPS):
+        if rng.random() < WRITE_RATIO:
+            ops.append(("w", rng.randint(1, N_STUDENTS), rng.choice(COURSES), rng.randint(50, 100)))
+        else:
+            sid = rng.randint(1, hot) if rng.random() < 0.8 else rng.randint(1, N_STUDENTS)
+            ops.append(("r", sid))
+    return ops
+
+
+def run(db: SchoolDB, ops: list, threads: int) -> float:
+    def one(op):
+        if op[0] == "r":
+            db.get_gpa(op[1])
+        else:
+            db.set_score(op[2], "Bob", f"S{op[1]}", op[3])
+
+    t0 = time.perf_counter()
+    if threads == 1:
+        for op in ops:
+            one(op)
+    else:
+        with ThreadPoolExecutor(threads) as ex:
+            for _ in ex.map(one, ops, chunksize=256):
+                pass
+    return len(ops) / (time.perf_counter() - t0)
+
+
+def main():
+    ops = gen_ops(11)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = pathlib.Path(tmp) / "gpa.db"
+        seed(SchoolDB(path, gpa_cache=None))
+        for threads in (1, N_THREADS):
+            plain = SchoolDB(path, pool_size=N_THREADS, gpa_cache=None)
+            cache = GPACache()
+            cached = SchoolDB(path, pool_size=N_THREADS, gpa_cache=cache)
+            r_plain = run(plain, ops, threads)
+            r_cached = run(cached, ops, threads)
+            total = cache.hits + cache.misses
+            print(f"[{threads} 线程] 无缓存 {r_plain:9.0f} ops/s | 有缓存 {r_cached:9.0f} ops/s "
+                  f"({r_cached / r_plain:.1f}x) | 命中率 {cache.hits / total:.1%}，失效 {cache.invalidations} 次")
+
+            # 缓存中的每个值都必须与库里一致
+            stale = [sid for sid in range(1, N_STUDENTS + 1) if cached.get_gpa(sid) != plain.get_gpa(sid)]
+            assert not stale, f"缓存与数据库不一致: {stale[:10]}"
+            plain.close_pool()
+            cached.close_pool()
+        print("缓存值与数据库一致 ✅")
+
+
+if __name__ == "__main__":
+    main()
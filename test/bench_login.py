@@ -0,0 +1,77 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import hashlib
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.db import SchoolDB
+from src.auth import LoginService
+
+N_USERS = 20000
+N_LOGINS = 40000
+N_HOT = 500            # 登录风暴集中在少数活跃账号上
+N_THREADS = 8
+
+
+def legacy_auth(db: SchoolDB, role: str, name: str, pwd: str):
+    """对照组：改动前的 WHERE name=? AND password=?"""
+    table = db.STUDENT_TABLE if role == "student" else db.TEACHER_TABLE
+    h = hashlib.sha256(pwd.encode()).hexdigest()
+    with db as cur:
+        cur.execute(f"SELECT id FROM {table} WHERE name=? AND password=? ORDER BY id LIMIT 1", (name, h))
+        row = cur.fetchone()
+        return row[0] if row is not None else None
+
+
+def gen_attempts() -> list:
+    rng = random.Random(7)
+    attempts = []
+    for _ in range(N_LOGINS):
+        i = rng.randrange(N_HOT) if rng.random() < 0.9 else rng.randrange(N_USERS)
+        pwd = f"pwd{i}" if rng.random() < 0.95 else "wrong"      # 少量输错口令
+        attempts.append(("student", f"S{i}", pwd))
+    return attempts
+
+
+def storm(fn, attempts: list, threads: int) -> tuple:
+    t0 = time.perf_counter()
+    if threads == 1:
+        results = [fn(*a) for a in attempts]
+    else:
+        with ThreadPoolExecutor(threads) as ex:
+            results = list(ex.map(lambda a: fn(*a), attempts, chunksize=64))
+    return results, time.perf_counter() - t0
+
+
+def main():
+    attempts = gen_attempts()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SchoolDB(pathlib.Path(tmp) / "login.db", pool_size=N_THREADS)
+        db.ensure_tables()
+        db.bulk_register_students([(f"S{i}", f"pwd{i}", f"s{i}@x") for i in range(N_USERS)])
+
+        # 单线程：每次登录的 CPU 开销
+        auth = LoginService(db)
+        expected = None
+        for label, fn in (("改动前 name+password", lambda r, n, p: legacy_auth(db, r, n, p)),
+                          ("SchoolDB.authenticate", db.authenticate),
+                          ("LoginService 冷启动", auth.authenticate),
+                          ("LoginService 热缓存", auth.authenticate)):
+            got, cost = storm(fn, attempts, 1)
+            expected = got if expected is None else expected
+            assert got == expected, f"{label} 结果不一致"
+            print(f"{label:<22} {N_LOGINS / cost:9.0f} 次/s")
+
+        # 多线程登录风暴：吞吐受 GIL 限制（本机核数少时多线程反而更慢），这里只看省下的查库次数
+        auth = LoginService(db)
+        got, _ = storm(auth.authenticate, attempts, N_THREADS)
+        assert got == expected
+        print(f"[{N_THREADS} 线程风暴] {N_LOGINS} 次登录只查库 {auth.misses} 次"
+              f"（{auth.hits} 次命中缓存），改动前每次都查库")
+        db.close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import io
+import tempfile
+import time
+from contextlib import redirect_stdout
+from src.db import SchoolDB
+from src.parser import VarStore, MiniInterp
+from src.compiler import compile_lines, execute
+from src.optimizer import optimize
+
+N_BLOCKS = 2000
+N_RUNS = 5
+
+# 边界情况：重复 REG、类型不符、INPUT 前后、非法条件、汇合点取值不一致
+CASES = [
+    ["REG NUM x 1", "REG NUM x 2", 'SPEAK "x=" $x'],
+    ["REG NUM x \"a\"", "REG STRING x \"b\"", 'SPEAK $x "!"'],
+    ["REG NUM x 5", "IF GREATER $x 3", "REG NUM y 1", "ELSE", "REG NUM y 2", "ENDIF", 'SPEAK $y'],
+    ["REG NUM x 5", "IF GREATER $x 9", "REG NUM y 1", "ENDIF", 'SPEAK $y'],
+    ["REG NUM x 5", "IF $x", 'SPEAK "t"', "ELSE", 'SPEAK "f"', "ENDIF"],
+    ["EQUAL 1 1", "IF $result", 'SPEAK "r"', "ENDIF", "GREATER 1 \"a\"", 'SPEAK $result'],
+    ["REG STRING s \"$x\"", 'SPEAK $s', "REG BOOL b True", 'SPEAK $b'],
+    ["REG NUM x 1", "IF EQUAL $x 1", "IF EQUAL $x 2", 'SPEAK "no"', "ELIF EQUAL $x 1",
+     'SPEAK "yes"', "ENDIF", "ENDIF", 'SPEAK "end"'],
+]
+
+
+def gen_script(n_blocks: int) -> list[str]:
+    """配置型脚本：开关与阈值在开头写死，大部分分支编译期即可确定"""
+    lines = ["REG NUM level 3", "REG BOOL verbose False", 'REG STRING tag "v"']
+    for i in range(n_blocks):
+        lines += [
+            f"IF GREATER $level {i % 5}",
+            f'    SPEAK $tag "{i}:" $level',
+            "    IF EQUAL $verbose True",
+            f'        SPEAK "debug {i}"',
+            "    ENDIF",
+            "ELSE",
+            f'    SPEAK "skip {i}"',
+            "ENDIF",
+        ]
+    return lines
+
+
+def run(program, db, runs: int):
+    buf = io.StringIO()
+    steps = 0
+    t0 = time.perf_counter()
+    with redirect_stdout(buf):
+        for uid in range(runs):
+            steps += execute(program, MiniInterp(VarStore(), is_student=True, user_id=uid, db=db))
+    return buf.getvalue(), steps, time.perf_counter() - t0
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SchoolDB(pathlib.Path(tmp) / "bench.db")
+        for lines in CASES:
+            program = compile_lines(lines)
+            plain, _, _ = run(program, db, 1)
+            folded, _, _ = run(optimize(program), db, 1)
+            assert plain == folded, f"优化前后输出不一致: {lines}\n{plain!r}\n{folded!r}"
+        print(f"{len(CASES)} 个边界用例输出一致")
+
+        program = compile_lines(gen_script(N_BLOCKS), "<gen>")
+        t0 = time.perf_counter()
+        opt = optimize(program)
+        t_opt = time.perf_counter() - t0
+
+        plain, steps0, cost0 = run(program, db, N_RUNS)
+        folded, steps1, cost1 = run(opt, db, N_RUNS)
+        assert plain == folded, "优化前后输出不一致"
+        print(f"指令数 {len(program)} → {len(opt)}，优化用时 {t_opt * 1000:.1f} ms")
+        print(f"原程序: {steps0:8d} 步 {cost0 * 1000:8.1f} ms")
+        print(f"优化后: {steps1:8d} 步 {cost1 * 1000:8.1f} ms  ({cost0 / cost1:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+# 100 万条考勤：整表 fetchall 与 keyset 分页遍历（+ NDJSON 编码）的峰值内存对比
+import tempfile
+import time
+import tracemalloc
+from src.db import SchoolDB, ndjson_page
+
+N_STUDENTS = 10000
+N_COURSES = 50
+PER_STUDENT = 5          # 每人选课数
+N_ATTEND = 1000000
+STATUSES = ("normal", "absent", "late_or_early")
+
+
+def seed(db: SchoolDB) -> None:
+    db.ensure_tables()
+    db.bulk_register_teachers([("Bob", "pwd", "bob@x")])
+    db.bulk_register_students([(f"S{i}", "pwd", f"s{i}@x") for i in range(N_STUDENTS)])
+    db.bulk_create_courses([(f"C{c}", "Bob", 2.0) for c in range(N_COURSES)])
+    db.bulk_enroll([(f"S{i}", f"C{(i + k * 7) % N_COURSES}")
+                    for i in range(N_STUDENTS) for k in range(PER_STUDENT)])
+    with db as cur:
+        cur.execute(f"SELECT MAX(id) FROM {db.ENROLL_TABLE}")
+        n_enroll = cur.fetchone()[0]
+        cur.executemany(
+            f"INSERT INTO {db.ATTEND_TABLE} (enrollment_id, status, timestamp) VALUES (?,?,?)",
+            ((1 + i % n_enroll, STATUSES[i % 3], "2025-01-01T08:00:00") for i in range(N_ATTEND)),
+        )
+
+
+def measure(label: str, fn) -> tuple:
+    """开着 tracemalloc 跑一遍，返回 (行数, 峰值字节)；耗时含 tracemalloc 开销，只作相互对比"""
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    n = fn()
+    cost = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:<30} {n:8d} 行  {cost:6.2f} s  峰值 {peak / 2**20:7.2f} MiB")
+    return n, peak
+
+
+def fetch_all(db: SchoolDB) -> int:
+    """对照组：一次 fetchall 整个 join"""
+    with db as cur:
+        cur.execute(f"""
+            SELECT a.id, s.name, c.id, c.name, a.status, a.timestamp
+            FROM {db.ATTEND_TABLE} a
+            JOIN {db.ENROLL_TABLE} e ON a.enrollment_id = e.id
+            JOIN {db.STUDENT_TABLE} s ON e.student_id = s.id
+            JOIN {db.COURSE_TABLE} c ON e.course_id = c.id
+            ORDER BY a.id
+        """)
+        rows = cur.fetchall()
+    return len(rows)
+
+
+def stream_ndjson(db: SchoolDB, kind: str, **filters) -> int:
+    """与 /api/... 的 NDJSON 输出相同：逐页取出、编码后丢弃"""
+    fetch, fields = getattr(db, f"page_{kind}"), db.PAGE_FIELDS[kind]
+    n, after = 0, 0
+    while True:
+        rows = fetch(after=after, limit=db.MAX_PAGE, **filters)
+        ndjson_page(fields, rows)
+        n += len(rows)
+        if len(rows) < db.MAX_PAGE:
+            return n
+        after = rows[-1][0]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SchoolDB(pathlib.Path(tmp) / "pages.db", pool_size=1)
+        t0 = time.perf_counter()
+        seed(db)
+        print(f"造数 {N_ATTEND} 条考勤用时 {time.perf_counter() - t0:.1f} s")
+
+        _, full = measure("fetchall 整表", lambda: fetch_all(db))
+        n, paged = measure("分页 attendance + NDJSON", lambda: stream_ndjson(db, "attendance"))
+        assert n == N_ATTEND
+        assert paged * 20 < full, "分页遍历的峰值内存应远小于整表读取"
+
+        measure("分页 attendance(单门课)", lambda: stream_ndjson(db, "attendance", course_id=1))
+        measure("分页 attendance(单个学生)", lambda: stream_ndjson(db, "attendance", student_id=1))
+        measure("分页 roster(单门课)", lambda: stream_ndjson(db, "roster", course_id=1))
+        measure("分页 courses", lambda: stream_ndjson(db, "courses"))
+
+        # 翻页不重不漏
+        ids = [row[0] for row in db.scan("roster", course_id=1, page=7)]
+        assert ids == sorted(set(ids)) and len(ids) == N_STUDENTS * PER_STUDENT // N_COURSES
+        db.close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import argparse
+import hashlib
+import random
+import sqlite3
+import tempfile
+import time
+from src.db import SchoolDB
+
+N_CALLS = 200      # 每个接口测多少次
+
+
+def populate(db: SchoolDB, n_students: int, n_enroll: int, n_courses: int):
+    """直接 executemany 灌数据：n_students 学生、n_courses 门课、n_enroll 条选课"""
+    h = hashlib.sha256(b"pwd").hexdigest()
+    per = max(1, n_enroll // n_students)
+    with db as cur:
+        cur.execute(f"INSERT INTO {db.TEACHER_TABLE} (name, password, email) VALUES ('Bob', ?, 'b@x')", (h,))
+        cur.executemany(
+            f"INSERT INTO {db.COURSE_TABLE} (name, teacher_id, credit) VALUES (?, 1, ?)",
+            ((f"C{i}", 1.0 + i % 4) for i in range(n_courses)),
+        )
+        cur.executemany(
+            f"INSERT INTO {db.STUDENT_TABLE} (name, password, email) VALUES (?, ?, ?)",
+            ((f"S{i}", h, f"s{i}@x") for i in range(n_students)),
+        )
+        cur.executemany(
+            f"INSERT INTO {db.ENROLL_TABLE} (student_id, course_id, score) VALUES (?, ?, ?)",
+            ((s + 1, (s * 7 + k * 13) % n_courses + 1, 60 + (s + k) % 40)
+             for s in range(n_students) for k in range(per)),
+        )
+    db.rebuild_gpa()
+
+
+def drop_indexes(path: pathlib.Path):
+    """回到 v1：删掉 v2 加的索引，模拟迁移前"""
+    conn = sqlite3.connect(path)
+    for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type='index' AND sql IS NOT NULL").fetchall():
+        conn.execute(f"DROP INDEX {name}")
+    conn.execute("PRAGMA user_version = 1")
+    conn.commit()
+    conn.close()
+
+
+def show_plans(path: pathlib.Path):
+    conn = sqlite3.connect(path)
+    queries = {
+        "login_student": ("SELECT 1 FROM students WHERE name=? AND password=? LIMIT 1", ("S1", "x")),
+        "set_score(课程)": ("SELECT c.id FROM courses c JOIN teachers t ON c.teacher_id = t.id "
+                          "WHERE c.name = ? AND t.name = ? ORDER BY c.id LIMIT 1", ("C1", "Bob")),
+        "record_attendance": ("SELECT id FROM enrollments WHERE student_id=? AND course_id=? LIMIT 1", (1, 1)),
+        "calc_gpa": ("SELECT c.credit, e.score FROM enrollments e JOIN courses c ON e.course_id = c.id "
+                     "WHERE e.student_id = ? AND e.score IS NOT NULL AND e.score != 0", (1,)),
+    }
+    for label, (sql, params) in queries.items():
+        plan = " | ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+        print(f"    {label:<18} {plan}")
+    conn.close()
+
+
+def measure(db: SchoolDB, n_students: int, n_courses: int, per: int):
+    rng = random.Random(42)
+    picks = [rng.randrange(n_students) for _ in range(N_CALLS)]
+
+    def timed(label, fn):
+        t0 = time.perf_counter()
+        for s in picks:
+            fn(s)
+        print(f"    {label:<18} {(time.perf_counter() - t0) / N_CALLS * 1000:9.3f} ms/次")
+
+    course_of = lambda s: (s * 7) % n_courses   # 每名学生的第 1 门课（k=0）
+    timed("login_student", lambda s: db.login_student(f"S{s}", "pwd"))
+    timed("set_score", lambda s: db.set_score(f"C{course_of(s)}", "Bob", f"S{s}", 88))
+    timed("record_attendance", lambda s: db.record_attendance(f"S{s}", course_of(s) + 1, "normal"))
+    timed("calc_gpa", lambda s: db.calc_gpa(s + 1))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="索引迁移前后的查询计划与延迟")
+    ap.add_argument("--students", type=int, default=100_000)
+    ap.add_argument("--enrollments", type=int, default=1_000_000)
+    ap.add_argument("--courses", type=int, default=2_000)
+    args = ap.parse_args()
+    per = max(1, args.enrollments // args.students)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = pathlib.Path(tmp) / "bench.db"
+        db = SchoolDB(path, pool_size=1)
+        db.ensure_tables()
+        t0 = time.perf_counter()
+        populate(db, args.students, args.enrollments, args.courses)
+        print(f"灌入 {args.students} 学生 / {args.students * per} 选课，用时 {time.perf_counter() - t0:.1f} s")
+
+        db.close_pool()
+        drop_indexes(path)
+        print("== 迁移前（v1，无二级索引）")
+        show_plans(path)
+        measure(db, args.students, args.courses, per)
+
+        t0 = time.perf_counter()
+        db.ensure_tables()
+        print(f"== 迁移后（v{SchoolDB.SCHEMA_VERSION}），迁移用时 {time.perf_counter() - t0:.1f} s")
+        show_plans(path)
+        measure(db, args.students, args.courses, per)
+        db.close_pool()
+
+
+if __name__ == "__main__":
+    main()
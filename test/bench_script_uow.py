@@ -0,0 +1,67 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import io
+import tempfile
+import time
+from contextlib import redirect_stdout
+from src.db import SchoolDB
+from src.parser import VarStore, MiniInterp
+from src.compiler import compile_lines, execute
+
+N_STUDENTS = 50
+N_RUNS = 40
+
+
+def seed(db: SchoolDB) -> None:
+    db.ensure_tables()
+    db.bulk_register_teachers([("Bob", "pwd", "bob@x")])
+    db.bulk_register_students([(f"S{i}", "pwd", f"s{i}@x") for i in range(N_STUDENTS)])
+    db.bulk_create_courses([("Math", "Bob", 4.0), ("PE", "Bob", 1.0)])
+    db.bulk_enroll([(f"S{i}", c) for i in range(N_STUDENTS) for c in ("Math", "PE")])
+    db.bulk_set_scores([(c, "Bob", f"S{i}", 60 + (i * 7 + len(c)) % 40)
+                        for i in range(N_STUDENTS) for c in ("Math", "PE")])
+
+
+def gen_script() -> list[str]:
+    """每个学生查两次 GPA：一次存变量，一次作为条件参数"""
+    lines = []
+    for sid in range(1, N_STUDENTS + 1):
+        lines += [
+            f"REG NUM g{sid} GPA {sid}",
+            f"GPA {sid}",
+            f"IF GREATER $result 3.5",
+            f'    SPEAK "S{sid} 优秀 " $g{sid}',
+            "ENDIF",
+        ]
+    return lines
+
+
+def run(db: SchoolDB, program, unit_of_work: bool):
+    buf = io.StringIO()
+    t0 = time.perf_counter()
+    with redirect_stdout(buf):
+        for uid in range(N_RUNS):
+            interp = MiniInterp(VarStore(), is_student=False, user_id=uid, db=db)
+            execute(program, interp, unit_of_work=unit_of_work)
+    return buf.getvalue(), (time.perf_counter() - t0) / N_RUNS
+
+
+def main():
+    program = compile_lines(gen_script(), "<gpa50>")
+    print(f"脚本含 {2 * N_STUDENTS} 次 GPA 调用，常量参数 {len(program.gpa_ids)} 个")
+    with tempfile.TemporaryDirectory() as tmp:
+        for pool_size in (0, 4):
+            db = SchoolDB(pathlib.Path(tmp) / f"uow{pool_size}.db", pool_size=pool_size)
+            seed(db)
+            plain, t_plain = run(db, program, unit_of_work=False)
+            batched, t_batched = run(db, program, unit_of_work=True)
+            assert plain == batched, "两种模式输出不一致"
+            label = "连接池" if pool_size else "每次新建连接"
+            print(f"[{label}] 逐次查询 {t_plain * 1000:7.2f} ms/次 | "
+                  f"单事务 + 批量预取 {t_batched * 1000:7.2f} ms/次 ({t_plain / t_batched:.1f}x)")
+            db.close_pool()
+
+
+if __name__ == "__main__":
+    main()
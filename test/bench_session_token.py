@@ -0,0 +1,62 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import random
+import tempfile
+import time
+from src.db import SchoolDB
+from src.auth import LoginService, SessionTokens
+
+N_USERS = 10000
+N_CALLS = 50000
+
+
+def latency(label: str, fn, calls: list) -> list:
+    """逐次计时，打印 p50 / p99 / 平均（微秒）"""
+    costs, results = [], []
+    clock = time.perf_counter
+    for args in calls:
+        t0 = clock()
+        results.append(fn(*args))
+        costs.append(clock() - t0)
+    costs.sort()
+    us = lambda x: x * 1e6
+    print(f"{label:<28} p50 {us(costs[len(costs) // 2]):7.1f} µs  "
+          f"p99 {us(costs[int(len(costs) * 0.99)]):7.1f} µs  "
+          f"平均 {us(sum(costs) / len(costs)):7.1f} µs")
+    return results
+
+
+def main():
+    rng = random.Random(3)
+    users = [rng.randrange(N_USERS) for _ in range(N_CALLS)]
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SchoolDB(pathlib.Path(tmp) / "token.db", pool_size=1)
+        db.ensure_tables()
+        db.bulk_register_students([(f"S{i}", f"pwd{i}", f"s{i}@x") for i in range(N_USERS)])
+        auth = LoginService(db, maxsize=N_USERS)
+        tokens = SessionTokens(db)
+
+        # 每个用户先登录一次，拿到令牌
+        ids, issued = {}, {}
+        for i in range(N_USERS):
+            ids[i] = auth.authenticate("student", f"S{i}", f"pwd{i}")
+            issued[i] = tokens.issue(ids[i], True)
+        expected = [ids[i] for i in users]
+
+        calls = [("student", f"S{i}", f"pwd{i}") for i in users]
+        got = latency("每次调用重新登录(查库)", db.authenticate, calls)
+        assert got == expected
+        got = latency("每次调用重新登录(登录缓存)", auth.authenticate, calls)
+        assert got == expected
+        got = latency("令牌 → Runtime", lambda t: tokens.resolve(t).user_id, [(issued[i],) for i in users])
+        assert got == expected
+
+        forged = [(issued[i][:-1] + ("0" if issued[i][-1] != "0" else "1"),) for i in users[:1000]]
+        assert all(tokens.resolve(*t) is None for t in forged), "篡改的令牌不应通过"
+        print(f"会话 {len(tokens)} 个，篡改令牌全部拒绝")
+        db.close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import gzip
+import os
+import shutil
+import tempfile
+import time
+from src.static import StaticCache, brotli
+
+FRONTEND = pathlib.Path(__file__).resolve().parent.parent / "frontend"
+N_REQ = 20000
+
+
+def legacy(_headers):
+    """对照组：改动前每次请求打开并读取 index.html（HTMLResponse 再编码成 UTF-8）"""
+    with open(os.path.join(FRONTEND, "index.html"), "r", encoding="utf-8") as f:
+        return 200, f.read().encode("utf-8"), {}
+
+
+def bench(label: str, fn, headers: dict) -> None:
+    t0 = time.perf_counter()
+    for _ in range(N_REQ):
+        status, body, _ = fn(headers)
+    cost = time.perf_counter() - t0
+    print(f"{label:<26} {N_REQ / cost:9.0f} 次/s   {status}  每次 {len(body):5d} 字节")
+
+
+def main():
+    static = StaticCache(FRONTEND)
+    index = lambda h: static.respond("index.html", h)
+    etag = static.respond("index.html", {"accept-encoding": "gzip"})[2]["ETag"]
+
+    bench("改动前 逐次读盘", legacy, {})
+    bench("缓存 不压缩", index, {})
+    bench("缓存 gzip", index, {"accept-encoding": "gzip, deflate"})
+    if brotli is not None:
+        bench("缓存 br", index, {"accept-encoding": "gzip, deflate, br"})
+    else:
+        print("（未安装 brotli，跳过 br）")
+    bench("缓存 If-None-Match → 304", index, {"accept-encoding": "gzip", "if-none-match": etag})
+
+    status, body, headers = index({"accept-encoding": "gzip"})
+    assert gzip.decompress(body) == (FRONTEND / "index.html").read_bytes()
+    assert index({"accept-encoding": "gzip;q=0"})[2].get("Content-Encoding") is None
+
+    # dev 模式：每次请求多一次 stat，文件改动后立即生效
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copy(FRONTEND / "index.html", tmp)
+        dev = StaticCache(tmp, dev=True)
+        bench("dev 模式 gzip(每次 stat)", lambda h: dev.respond("index.html", h), {"accept-encoding": "gzip"})
+        old = dev.respond("index.html", {})[2]["ETag"]
+        page = pathlib.Path(tmp) / "index.html"
+        page.write_text(page.read_text(encoding="utf-8") + "<!-- changed -->", encoding="utf-8")
+        os.utime(page, (time.time() + 1, time.time() + 1))
+        assert dev.respond("index.html", {})[2]["ETag"] != old, "dev 模式未重新加载"
+
+
+if __name__ == "__main__":
+    main()
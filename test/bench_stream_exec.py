@@ -0,0 +1,78 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import tempfile
+import time
+import tracemalloc
+from src.channels import OutputSink
+from src.db import SchoolDB
+from src.parser import VarStore, MiniInterp
+from src.compiler import compile_file, execute
+from src.stream import run_file_stream
+
+N_COURSES = 20000
+
+
+class CountingOutput(OutputSink):
+    """只记字节数和行数的输出，避免把输出本身算进内存"""
+    def __init__(self):
+        self.chars = 0
+        self.lines = 0
+
+    def write(self, text: str) -> None:
+        self.chars += len(text)
+        self.lines += text.count("\n")
+
+
+def gen_catalogue(path: pathlib.Path, n: int) -> int:
+    """生成课程目录脚本：每门课一条 OPEN_COURSE，每 50 门一个 IF 块"""
+    lines = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("REG NUM limit 4\n")
+        for i in range(n):
+            f.write(f'OPEN_COURSE "Course_{i}" {1 + i % 4}\n')
+            lines += 1
+            if i % 50 == 49:
+                f.write(f"IF GREATER $limit {i % 7}\n"
+                        f'    SPEAK "checkpoint {i}"\n'
+                        "ELSE\n"
+                        f'    SPEAK "skip {i}"\n'
+                        "ENDIF\n")
+                lines += 5
+    return lines + 1
+
+
+def measure(label: str, db: SchoolDB, tid: int, run) -> str:
+    out = CountingOutput()
+    interp = MiniInterp(VarStore(), is_student=False, user_id=tid, db=db, out=out)
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    steps = run(interp)
+    cost = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label}: {steps / cost:9.0f} 指令/s | 峰值内存 {peak / 1024 / 1024:7.2f} MiB | "
+          f"输出 {out.lines} 行")
+    return f"{out.lines}:{out.chars}"
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        script = pathlib.Path(tmp) / "catalogue.dsl"
+        n_lines = gen_catalogue(script, N_COURSES)
+        print(f"脚本 {n_lines} 行，{script.stat().st_size / 1024:.0f} KiB")
+
+        results = []
+        for label, run in (("整体加载", lambda it: execute(compile_file(script), it)),
+                           ("流式执行", lambda it: run_file_stream(script, it))):
+            db = SchoolDB(pathlib.Path(tmp) / f"{len(results)}.db", pool_size=1)
+            db.ensure_tables()
+            tid = db.register_teacher("Bob", "pwd", "bob@x")
+            results.append(measure(label, db, tid, run))
+            assert len(db.list_courses()) == N_COURSES
+            db.close_pool()
+        assert results[0] == results[1], "两种方式输出不一致"
+
+
+if __name__ == "__main__":
+    main()
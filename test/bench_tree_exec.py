@@ -0,0 +1,82 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import io
+import tempfile
+import time
+from contextlib import redirect_stdout
+from src.AST import Tree
+from src.db import SchoolDB
+from src.parser import VarStore, MiniInterp
+from src.compiler import compile_tree, execute
+
+N_BLOCKS = 2000     # IF 结构个数
+N_RUNS = 5
+
+
+def gen_script(n_blocks: int) -> list[str]:
+    lines = ["REG NUM score 73", "REG BOOL flag True"]
+    for i in range(n_blocks):
+        lines += [
+            f"IF GREATER $score {i % 100}",
+            f"    IF EQUAL $flag True",
+            f'        SPEAK "a{i}"',
+            "    ELSE",
+            f'        SPEAK "b{i}"',
+            "    ENDIF",
+            f"ELIF EQUAL $score {i % 100}",
+            f'    SPEAK "c{i}"',
+            "ELSE",
+            f'    SPEAK "d{i}"',
+            "ENDIF",
+        ]
+    return lines
+
+
+def walk_text(tree: Tree, interp: MiniInterp) -> int:
+    """对照组：每一步重新读节点文本，条件现场解析求值"""
+    i, steps = 0, 0
+    while i != -1:
+        text = tree.text(i)
+        kw = text.split(maxsplit=1)[0]
+        steps += 1
+        if kw in ("IF", "ELIF"):
+            cond = interp.expr.eval_expr(text.split(maxsplit=1)[1])
+            i = tree.t_nxt[i] if cond else tree.f_nxt[i]
+            continue
+        if kw not in ("ELSE", "ENDIF"):
+            interp.exec_line(text)
+        i = tree.t_nxt[i]
+    return steps
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SchoolDB(pathlib.Path(tmp) / "bench.db")
+        tree = Tree("<gen>")
+        tree.load_from_lines(gen_script(N_BLOCKS))
+
+        t0 = time.perf_counter()
+        program = compile_tree(tree)
+        t_compile = time.perf_counter() - t0
+
+        results = {}
+        for label, runner in (("文本遍历", lambda it: walk_text(tree, it)),
+                              ("跳转表", lambda it: execute(program, it))):
+            buf = io.StringIO()
+            steps = 0
+            t0 = time.perf_counter()
+            with redirect_stdout(buf):
+                for uid in range(N_RUNS):
+                    interp = MiniInterp(VarStore(), is_student=True, user_id=uid, db=db)
+                    steps += runner(interp)
+            cost = time.perf_counter() - t0
+            results[label] = buf.getvalue()
+            print(f"{label}: {steps / cost:10.0f} 语句/s  ({steps} 步, {cost * 1000:.1f} ms)")
+
+        assert results["文本遍历"] == results["跳转表"], "两种执行方式输出不一致"
+        print(f"编译 {tree.size} 个节点 → {len(program)} 条指令，用时 {t_compile * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import io
+import tempfile
+import time
+from contextlib import redirect_stdout
+from src.db import SchoolDB
+from src.parser import VarStore, MiniInterp, Var, Slot
+from src.compiler import compile_lines, execute
+
+N_OPS = 200000
+N_LINES = 3000
+N_RUNS = 10
+
+
+def rate(fn, n: int = N_OPS) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return n / (time.perf_counter() - t0)
+
+
+def gen_script() -> list[str]:
+    """函数调用密集：每次调用都会写 $result"""
+    lines = ["REG NUM x 7", "REG NUM y 3"]
+    for i in range(N_LINES):
+        lines += [f"GREATER $x {i % 10}", f"REG BOOL b{i} EQUAL $result True", "EQUAL $x $y"]
+    return lines
+
+
+def main():
+    store = VarStore()
+    store.reg("x", 1.0)
+    store.reg("result", 0.0)
+    k = store.slot("result")
+    vals = store._vals
+    print(f"update(\"result\")  {rate(lambda: store.update('result', 1.0)):12.0f} 次/s")
+    print(f"槽位直写          {rate(lambda: vals.__setitem__(k, 1.0)):12.0f} 次/s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SchoolDB(pathlib.Path(tmp) / "vars.db")
+        interp = MiniInterp(store, is_student=True, user_id=1, db=db)
+        env = interp.expr
+        env.frame = store.bind(["x"])
+        by_name, by_slot = Var("x"), Slot("x", 0)
+        print(f"Var.ev(名字)       {rate(lambda: by_name.ev(env)):12.0f} 次/s")
+        print(f"Slot.ev(槽位)      {rate(lambda: by_slot.ev(env)):12.0f} 次/s")
+
+        lines = gen_script()
+        program = compile_lines(lines, "<calls>")
+        outputs = []
+        for label, runner in (("逐行解释(名字)", lambda it: [it.exec_line(l) for l in lines]),
+                              ("编译执行(槽位)", lambda it: execute(program, it))):
+            buf = io.StringIO()
+            t0 = time.perf_counter()
+            with redirect_stdout(buf):
+                for uid in range(N_RUNS):
+                    it = MiniInterp(VarStore(), is_student=True, user_id=uid, db=db)
+                    runner(it)
+                    it.vars.dump()
+            cost = time.perf_counter() - t0
+            outputs.append(buf.getvalue())
+            print(f"{label}: {len(lines) * N_RUNS / cost:10.0f} 语句/s")
+        assert outputs[0] == outputs[1], "两种模式变量表不一致"
+        print(f"程序共 {len(program.names)} 个槽位，两种模式 dump 结果一致")
+
+
+if __name__ == "__main__":
+    main()
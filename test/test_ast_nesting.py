@@ -0,0 +1,101 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import time
+from src.AST import Tree
+
+
+def deep_script(depth: int, indent: str = "    ") -> list[str]:
+    """depth 层嵌套 IF，每层 IF 前后各一条语句"""
+    lines = []
+    for d in range(depth):
+        lines.append(indent * d + f'SPEAK "in {d}"')
+        lines.append(indent * d + f"IF GREATER $x {d}")
+    lines.append(indent * depth + 'SPEAK "core"')
+    for d in reversed(range(depth)):
+        lines.append(indent * d + "ENDIF")
+        lines.append(indent * d + f'SPEAK "out {d}"')
+    return lines
+
+
+def wide_script(width: int) -> list[str]:
+    """一个 IF 带 width 个 ELIF 分支 + ELSE"""
+    lines = ["IF EQUAL $x 0", '    SPEAK "0"']
+    for i in range(1, width):
+        lines += [f"ELIF EQUAL $x {i}", f'    SPEAK "{i}"']
+    lines += ["ELSE", '    SPEAK "other"', "ENDIF", 'SPEAK "end"']
+    return lines
+
+
+def build(lines: list[str]) -> Tree:
+    tree = Tree("<gen>")
+    tree.load_from_lines(lines)
+    return tree
+
+
+def check_deep(depth: int):
+    tree = build(deep_script(depth))
+    # 节点布局：SPEAK in d = 2d, IF d = 2d+1, core = 2*depth
+    core = 2 * depth
+    for d in range(depth):
+        speak_in, if_idx = 2 * d, 2 * d + 1
+        endif = core + 1 + 2 * (depth - 1 - d)
+        assert tree.t_nxt[speak_in] == if_idx
+        assert tree.t_nxt[if_idx] == if_idx + 1          # 条件成立 → 进入下一层
+        assert tree.f_nxt[if_idx] == endif               # 条件不成立 → 本层 ENDIF
+        assert tree.t_nxt[endif] == endif + 1            # ENDIF → SPEAK out d
+    assert tree.t_nxt[core] == core + 1                  # 最内层语句 → 最内层 ENDIF
+    assert tree.t_nxt[tree.size - 1] == -1
+    print(f"[OK] 嵌套 {depth} 层，{tree.size} 个节点")
+
+
+def check_wide(width: int):
+    tree = build(wide_script(width))
+    endif = tree.size - 2
+    else_idx = endif - 2
+    for i in range(width):
+        head = 2 * i
+        nxt_head = 2 * (i + 1)                           # 下一个 ELIF 或 ELSE
+        assert tree.t_nxt[head] == head + 1
+        assert tree.f_nxt[head] == nxt_head
+        assert tree.t_nxt[head + 1] == endif             # 每个分支末尾 → ENDIF
+    assert tree.f_nxt[2 * (width - 1)] == else_idx
+    assert tree.t_nxt[else_idx + 1] == endif
+    assert tree.t_nxt[endif] == endif + 1
+    print(f"[OK] {width} 个分支，{tree.size} 个节点")
+
+
+def check_errors():
+    for bad in (["ENDIF"], ["ELSE"], ["IF EQUAL 1 1"],
+                ["IF EQUAL 1 1", "ELSE", "ELIF EQUAL 1 1", "ENDIF"]):
+        try:
+            build(bad)
+        except Exception as e:
+            print(f"[OK] {bad} → {e}")
+        else:
+            raise AssertionError(f"未报错: {bad}")
+
+
+def check_linear():
+    """嵌套深度翻倍，加载时间应近似翻倍而非四倍（不缩进，免得输入本身平方增长）"""
+    costs = []
+    for depth in (20_000, 40_000, 80_000):
+        lines = deep_script(depth, indent="")
+        t0 = time.perf_counter()
+        build(lines)
+        costs.append(time.perf_counter() - t0)
+        print(f"     深度 {depth:>5}: {costs[-1] * 1000:7.1f} ms")
+    assert costs[-1] < costs[0] * 8, "加载时间随嵌套深度超线性增长"
+
+
+def main():
+    for depth in (1, 2, 100, 500):
+        check_deep(depth)
+    for width in (1, 2, 1000):
+        check_wide(width)
+    check_errors()
+    check_linear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import asyncio
+import tempfile
+import threading
+from src.db import SchoolDB
+from src.async_db import AsyncSchoolDB, DBBusy
+
+
+async def wait_for(cond, timeout: float = 5.0) -> None:
+    for _ in range(int(timeout / 0.01)):
+        if cond():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("等待超时")
+
+
+async def check_pending(adb: AsyncSchoolDB):
+    gate = threading.Event()
+    started = threading.Event()
+
+    def blocked():
+        started.set()
+        gate.wait(5)
+        return "done"
+
+    running = asyncio.create_task(adb.run(blocked))
+    await wait_for(started.is_set)
+    queued = asyncio.create_task(adb.run(lambda: "queued"))
+    await wait_for(lambda: adb.pending == 2)
+    try:
+        await adb.run(lambda: None)
+        raise AssertionError("超过 max_pending 应抛 DBBusy")
+    except DBBusy:
+        pass
+
+    # 取消等待中的请求：执行中的调用仍算在途，排队的随之取消、立即让出名额
+    running.cancel()
+    queued.cancel()
+    await asyncio.gather(running, queued, return_exceptions=True)
+    await wait_for(lambda: adb.pending == 1)
+    await asyncio.sleep(0.05)
+    assert adb.pending == 1, adb.pending
+    gate.set()
+    await wait_for(lambda: adb.pending == 0)
+
+    # 异常同样归还名额
+    try:
+        await adb.run(lambda: 1 / 0)
+    except ZeroDivisionError:
+        pass
+    assert adb.pending == 0
+    assert await adb.run(lambda x, y=0: x + y, 1, y=2) == 3
+    print("[OK] 在途计数：取消的请求在调用真正结束后才释放名额")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        adb = AsyncSchoolDB(SchoolDB(pathlib.Path(tmp) / "async.db", pool_size=1),
+                            max_workers=1, max_pending=2)
+        try:
+            asyncio.run(check_pending(adb))
+        finally:
+            adb.shutdown()
+
+
+if __name__ == "__main__":
+    main()
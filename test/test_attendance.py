@@ -0,0 +1,145 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import tempfile
+import threading
+import time
+from concurrent.futures import CancelledError
+from src.db import SchoolDB
+from src.async_db import DBBusy
+from src.attendance import AttendanceIngest
+
+
+def seed(db: SchoolDB) -> tuple:
+    db.ensure_tables()
+    tid = db.register_teacher("Bob", "pwd", "bob@x")
+    sid = db.register_student("Alice", "pwd", "alice@x")
+    db.register_student("Carol", "pwd", "carol@x")
+    cid = db.create_course("Python", tid, 3.0)
+    db.enroll_by_name(sid, "Python")
+    return sid, cid
+
+
+def count(db: SchoolDB) -> int:
+    with db as cur:
+        cur.execute(f"SELECT COUNT(*) FROM {db.ATTEND_TABLE}")
+        return cur.fetchone()[0]
+
+
+def outcome(fut):
+    try:
+        return fut.result(5)
+    except CancelledError:
+        return "cancelled"
+    except Exception as e:
+        return str(e)
+
+
+def check_errors(db: SchoolDB, sid: int, cid: int):
+    ingest = AttendanceIngest(db)
+    errs = ingest.record_batch([("Alice", cid, "normal"), ("nobody", cid, "normal"),
+                                ("Carol", cid, "normal"), ("Alice", cid, "bogus"), (sid, cid, "absent")])
+    assert errs == [None, "学生 'nobody' 不存在", "学生未选此课程",
+                    "状态只能是 normal/absent/late_or_early", None], errs
+    # 课程 id 不是整数：只有这一条报错，同批其余照常写入
+    errs = ingest.record_batch([("Alice", "x", "normal"), ("Alice", None, "normal"), ("Alice", str(cid), "normal")])
+    assert errs == ["课程 id 必须是整数", "课程 id 必须是整数", None], errs
+    for bad in (("Alice", cid, "bogus"), ("Alice", "x", "normal")):
+        try:
+            ingest.submit(*bad)
+            raise AssertionError("非法状态 / 课程 id 应立即报错")
+        except ValueError:
+            pass
+    with ingest:
+        futs = [ingest.submit("Alice", cid, "normal"), ingest.submit("nobody", cid, "normal"),
+                ingest.submit(sid, cid, "late_or_early"), ingest.submit(sid, cid + 1, "normal")]
+    assert [outcome(f) for f in futs] == [True, "学生 'nobody' 不存在", True, "学生未选此课程"]
+    assert count(db) == 5
+    print("[OK] 不存在的学生 / 未选课 / 非法状态 / 非法课程 id / 按 id 打卡")
+
+
+def check_cancel(db: SchoolDB, cid: int):
+    """写入前被取消的打卡不写，后台线程不受影响"""
+    before = count(db)
+    with AttendanceIngest(db, flush_interval=0.2) as ingest:
+        gone = ingest.submit("Alice", cid, "normal")
+        assert gone.cancel()
+        kept = ingest.submit("Alice", cid, "normal")
+        assert ingest.flush(5)
+        assert outcome(kept) is True and outcome(gone) == "cancelled"
+        assert ingest._thread.is_alive()
+        assert outcome(ingest.submit("Alice", cid, "absent")) is True
+    assert count(db) == before + 2
+    print("[OK] 取消的 Future 不写入、不打断写线程")
+
+
+def check_bad_batch(db: SchoolDB, cid: int):
+    """某一批写库出错：本批 Future 收到异常，之后的打卡照常写入"""
+    ingest = AttendanceIngest(db)
+    real_write, calls = ingest._write, []
+
+    def flaky(batch):
+        calls.append(len(batch))
+        if len(calls) == 1:
+            raise RuntimeError("磁盘满")
+        return real_write(batch)
+    ingest._write = flaky
+    with ingest:
+        assert outcome(ingest.submit("Alice", cid, "normal")) == "磁盘满"
+        assert outcome(ingest.submit("Alice", cid, "normal")) is True
+    print("[OK] 单批出错不影响后续批次")
+
+
+def check_full(db: SchoolDB, cid: int):
+    """队列满时 block=False 立即抛 DBBusy，不阻塞调用方"""
+    ingest = AttendanceIngest(db, max_queue=1)
+    gate = threading.Event()
+    real_write = ingest._write
+    ingest._write = lambda batch: (gate.wait(5), real_write(batch))[1]
+    with ingest:
+        first = ingest.submit("Alice", cid, "normal", block=False)     # 写线程拿走后卡在 gate 上
+        while ingest._q.qsize():
+            time.sleep(0.001)
+        second = ingest.submit("Alice", cid, "normal", block=False)    # 占满队列
+        try:
+            ingest.submit("Alice", cid, "normal", block=False)
+            raise AssertionError("队列满时应抛 DBBusy")
+        except DBBusy:
+            pass
+        gate.set()
+    assert outcome(first) is True and outcome(second) is True
+    print("[OK] 队列满时非阻塞提交返回 DBBusy")
+
+
+def check_enroll_cache(db: SchoolDB, cid: int):
+    """选课表写过之后，缓存的选课 id 不再使用"""
+    dave = db.register_student("Dave", "pwd", "dave@x")
+    db.enroll_by_name(dave, "Python")
+    ingest = AttendanceIngest(db)
+    assert ingest.record_batch([("Dave", cid, "normal")]) == [None]    # 选课 id 进缓存
+    with db as cur:                                                     # 退课（绕过 SchoolDB）
+        cur.execute(f"DELETE FROM {db.ATTEND_TABLE} WHERE enrollment_id IN "
+                    f"(SELECT id FROM {db.ENROLL_TABLE} WHERE student_id = ?)", (dave,))
+        cur.execute(f"DELETE FROM {db.ENROLL_TABLE} WHERE student_id = ?", (dave,))
+    new_id = db.enroll_by_name(dave, "Python")                         # 重选，拿到新的选课 id
+    assert ingest.record_batch([("Dave", cid, "absent")]) == [None]
+    with db as cur:
+        cur.execute(f"SELECT enrollment_id FROM {db.ATTEND_TABLE} ORDER BY id DESC LIMIT 1")
+        assert cur.fetchone()[0] == new_id
+    print("[OK] 写选课后清掉缓存的选课 id")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SchoolDB(pathlib.Path(tmp) / "attend.db", pool_size=2)
+        sid, cid = seed(db)
+        check_errors(db, sid, cid)
+        check_cancel(db, cid)
+        check_bad_batch(db, cid)
+        check_full(db, cid)
+        check_enroll_cache(db, cid)
+        db.close_pool()
+
+
+if __name__ == "__main__":
+    main()
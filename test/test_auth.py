@@ -0,0 +1,133 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import tempfile
+import time
+from src.db import SchoolDB
+from src.auth import LoginService, SessionTokens
+from src.session import SessionPool
+
+
+def check_login_cache(db: SchoolDB):
+    alice = db.register_student("Alice", "pwd", "a@x")
+    dup1 = db.register_student("Dup", "one", "d1@x")
+    dup2 = db.register_student("Dup", "two", "d2@x")
+    bob = db.register_teacher("Alice", "tpwd", "t@x")          # 与学生同名的老师
+
+    auth = LoginService(db, ttl=0.2)
+    assert auth.cached("student", "Alice", "pwd") is None       # 还没登录过
+    assert auth.authenticate("student", "Alice", "pwd") == alice
+    assert (auth.hits, auth.misses) == (0, 1)
+    assert auth.cached("student", "Alice", "pwd") == alice
+    assert auth.authenticate("student", "Alice", "pwd") == alice
+    assert (auth.hits, auth.misses) == (2, 1)
+
+    # 口令错误：不命中、不缓存，每次都查库
+    assert auth.authenticate("student", "Alice", "bad") is None
+    assert auth.authenticate("student", "Alice", "bad") is None
+    assert auth.misses == 3
+    assert auth.cached("student", "Alice", "pwd") == alice      # 缓存的正确口令不受影响
+
+    # 身份分开缓存；非 student 一律按 teacher
+    assert auth.authenticate("teacher", "Alice", "tpwd") == bob
+    assert auth.cached("admin", "Alice", "tpwd") == bob
+    assert auth.cached("student", "Alice", "tpwd") is None
+
+    # 同名用户各自按口令区分
+    assert auth.authenticate("student", "Dup", "one") == dup1
+    assert auth.authenticate("student", "Dup", "two") == dup2
+    assert auth.cached("student", "Dup", "one") is None         # 缓存里只留最近一个
+    assert auth.authenticate("student", "Dup", "one") == dup1
+
+    # 失效与过期
+    auth.invalidate("student", "Alice")
+    assert auth.cached("student", "Alice", "pwd") is None
+    assert auth.cached("teacher", "Alice", "tpwd") == bob
+    auth.invalidate(name="Alice")
+    assert auth.cached("teacher", "Alice", "tpwd") is None
+    assert auth.authenticate("student", "Alice", "pwd") == alice
+    time.sleep(0.25)
+    assert auth.cached("student", "Alice", "pwd") is None
+    assert len(auth) == 1                                        # 过期条目在访问时删除，只剩 Dup
+    print("[OK] 登录缓存：命中 / 口令错误不缓存 / 身份 / 同名 / 失效 / 过期")
+
+
+def check_tokens(db: SchoolDB):
+    tokens = SessionTokens(db, secret=b"k" * 32, ttl=0.2, max_sessions=3)
+    t1 = tokens.issue(1, True)
+    rt = tokens.resolve(t1)
+    assert (rt.user_id, rt.is_student) == (1, True)
+    sid, _, sig = t1.partition(".")
+    assert tokens.key(t1) == sid
+
+    # 篡改 / 伪造 / 空令牌
+    assert tokens.resolve(sid + "." + "0" * len(sig)) is None
+    assert tokens.resolve(sid) is None
+    assert tokens.resolve("nope." + sig) is None
+    assert tokens.resolve(None) is None
+    assert tokens.resolve(sid + ".签名") is None                 # 非 ASCII 签名不抛异常
+    assert tokens.resolve(sid + "." + "\udcff" * 4) is None
+    assert tokens.resolve(t1) is not None                        # 原令牌不受影响
+
+    # 注销
+    tokens.revoke(t1)
+    assert tokens.resolve(t1) is None
+    a, b = tokens.issue(2, True), tokens.issue(2, False)
+    assert tokens.revoke_user(2, True) == 1
+    assert tokens.resolve(a) is None and tokens.resolve(b) is not None
+
+    # 超过 max_sessions 淘汰最久未用的
+    tokens.revoke(b)
+    old, mid, new = tokens.issue(3, True), tokens.issue(4, True), tokens.issue(5, True)
+    tokens.resolve(old)                                          # old 变成最近使用
+    tokens.issue(6, True)
+    assert tokens.resolve(mid) is None and tokens.resolve(old) is not None
+    assert len(tokens) == 3 and tokens.evicted == 1
+
+    # 空闲超时；每次使用顺延
+    t = tokens.issue(7, False)
+    time.sleep(0.12)
+    assert tokens.resolve(t) is not None
+    time.sleep(0.12)
+    assert tokens.resolve(t) is not None
+    time.sleep(0.25)
+    assert tokens.resolve(t) is None
+    print("[OK] 会话令牌：篡改 / 注销 / 按用户注销 / LRU 淘汰 / 空闲超时")
+
+
+def check_session_binding(db: SchoolDB):
+    """聊天会话按令牌 id 取；别的身份拿同一个键不能顶替，注销后挂起的 INPUT 作废"""
+    tokens = SessionTokens(db)
+    pool = SessionPool(db, workers=1)
+    try:
+        t = tokens.issue(1, True)
+        key = tokens.key(t)
+        assert pool.run(key, 1, True, 'REG STRING x ""\nINPUT x\nSPEAK $x') == ""
+        assert pool.get(key, 1, True).resume is not None
+        try:
+            pool.get(key, 2, True)
+            raise AssertionError("不同身份取到了别人的会话")
+        except PermissionError:
+            pass
+        assert pool.get(key, 1, True).resume is not None        # 原会话未被替换
+
+        tokens.revoke(t)
+        pool.drop(key)
+        assert pool.get(key, 1, True).resume is None            # 同一个键重建后是新会话
+        assert pool.run(key, 1, True, 'SPEAK "hi"') == "hi"
+    finally:
+        pool.shutdown()
+    print("[OK] 聊天会话与令牌绑定：不被顶替，注销后作废")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SchoolDB(pathlib.Path(tmp) / "auth.db")
+        db.ensure_tables()
+        check_login_cache(db)
+        check_tokens(db)
+        check_session_binding(db)
+
+
+if __name__ == "__main__":
+    main()
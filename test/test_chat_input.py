@@ -0,0 +1,138 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import asyncio
+import contextlib
+import io
+import tempfile
+import threading
+import time
+from src.db import SchoolDB
+from src.parser import VarStore, MiniInterp
+from src.channels import BufferOutput, QueueInput, OutputSink, InputSource
+from src.compiler import compile_lines, execute
+from src.session import SessionPool
+
+ASK = 'REG STRING name ""\nSPEAK "你叫什么"\nINPUT name\nSPEAK "你好 " $name\nGPA'
+
+
+async def check_resume(db: SchoolDB):
+    """INPUT 挂起后不占线程：单线程会话池里其他会话照常执行，下一条消息接着跑"""
+    pool = SessionPool(db, workers=1)
+    try:
+        reply, waiting = await asyncio.wait_for(pool.chat("a", 1, True, ASK), 5)
+        assert (reply, waiting) == ("你叫什么", True), (reply, waiting)
+
+        # 唯一的线程没被卡住
+        reply, waiting = await asyncio.wait_for(pool.chat("b", 2, True, 'SPEAK "b"'), 5)
+        assert (reply, waiting) == ("b", False)
+
+        reply, waiting = await pool.chat("a", 1, True, "小明")
+        assert (reply, waiting) == ("你好 小明", False), (reply, waiting)
+        reply, _ = await pool.chat("a", 1, True, "SPEAK $name")
+        assert reply == "小明"
+
+        # 两次 INPUT：每条消息喂一个值
+        script = 'REG STRING x ""\nREG STRING y ""\nINPUT x\nINPUT y\nSPEAK $x "+" $y'
+        assert (await pool.chat("c", 3, True, script))[1] is True
+        assert (await pool.chat("c", 3, True, "1"))[1] is True
+        assert await pool.chat("c", 3, True, "2") == ("1+2", False)
+    finally:
+        pool.shutdown()
+    print("[OK] INPUT 挂起 / 恢复，不占线程")
+
+
+async def check_same_session(db: SchoolDB):
+    """同一会话并发的多条消息：各自只拿到自己的输出"""
+    pool = SessionPool(db, workers=4)
+    try:
+        msgs = [f'SPEAK "m{i}"\nEQUAL 1 1\nSPEAK "/{i}"' for i in range(400)]
+        replies = await asyncio.gather(*(pool.chat("same", 1, True, m) for m in msgs))
+        assert [r for r, _ in replies] == [f"m{i}/{i}" for i in range(400)]
+    finally:
+        pool.shutdown()
+    print("[OK] 同一会话并发消息的输出互不串")
+
+
+def check_timeout(db: SchoolDB):
+    """阻塞式输入（REPL / 批处理）超时报错后继续执行后面的语句"""
+    out = BufferOutput()
+    interp = MiniInterp(VarStore(), is_student=True, user_id=1, db=db, out=out,
+                        inp=QueueInput(timeout=0.05))
+    execute(compile_lines(ASK.splitlines()), interp)
+    text = out.drain()
+    assert "等待变量 'name' 的输入超时" in text and text.endswith("你好 "), text
+
+    inp = QueueInput(timeout=1)
+    inp.feed("小红")
+    interp = MiniInterp(VarStore(), is_student=True, user_id=1, db=db, out=out, inp=inp)
+    execute(compile_lines(ASK.splitlines()), interp)
+    assert out.drain().endswith("你好 小红")
+    print("[OK] 阻塞 INPUT 超时 / 预先喂入")
+
+
+def check_release(tmp: str):
+    """阻塞在 INPUT 上的脚本不占连接：连接池只有 1 条时，别的线程照样能查库"""
+    db = SchoolDB(pathlib.Path(tmp) / "one.db", pool_size=1)
+    db.ensure_tables()
+    db._pool.timeout = 1.0
+    out, inp = BufferOutput(), QueueInput(timeout=10)
+    interp = MiniInterp(VarStore(), is_student=True, user_id=1, db=db, out=out, inp=inp)
+    program = compile_lines(ASK.splitlines())
+    assert program.uses_db
+    runner = threading.Thread(target=execute, args=(program, interp))
+    runner.start()
+    while "你叫什么" not in out.getvalue():
+        time.sleep(0.01)
+    with db as cur:                                  # 借不到连接会 TimeoutError
+        cur.execute("SELECT 1")
+    inp.feed("小刚")
+    runner.join(5)
+    assert not runner.is_alive() and out.drain().endswith("你好 小刚")
+    db.close_pool()
+    print("[OK] 等待 INPUT 期间连接已归还")
+
+
+def check_no_stdout(db: SchoolDB):
+    """关键字表的警告 / 错误与变量 dump 都走解释器的输出通道，不漏到 stdout"""
+    out = BufferOutput()
+    interp = MiniInterp(VarStore(), is_student=True, user_id=1, db=db, out=out)
+    console = io.StringIO()
+    with contextlib.redirect_stdout(console):
+        interp.kw.register("HELLO", lambda tail: interp.out.say("hi " + tail))
+        interp.kw.register("HELLO", lambda tail: interp.out.say("hey " + tail))
+        interp.kw.dispatch("NOPE", "")
+        execute(compile_lines(["REG NUM x 1", "HELLO you"]), interp)
+        interp.vars.dump()
+    assert console.getvalue() == "", console.getvalue()
+    assert out.drain() == ("[WARN] 关键字 'HELLO' 被覆盖\n[ERROR] 未知关键字: NOPE\n"
+                           "hey you\n  x = 1.0\n")
+    print("[OK] 关键字 / dump 输出走通道")
+
+
+def check_abstract():
+    """没实现 write / read_line 的通道在构造时就报错"""
+    for base in (OutputSink, InputSource):
+        try:
+            type("Broken", (base,), {})()
+        except TypeError:
+            continue
+        raise AssertionError(f"{base.__name__} 子类缺方法却能实例化")
+    print("[OK] 通道基类为抽象类")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SchoolDB(pathlib.Path(tmp) / "chat.db", pool_size=2)
+        db.ensure_tables()
+        asyncio.run(check_resume(db))
+        asyncio.run(check_same_session(db))
+        check_timeout(db)
+        check_release(tmp)
+        check_no_stdout(db)
+        check_abstract()
+        db.close_pool()
+
+
+if __name__ == "__main__":
+    main()
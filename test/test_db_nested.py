@@ -0,0 +1,93 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import tempfile
+from src.db import SchoolDB
+
+
+def names(db: SchoolDB) -> list:
+    with db as cur:
+        cur.execute(f"SELECT name FROM {db.TEACHER_TABLE} ORDER BY id")
+        return [r[0] for r in cur.fetchall()]
+
+
+def add(cur, name: str) -> None:
+    cur.execute(f"INSERT INTO {SchoolDB.TEACHER_TABLE} (name, password, email) VALUES (?, 'x', ?)",
+                (name, f"{name}@x"))
+
+
+def inner_fails(db: SchoolDB, name: str) -> None:
+    """内层写一半后出错，调用方吞掉异常"""
+    try:
+        with db as cur:
+            add(cur, name)
+            raise ValueError("boom")
+    except ValueError:
+        pass
+
+
+def check_nested(db: SchoolDB):
+    # 外层已有写入：内层回滚到保存点，外层的修改照常提交
+    with db as cur:
+        add(cur, "A")
+        inner_fails(db, "B")
+        add(cur, "C")
+    assert names(db) == ["A", "C"], names(db)
+
+    # 外层还没写：内层出错整体回滚，之后外层的写入不受影响
+    with db as cur:
+        cur.execute("SELECT 1")
+        inner_fails(db, "D")
+        add(cur, "E")
+    assert names(db) == ["A", "C", "E"], names(db)
+
+    # 多层嵌套：成功的内层随外层提交，失败的只撤销自己那一层
+    with db as cur:
+        add(cur, "F")
+        with db as cur2:
+            add(cur2, "G")
+            inner_fails(db, "H")
+            with db as cur3:
+                add(cur3, "I")
+    assert names(db) == ["A", "C", "E", "F", "G", "I"], names(db)
+
+    # 外层出错：内层已释放的修改一并回滚
+    try:
+        with db as cur:
+            add(cur, "J")
+            with db as cur2:
+                add(cur2, "K")
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    assert names(db)[-1] == "I"
+    print("[OK] 嵌套 with：内层出错只回滚自己的修改")
+
+
+def check_suspended(db: SchoolDB):
+    """suspended 提交并归还连接后，之前的保存点不再存在，内层退出不应出错"""
+    with db as cur:
+        add(cur, "L")
+        with db as cur2:
+            add(cur2, "M")
+            with db.suspended():
+                pass
+            cur2 = db._local.conn.cursor()
+            add(cur2, "N")
+        inner_fails(db, "O")
+    assert names(db)[-3:] == ["L", "M", "N"], names(db)
+    print("[OK] suspended 之后嵌套 with 正常退出")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        for pool_size in (0, 2):
+            db = SchoolDB(pathlib.Path(tmp) / f"nested{pool_size}.db", pool_size=pool_size)
+            db.ensure_tables()
+            check_nested(db)
+            check_suspended(db)
+            db.close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import tempfile
+from src.db import SchoolDB
+from src.parser import VarStore, MiniInterp, Const, Var, Call, Cmp, Fail, parse_expr, compile_expr
+from src.channels import BufferOutput
+
+# (表达式, 结构, 求值结果)；$x = 42，学生没选课 GPA = 0
+VALID = [
+    ("EQUAL $x 30", "EQUAL($x, 30.0)", False),
+    ("GREATER $x 3.5", "GREATER($x, 3.5)", True),
+    ('"hello"', "'hello'", "hello"),
+    ("True", "True", True),
+    ("$x", "$x", 42.0),
+    ("$x >= 10", "($x >= 10.0)", True),
+    ("$x != 42", "($x != 42.0)", False),
+    ("EQUAL (GREATER $x 1) True", "EQUAL(GREATER($x, 1.0), True)", True),
+    ("EQUAL(GREATER($x, 1), True)", "EQUAL(GREATER($x, 1.0), True)", True),
+    ("GREATER GPA 3.5", "GREATER(GPA(), 3.5)", False),
+    ("GPA > 3.5", "(GPA() > 3.5)", False),
+    ("(GPA) == 0", "(GPA() == 0.0)", True),
+]
+
+# 语法 / 运行期错误：解析不抛异常，求值时报
+ERRORS = [
+    ("", "空表达式"),
+    ("FOO 1", "未知函数: FOO"),
+    ("(1", "表达式不完整"),
+    ('"abc', "无法解析的字面量"),
+    ("EQUAL 1", "EQUAL 需要 2 个参数"),
+    ("EQUAL 1 1 2", "EQUAL 需要 2 个参数"),
+    ('$x > "a"', "只支持 NUM 类型"),
+    ("$y", "未定义变量: $y"),
+    ('GPA "x"', "GPA 参数必须是 NUM"),
+    ("GPA True", "GPA 参数必须是 NUM"),
+    ('GPA_ALL 1 "x"', "GPA_ALL 参数必须是 NUM"),
+]
+
+
+def check_valid(env):
+    for text, shape, expect in VALID:
+        node = parse_expr(text)
+        assert isinstance(node, (Const, Var, Call, Cmp)), text
+        assert repr(node) == shape, (text, repr(node))
+        got = node.ev(env)
+        assert got == expect and type(got) is type(expect), (text, got)
+        assert env.eval_expr(text) == got
+    print(f"[OK] {len(VALID)} 个表达式：前缀 / 括号嵌套 / 中缀比较 / 无参内置函数")
+
+
+def check_errors(env):
+    for text, msg in ERRORS:
+        node = parse_expr(text)                                 # 不抛异常
+        try:
+            node.ev(env)
+            raise AssertionError(f"应当报错: {text!r}")
+        except ValueError as e:
+            assert msg in str(e), (text, e)
+    assert isinstance(parse_expr("FOO 1"), Fail)
+    print(f"[OK] {len(ERRORS)} 个错误表达式：编译期不抛，执行期报错")
+
+
+def check_cache(env):
+    assert compile_expr("$x >= 10") is compile_expr("$x >= 10")   # 同一文本只解析一次
+    env.vars.reg("z", 1.0)
+    node = compile_expr("GREATER $z 0")
+    assert node.ev(env) is True
+    env.vars.update("z", -1.0)
+    assert node.ev(env) is False                                # 节点只缓存结构，变量每次现取
+    print("[OK] 表达式缓存：同文本同节点，变量值不被缓存")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SchoolDB(pathlib.Path(tmp) / "expr.db")
+        db.ensure_tables()
+        sid = db.register_student("Alice", "pwd", "a@x")
+        interp = MiniInterp(VarStore(), is_student=True, user_id=sid, db=db, out=BufferOutput())
+        interp.vars.reg("x", 42.0)
+        check_valid(interp.expr)
+        check_errors(interp.expr)
+        check_cache(interp.expr)
+
+
+if __name__ == "__main__":
+    main()
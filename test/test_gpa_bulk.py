@@ -0,0 +1,55 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import tempfile
+from src.db import SchoolDB
+
+
+def seed(db: SchoolDB) -> tuple:
+    """同 test_cal_gpa：Alice 选 Python / Math / PE，另有一名没成绩的 Carol"""
+    db.ensure_tables()
+    tid = db.register_teacher("Bob", "pwd", "bob@x.com")
+    sid = db.register_student("Alice", "pwd", "alice@x.com")
+    other = db.register_student("Carol", "pwd", "carol@x.com")
+    for name, credit in (("Python", 3.0), ("Math", 4.0), ("PE", 1.0)):
+        db.create_course(name, tid, credit)
+        db.enroll_by_name(sid, name)
+    db.set_score("Python", "Bob", "Alice", 85)
+    db.set_score("Math", "Bob", "Alice", 92)
+    db.set_score("PE", "Bob", "Alice", 0)                       # 0 分不参与 GPA
+    return sid, other
+
+
+def check_bulk(db: SchoolDB, sid: int, other: int):
+    """批量 GPA：一次查询，结果与逐个计算一致"""
+    gpa = db.calc_gpa(sid)
+    single = lambda x: 4 - 3 * (100 - x) ** 2 / 1600
+    assert abs(gpa - (3 * single(85) + 4 * single(92)) / 7) < 1e-9, gpa
+    bulk = db.calc_gpa_bulk()
+    assert set(bulk) == {sid, other}
+    assert abs(bulk[sid] - gpa) < 1e-9 and bulk[other] == 0.0
+    assert db.calc_gpa_bulk([sid]) == {sid: bulk[sid]}
+    print(f"[OK] 批量 GPA 与单个一致：Alice = {bulk[sid]:.3f}")
+
+
+def check_materialised(db: SchoolDB, sid: int, other: int):
+    """物化 GPA：set_score 增量维护，读取不再重算"""
+    assert abs(db.get_gpa(sid) - db.calc_gpa(sid)) < 1e-9
+    assert db.get_gpa(other) == 0.0
+    assert not db.check_gpa()
+    db.set_score("Math", "Bob", "Alice", 60)
+    assert abs(db.get_gpa(sid) - db.calc_gpa(sid)) < 1e-9
+    assert not db.check_gpa()
+    print("[OK] 物化 GPA 与重算一致，改分后随之更新")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SchoolDB(pathlib.Path(tmp) / "gpa.db")
+        sid, other = seed(db)
+        check_bulk(db, sid, other)
+        check_materialised(db, sid, other)
+
+
+if __name__ == "__main__":
+    main()
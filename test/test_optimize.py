@@ -0,0 +1,87 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import pickle
+import tempfile
+from src.db import SchoolDB
+from src.parser import VarStore, MiniInterp, Const
+from src.channels import BufferOutput, QueueInput
+from src.compiler import compile_lines, execute, OP_BRANCH, OP_REG, OP_SPEAK, OP_INPUT
+from src.optimizer import optimize
+
+# 边界情况：重复 REG、类型不符、INPUT 前后、非法条件、汇合点取值不一致
+CASES = [
+    ["REG NUM x 1", "REG NUM x 2", 'SPEAK "x=" $x'],
+    ["REG NUM x \"a\"", "REG STRING x \"b\"", 'SPEAK $x "!"'],
+    ["REG NUM x 5", "IF GREATER $x 3", "REG NUM y 1", "ELSE", "REG NUM y 2", "ENDIF", 'SPEAK $y'],
+    ["REG NUM x 5", "IF GREATER $x 9", "REG NUM y 1", "ENDIF", 'SPEAK $y'],
+    ["REG NUM x 5", "IF $x", 'SPEAK "t"', "ELSE", 'SPEAK "f"', "ENDIF"],
+    ["EQUAL 1 1", "IF $result", 'SPEAK "r"', "ENDIF", "GREATER 1 \"a\"", 'SPEAK $result'],
+    ["REG STRING s \"$x\"", 'SPEAK $s', "REG BOOL b True", 'SPEAK $b'],
+    ["REG NUM x 1", "IF EQUAL $x 1", "IF EQUAL $x 2", 'SPEAK "no"', "ELIF EQUAL $x 1",
+     'SPEAK "yes"', "ENDIF", "ENDIF", 'SPEAK "end"'],
+    ["REG STRING a \"x\"", "IF EQUAL 1 1", "REG STRING b \"1\"", "ELSE", "REG STRING b \"2\"",
+     "ENDIF", 'SPEAK $a $b', "IF EQUAL $b \"1\"", 'SPEAK "one"', "ENDIF"],
+]
+
+
+def run(program, db: SchoolDB, inputs=()) -> str:
+    out, inp = BufferOutput(), QueueInput(timeout=0)
+    for line in inputs:
+        inp.feed(line)
+    execute(program, MiniInterp(VarStore(), is_student=True, user_id=1, db=db, out=out, inp=inp))
+    return out.getvalue()
+
+
+def check_equivalence(db: SchoolDB):
+    for lines in CASES:
+        program = compile_lines(lines)
+        assert run(program, db) == run(optimize(program), db), lines
+    print(f"[OK] {len(CASES)} 个边界用例优化前后输出一致")
+
+
+def check_folding(db: SchoolDB):
+    program = compile_lines(["REG NUM level 3", 'REG STRING tag "v"',
+                             "IF GREATER $level 5", 'SPEAK "big"', "ELSE",
+                             'SPEAK $tag ":" $level', "ENDIF"])
+    before = [ins.op for ins in program.code]
+    opt = optimize(program)
+    assert [ins.op for ins in program.code] == before           # 原程序不变
+    assert not any(ins.op == OP_BRANCH for ins in opt.code)      # 常量条件的分支被消掉
+    speak = [ins for ins in opt.code if ins.op == OP_SPEAK]
+    assert [ins.a for ins in speak] == [["v:3.00"]]              # 变量代入、相邻字面量合并
+    assert len(opt.code) < len(program.code)
+    assert run(opt, db) == run(program, db) == "v:3.00"
+    pickle.loads(pickle.dumps(opt))                             # 优化结果仍可发给子进程
+    print("[OK] 常量折叠：死分支消除 / 变量代入 / 原程序不变")
+
+
+def check_barriers(db: SchoolDB):
+    # INPUT 之后变量值未知，不能折叠
+    lines = ['REG STRING s "a"', "INPUT s", 'IF EQUAL $s "a"', 'SPEAK "same"', "ELSE",
+             'SPEAK "diff " $s', "ENDIF"]
+    program = compile_lines(lines)
+    opt = optimize(program)
+    assert any(ins.op == OP_INPUT for ins in opt.code)
+    assert any(ins.op == OP_BRANCH for ins in opt.code)
+    for value in ("a", "b"):
+        assert run(opt, db, [value]) == run(program, db, [value]), value
+    # REG 失败（重名）时保留首次的值
+    opt = optimize(compile_lines(["REG NUM x 1", "REG NUM x 2", "IF EQUAL $x 1", 'SPEAK "1"', "ENDIF"]))
+    reg_values = [ins.c.value for ins in opt.code if ins.op == OP_REG and isinstance(ins.c, Const)]
+    assert reg_values == [1.0, 2.0]
+    assert run(opt, db).endswith("1")
+    print("[OK] INPUT / 重名 REG 不被错误折叠")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SchoolDB(pathlib.Path(tmp) / "opt.db")
+        db.ensure_tables()
+        check_equivalence(db)
+        check_folding(db)
+        check_barriers(db)
+
+
+if __name__ == "__main__":
+    main()
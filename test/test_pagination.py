@@ -0,0 +1,175 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import json
+import sqlite3
+import tempfile
+from src.db import SchoolDB, ndjson_page
+
+N_STUDENTS = 30
+N_COURSES = 7
+N_ATTEND = 200
+STATUSES = ("normal", "absent", "late_or_early")
+
+
+def seed(db: SchoolDB) -> None:
+    db.ensure_tables()
+    db.bulk_register_teachers([("Bob", "pwd", "bob@x")])
+    db.bulk_register_students([(f"S{i}", "pwd", f"s{i}@x") for i in range(N_STUDENTS)])
+    db.bulk_create_courses([(f"C{c}", "Bob", 2.0) for c in range(N_COURSES)])
+    db.bulk_enroll([(f"S{i}", f"C{(i + k) % N_COURSES}") for i in range(N_STUDENTS) for k in range(3)])
+    with db as cur:
+        cur.execute(f"SELECT MAX(id) FROM {db.ENROLL_TABLE}")
+        n_enroll = cur.fetchone()[0]
+        cur.executemany(
+            f"INSERT INTO {db.ATTEND_TABLE} (enrollment_id, status, timestamp) VALUES (?,?,?)",
+            ((1 + i * 7 % n_enroll, STATUSES[i % 3], "2025-01-01T08:00:00") for i in range(N_ATTEND)),
+        )
+
+
+def full(db: SchoolDB, sql: str, params=()) -> list:
+    with db as cur:
+        cur.execute(sql, params)
+        return cur.fetchall()
+
+
+def walk(db: SchoolDB, kind: str, limit: int, **filters) -> list:
+    """手动翻页：每页 after=上一页最后的 id，直到返回空页"""
+    fetch, rows, after = getattr(db, f"page_{kind}"), [], 0
+    while True:
+        page = fetch(after=after, limit=limit, **filters)
+        assert len(page) <= limit
+        if not page:
+            return rows
+        rows += page
+        after = page[-1][0]
+
+
+def check_boundaries(db: SchoolDB):
+    courses = full(db, f"SELECT id FROM {db.COURSE_TABLE} ORDER BY id")
+    last = courses[-1][0]
+    assert db.page_courses(after=last) == []                    # after 等于最后一个 id
+    assert [r[0] for r in db.page_courses(after=last - 1)] == [last]
+    assert db.page_courses(after=-5, limit=1)[0][0] == courses[0][0]
+
+    # 页大小整除行数：最后一页满，下一页为空，不多不少
+    assert walk(db, "courses", N_COURSES) == db.page_courses(limit=N_COURSES)
+    assert len(list(db.scan("courses", page=N_COURSES))) == N_COURSES
+
+    # limit 夹在 [1, MAX_PAGE]
+    assert len(db.page_courses(limit=0)) == 1
+    assert len(db.page_courses(limit=-3)) == 1
+    assert len(db.page_attendance(limit=10 ** 6)) == N_ATTEND
+    db.MAX_PAGE = 5
+    try:
+        assert len(db.page_attendance(limit=100)) == 5
+        assert len(list(db.scan("attendance", page=100))) == N_ATTEND
+    finally:
+        del db.MAX_PAGE
+    print("[OK] 分页边界：末行之后为空 / 整除页 / limit 上下限")
+
+
+def check_walks(db: SchoolDB):
+    expect = full(db, f"SELECT id FROM {db.ATTEND_TABLE} ORDER BY id")
+    for limit in (1, 7, N_ATTEND, N_ATTEND + 1):
+        ids = [r[0] for r in walk(db, "attendance", limit)]
+        assert ids == [r[0] for r in expect], limit             # 无重复、无遗漏、升序
+        assert [r[0] for r in db.scan("attendance", page=limit)] == ids
+
+    # 过滤条件
+    for sid in (1, 17):
+        expect = full(db, f"""SELECT a.id FROM {db.ATTEND_TABLE} a
+                              JOIN {db.ENROLL_TABLE} e ON a.enrollment_id = e.id
+                              WHERE e.student_id = ? ORDER BY a.id""", (sid,))
+        got = walk(db, "attendance", 7, student_id=sid)
+        assert [r[0] for r in got] == [r[0] for r in expect] and got
+        assert {r[1] for r in got} == {f"S{sid - 1}"}
+    got = list(db.scan("attendance", page=7, student_id=1, course_id=2))
+    assert got and {(r[1], r[2]) for r in got} == {("S0", 2)}
+    assert list(db.scan("attendance", page=7, course_id=10 ** 6)) == []
+
+    for cid in range(1, N_COURSES + 1):
+        expect = full(db, f"SELECT id, student_id FROM {db.ENROLL_TABLE} WHERE course_id = ? ORDER BY id",
+                      (cid,))
+        got = walk(db, "roster", 4, course_id=cid)
+        assert [(r[0], r[1]) for r in got] == expect, cid
+    print("[OK] 逐页遍历：page=1/7/整表 无重复无遗漏，按学生 / 课程过滤")
+
+
+def traced(db: SchoolDB, fn) -> list:
+    """执行 fn，记下期间发出的 SELECT（参数已代入）"""
+    stmts, acquire = [], db._acquire
+    def traced_acquire():
+        conn = acquire()
+        conn.set_trace_callback(stmts.append)
+        return conn
+    db._acquire = traced_acquire
+    try:
+        fn()
+    finally:
+        del db._acquire
+    return [s for s in stmts if s.lstrip().upper().startswith("SELECT")]
+
+
+def check_plans(db: SchoolDB):
+    """每页都是 keyset 查询：不借助临时 B 树排序；选课多时按考勤主键顺序扫"""
+    def pages():
+        for kind, filters in (("attendance", {}), ("attendance", {"student_id": 1}),
+                              ("attendance", {"course_id": 2}),
+                              ("attendance", {"student_id": 1, "course_id": 2}),
+                              ("roster", {"course_id": 2}), ("courses", {})):
+            walk(db, kind, 7, **filters)
+
+    conn = sqlite3.connect(db.db_path)
+    try:
+        for merge_max in (db.MERGE_MAX, 0):
+            db.MERGE_MAX = merge_max
+            try:
+                stmts = traced(db, pages)
+            finally:
+                del db.MERGE_MAX
+            assert stmts
+            for sql in stmts:
+                plan = " | ".join(r[3] for r in conn.execute("EXPLAIN QUERY PLAN " + sql))
+                assert "TEMP B-TREE" not in plan, (sql, plan)
+            if merge_max == 0:
+                scans = [s for s in stmts if "CROSS JOIN" in s and "+e." in s]
+                assert scans, "选课多时应沿考勤主键扫描"
+                plan = " | ".join(r[3] for r in conn.execute("EXPLAIN QUERY PLAN " + scans[0]))
+                assert plan.startswith("SEARCH a USING INTEGER PRIMARY KEY"), plan
+    finally:
+        conn.close()
+
+    # 沿主键扫描的分支与逐条归并的结果一致
+    for filters in ({"student_id": 17}, {"course_id": 3}, {"student_id": 1, "course_id": 2}):
+        expect = walk(db, "attendance", 3, **filters)
+        db.MERGE_MAX = 0
+        try:
+            assert walk(db, "attendance", 3, **filters) == expect and expect, filters
+        finally:
+            del db.MERGE_MAX
+    print("[OK] 查询计划：各分页均无临时排序，过滤页按索引 / 主键顺序接着读")
+
+
+def check_ndjson(db: SchoolDB):
+    fields = db.PAGE_FIELDS["courses"]
+    rows = db.page_courses(limit=3)
+    lines = ndjson_page(fields, rows).splitlines()
+    assert [json.loads(l) for l in lines] == [dict(zip(fields, r)) for r in rows]
+    assert ndjson_page(fields, []) == ""
+    assert "选课" in ndjson_page(("name",), [("选课",)])          # 不转义成 \uXXXX
+    print("[OK] NDJSON 编码")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SchoolDB(pathlib.Path(tmp) / "page.db")
+        seed(db)
+        check_boundaries(db)
+        check_walks(db)
+        check_plans(db)
+        check_ndjson(db)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import tempfile
+import threading
+from src.db import SchoolDB
+
+N_THREADS = 8
+N_ROUNDS = 200
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SchoolDB(pathlib.Path(tmp) / "race.db", pool_size=N_THREADS)
+        db.ensure_tables()
+        tid = db.register_teacher("Bob", "pwd", "bob@x")
+        sid = db.register_student("Alice", "pwd", "alice@x")
+        cid = db.create_course("Python", tid, 3.0)
+        db.create_course("Math", tid, 2.0)
+        db.enroll_by_name(sid, "Python")
+        db.enroll_by_name(sid, "Math")
+        db.set_score("Math", "Bob", "Alice", 90)
+
+        # 多个线程同时改同一条选课的成绩，同时另一个线程改学分
+        start = threading.Barrier(N_THREADS + 1)
+
+        def scorer(k: int):
+            start.wait()
+            for i in range(N_ROUNDS):
+                db.set_score("Python", "Bob", "Alice", (k * 7 + i) % 101)
+
+        def crediter():
+            start.wait()
+            for i in range(N_ROUNDS):
+                db.set_course_credit(cid, 1.0 + i % 4)
+
+        ts = [threading.Thread(target=scorer, args=(k,)) for k in range(N_THREADS)]
+        ts.append(threading.Thread(target=crediter))
+        for t in ts:
+            t.start()
+        for t in ts:
+            t.join()
+
+        diff = db.check_gpa()
+        assert not diff, f"并发赋分后物化 GPA 漂移: {diff}"
+        print(f"[OK] {N_THREADS} 线程并发 set_score + set_course_credit，物化 GPA 与重算一致")
+        db.close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import gzip
+import os
+import tempfile
+from src.static import StaticCache, _accepts
+
+PAGE = ("<html><body>" + "选课系统 " * 200 + "</body></html>").encode("utf-8")
+
+
+def check_encoding(static: StaticCache):
+    status, body, h = static.respond("index.html", {})
+    assert status == 200 and body == PAGE and "Content-Encoding" not in h
+    assert h["Content-Type"] == "text/html; charset=utf-8" and h["Vary"] == "Accept-Encoding"
+    plain = h["ETag"]
+
+    status, body, h = static.respond("index.html", {"accept-encoding": "gzip, deflate"})
+    assert h["Content-Encoding"] == "gzip" and gzip.decompress(body) == PAGE
+    assert h["ETag"] != plain                                   # 各编码 ETag 不同
+
+    # q=0 表示不接受
+    for ae in ("gzip;q=0", "gzip; q=0, identity", "*;q=0", "deflate"):
+        status, body, h = static.respond("index.html", {"accept-encoding": ae})
+        assert body == PAGE and "Content-Encoding" not in h, ae
+    status, body, h = static.respond("index.html", {"accept-encoding": "*"})
+    assert h["Content-Encoding"] in ("gzip", "br")
+    assert _accepts("gzip;q=0.5, br;q=bad") == {"gzip": 0.5, "br": 0.0}
+    print("[OK] Accept-Encoding：gzip 往返 / q=0 回落原文 / 通配")
+
+
+def check_etag(static: StaticCache):
+    gz = {"accept-encoding": "gzip"}
+    etag = static.respond("index.html", gz)[2]["ETag"]
+    for inm in (etag, "W/" + etag, f'"other", {etag}', "*"):
+        status, body, h = static.respond("index.html", dict(gz, **{"if-none-match": inm}))
+        assert (status, body) == (304, b""), inm
+        assert h["ETag"] == etag and "Content-Encoding" not in h
+    # 别的编码的 ETag 不算命中
+    status, body, _ = static.respond("index.html", {"if-none-match": etag})
+    assert (status, body) == (200, PAGE)
+    status, _, _ = static.respond("index.html", dict(gz, **{"if-none-match": '"stale"'}))
+    assert status == 200
+    print("[OK] ETag：命中 304 空响应 / W/ 与 * / 编码不同不命中")
+
+
+def check_reload(root: pathlib.Path):
+    path = root / "index.html"
+    prod, dev = StaticCache(root), StaticCache(root, dev=True)
+    old = dev.respond("index.html", {})[2]["ETag"]
+    path.write_bytes(b"<p>new</p>")
+    st = os.stat(path)
+    os.utime(path, (st.st_atime, st.st_mtime + 10))              # 保证 mtime 变化
+    status, body, h = dev.respond("index.html", {"accept-encoding": "gzip"})
+    assert body == b"<p>new</p>" and h["ETag"] != old
+    assert "Content-Encoding" not in h                          # 小文件不压缩
+    assert prod.respond("index.html", {})[1] == PAGE            # 非 dev 模式不再读盘
+    print("[OK] dev 模式按 mtime 重新加载，非 dev 模式不读盘")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = pathlib.Path(tmp)
+        (root / "index.html").write_bytes(PAGE)
+        static = StaticCache(root)
+        check_encoding(static)
+        check_etag(static)
+        check_reload(root)
+
+
+if __name__ == "__main__":
+    main()